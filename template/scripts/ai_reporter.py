@@ -14,6 +14,8 @@ import sys
 from datetime import datetime
 from pathlib import Path
 
+from vault_scanner import refresh_note
+
 SCRIPTS_DIR = Path(__file__).parent
 VAULT_DIR = SCRIPTS_DIR.parent
 DAILY_DIR = VAULT_DIR / "Daily"
@@ -87,6 +89,7 @@ Daily Note:
         # Append AI section to daily note
         updated_content = content.rstrip() + ai_section
         daily_path.write_text(updated_content, encoding="utf-8")
+        refresh_note(daily_path, VAULT_DIR)
         
         print(f"  ✅ Daily Note enriched with {model_name}")
         return True
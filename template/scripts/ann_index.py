@@ -0,0 +1,326 @@
+"""
+🧭 Approximate Nearest-Neighbour Index (IVF)
+
+Optional inverted-file index over the embedding store for large vaults.
+Rows are clustered with spherical k-means; a query scores only the rows
+in the `nprobe` closest clusters instead of the whole matrix. Raising
+nprobe trades latency for recall (nprobe = nlist is exact search).
+
+Cluster assignments are keyed by chunk hash, so build_index() only
+assigns new chunks and drops deleted ones; the centroids are retrained
+when the index has grown or shrunk a lot since training. Requires NumPy.
+
+Layout (inside .search_index/):
+  ivf.npz   centroids, per-row keys and cluster ids, CSR row lists (order, offsets)
+
+Usage:
+  python ann_index.py                              # Print index statistics
+  python ann_index.py --benchmark [rows] [dim]     # Recall/latency vs exact search
+"""
+
+import hashlib
+import re
+import sys
+import time
+from pathlib import Path
+
+import embedding_store
+from vector_index import VectorIndex, np
+
+SCRIPTS_DIR = Path(__file__).parent
+INDEX_DIR = SCRIPTS_DIR / ".search_index"
+ANN_NAME = "ivf.npz"
+ANN_VERSION = 1
+DEFAULT_NPROBE = 16
+# Below this many rows exact search is already fast enough
+DEFAULT_MIN_ROWS = 20000
+KMEANS_ITERS = 10
+# Rows sampled per centroid when training
+TRAIN_SAMPLE = 64
+BLOCK_ROWS = 65536
+SHA1_RE = re.compile(r'^[0-9a-f]{40}$')
+
+
+def auto_nlist(count):
+    """About 4 * sqrt(N) clusters"""
+    return max(1, min(count, int(4 * count ** 0.5)))
+
+
+def key_bytes(key):
+    """Compact 20-byte key: the chunk hash itself, or a sha1 of other keys"""
+    if SHA1_RE.match(key):
+        return bytes.fromhex(key)
+    return hashlib.sha1(key.encode("utf-8")).digest()
+
+
+def _as_f32(block):
+    return block if block.dtype == np.float32 else block.astype(np.float32)
+
+
+def _assign(matrix, centroids, rows=None):
+    """Nearest centroid (max inner product) for every row, in blocks"""
+    rows = np.arange(len(matrix)) if rows is None else rows
+    out = np.empty(len(rows), dtype=np.int32)
+    for i in range(0, len(rows), BLOCK_ROWS):
+        block = _as_f32(matrix[rows[i:i + BLOCK_ROWS]])
+        out[i:i + BLOCK_ROWS] = np.argmax(block @ centroids.T, axis=1)
+    return out
+
+
+def train(matrix, nlist, iters=KMEANS_ITERS, seed=0):
+    """Spherical k-means on a sample of the rows; returns unit centroids"""
+    rng = np.random.default_rng(seed)
+    count = len(matrix)
+    nlist = max(1, min(nlist, count))
+    sample_size = min(count, nlist * TRAIN_SAMPLE)
+    sample = _as_f32(matrix[np.sort(rng.choice(count, sample_size, replace=False))])
+    centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+    for _ in range(iters):
+        labels = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        empty = np.bincount(labels, minlength=nlist) == 0
+        # Reseed empty clusters with random sample rows
+        sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = sums / norms
+    return centroids.astype(np.float32)
+
+
+class IVFIndex:
+    """IVF index bound to a row matrix; search() matches VectorIndex.search()"""
+
+    def __init__(self, centroids, keys, labels, trained_count, nprobe=DEFAULT_NPROBE, matrix=None, stamp=None,
+                 order=None, offsets=None):
+        self.centroids = centroids
+        self.keys = np.asarray(keys, dtype="S20")
+        self.labels = labels
+        self.trained_count = trained_count
+        self.nprobe = nprobe
+        self.matrix = matrix
+        self.stamp = stamp
+        # CSR layout: rows of cluster c are order[offsets[c]:offsets[c + 1]]
+        # (stored in ivf.npz, so loading for a query doesn't re-sort every row)
+        if order is None or offsets is None:
+            order = np.argsort(labels, kind="stable").astype(np.int32)
+            offsets = np.searchsorted(labels[order], np.arange(len(centroids) + 1)).astype(np.int64)
+        self.order = order
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def nlist(self):
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, keys, matrix, nlist=None, nprobe=DEFAULT_NPROBE, previous=None):
+        """Index rows by key, reusing a previous index's assignments where keys match
+
+        Returns (index, stats) with stats = {"inserted", "deleted", "retrained"}.
+        """
+        keys = np.asarray(keys, dtype="S20")
+        count = len(keys)
+        reuse = (
+            previous is not None
+            and previous.centroids.shape[1] == matrix.shape[1]
+            and (not nlist or previous.nlist == min(nlist, previous.trained_count))
+            and previous.trained_count / 4 <= count <= previous.trained_count * 2
+        )
+        if not reuse:
+            centroids = train(matrix, nlist or auto_nlist(count))
+            labels = _assign(matrix, centroids)
+            stats = {"inserted": count, "deleted": len(previous) if previous else 0, "retrained": True}
+            return cls(centroids, keys, labels, count, nprobe, matrix), stats
+
+        known = dict(zip(previous.keys.tolist(), previous.labels.tolist()))
+        labels = np.empty(count, dtype=np.int32)
+        missing = []
+        for row, key in enumerate(keys.tolist()):
+            label = known.pop(key, None)
+            if label is None:
+                missing.append(row)
+            else:
+                labels[row] = label
+        if missing:
+            missing = np.asarray(missing)
+            labels[missing] = _assign(matrix, previous.centroids, missing)
+        stats = {"inserted": len(missing), "deleted": len(known), "retrained": False}
+        return cls(previous.centroids, keys, labels, previous.trained_count, nprobe, matrix), stats
+
+    def search(self, query, top_k=5, nprobe=None):
+        """Approximate [(score, row), ...] from the nprobe closest clusters"""
+        if not len(self) or self.matrix is None:
+            return []
+        q = np.asarray(query, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        q = q / norm if norm else q
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        centroid_sims = self.centroids @ q
+        probe = np.argpartition(-centroid_sims, nprobe - 1)[:nprobe] if nprobe < self.nlist \
+            else np.arange(self.nlist)
+        rows = np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in probe])
+        if not len(rows):
+            return []
+        rows = np.sort(rows)  # ascending reads from the mapped file
+        sims = _as_f32(self.matrix[rows]) @ q
+        top_k = min(top_k, len(rows))
+        best = np.argpartition(-sims, top_k - 1)[:top_k] if top_k < len(rows) else np.arange(len(rows))
+        best = best[np.argsort(-sims[best])]
+        return [(float(sims[i]), int(rows[i])) for i in best]
+
+    def save(self, index_dir=INDEX_DIR):
+        path = Path(index_dir) / ANN_NAME
+        tmp = path.with_name(path.name + ".tmp.npz")
+        np.savez(
+            tmp,
+            version=np.int32(ANN_VERSION),
+            centroids=self.centroids,
+            keys=self.keys,
+            labels=self.labels,
+            order=self.order,
+            offsets=self.offsets,
+            trained_count=np.int64(self.trained_count),
+            stamp=np.asarray(self.stamp or (0, 0), dtype=np.int64),
+        )
+        tmp.replace(path)
+
+
+def load(index_dir=INDEX_DIR, matrix=None, nprobe=DEFAULT_NPROBE):
+    """Load ivf.npz (or None if missing, outdated or NumPy is unavailable)"""
+    path = Path(index_dir) / ANN_NAME
+    if np is None or not path.exists():
+        return None
+    try:
+        with np.load(path) as data:
+            if int(data["version"]) != ANN_VERSION:
+                return None
+            lists = (data["order"], data["offsets"]) if "order" in data.files else (None, None)  # older files
+            return IVFIndex(data["centroids"], data["keys"], data["labels"],
+                            int(data["trained_count"]), nprobe, matrix, tuple(int(x) for x in data["stamp"]),
+                            *lists)
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _store_keys(entries):
+    return [key_bytes(e.get("hash") or e["path"]) for e in entries]
+
+
+def enabled(conf, count):
+    """ANN setting: true, false or "auto" (NumPy installed and at least min_rows rows)"""
+    setting = conf.get("ann", "auto")
+    if np is None or setting is False or setting == "off":
+        return False
+    return setting is True or setting == "on" or count >= conf.get("ann_min_rows", DEFAULT_MIN_ROWS)
+
+
+def sync(store, index_dir=INDEX_DIR, conf=None):
+    """Bring ivf.npz in line with a freshly saved store (or remove it when disabled)"""
+    conf = conf or {}
+    path = Path(index_dir) / ANN_NAME
+    if store is None or not len(store) or not enabled(conf, len(store)) \
+            or not isinstance(store.vectors, np.ndarray):
+        path.unlink(missing_ok=True)
+        return None
+    previous = load(index_dir)
+    index, stats = IVFIndex.build(_store_keys(store.entries), store.vectors, conf.get("ann_nlist") or None,
+                                  conf.get("ann_nprobe", DEFAULT_NPROBE), previous)
+    index.stamp = embedding_store.stat(index_dir)
+    index.save(index_dir)
+    return stats
+
+
+def for_store(store, index_dir=INDEX_DIR, conf=None):
+    """IVF index bound to the store, or its exact VectorIndex if no valid ANN index exists"""
+    conf = conf or {}
+    if store is not None and enabled(conf, len(store)) and isinstance(store.vectors, np.ndarray):
+        index = load(index_dir, store.vectors, conf.get("ann_nprobe", DEFAULT_NPROBE))
+        if index is not None and index.stamp == embedding_store.stat(index_dir) and len(index) == len(store):
+            return index
+    return store.index()
+
+
+def _clustered_vectors(count, dim, clusters, rng):
+    """Synthetic embeddings: noisy points around random topic directions"""
+    topics = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, count)
+    vectors = topics[labels] + 0.6 * rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _recall(approx, exact):
+    return len({r for _, r in approx} & {r for _, r in exact}) / max(len(exact), 1)
+
+
+def benchmark(count=100000, dim=256, queries=50, top_k=10):
+    """Recall@k and latency of IVF search against exact search on a synthetic vault"""
+    if np is None:
+        print("  ⚠️ numpy is required for the ANN index")
+        return None
+    print(f"🧭 IVF benchmark ({count} vectors x {dim} dims, {queries} queries, recall@{top_k})")
+    rng = np.random.default_rng(0)
+    matrix = _clustered_vectors(count, dim, max(1, count // 500), rng)
+    query_vectors = matrix[rng.choice(count, queries, replace=False)] \
+        + 0.3 * rng.standard_normal((queries, dim)).astype(np.float32)
+
+    exact_index = VectorIndex(matrix, normalized=True)
+    start = time.perf_counter()
+    exact = [exact_index.search(q, top_k) for q in query_vectors]
+    exact_ms = (time.perf_counter() - start) / queries * 1000
+    print(f"  exact        query {exact_ms:8.2f} ms")
+
+    start = time.perf_counter()
+    keys = [key_bytes(str(i)) for i in range(count)]
+    index, _ = IVFIndex.build(keys, matrix)
+    print(f"  build        {time.perf_counter() - start:8.2f} s  (nlist {index.nlist})")
+
+    results = {"exact_ms": exact_ms, "nprobe": {}}
+    for nprobe in (1, 2, 4, 8, 16, 32, 64):
+        if nprobe > index.nlist:
+            break
+        start = time.perf_counter()
+        approx = [index.search(q, top_k, nprobe) for q in query_vectors]
+        ms = (time.perf_counter() - start) / queries * 1000
+        recall = sum(_recall(a, e) for a, e in zip(approx, exact)) / queries
+        results["nprobe"][nprobe] = {"query_ms": ms, "recall": recall}
+        print(f"  nprobe {nprobe:<5} query {ms:8.2f} ms | recall {recall:.3f} | {exact_ms / max(ms, 1e-9):5.1f}x")
+
+    # Incremental update: drop 10% of the rows, append as many new ones
+    changed = count // 10
+    kept = rng.choice(count, count - changed, replace=False)
+    fresh = _clustered_vectors(changed, dim, max(1, count // 500), rng)
+    matrix2 = np.vstack([matrix[kept], fresh])
+    keys2 = [keys[i] for i in kept] + [key_bytes(f"new{i}") for i in range(changed)]
+    start = time.perf_counter()
+    index2, stats = IVFIndex.build(keys2, matrix2, previous=index)
+    update_s = time.perf_counter() - start
+    exact2 = VectorIndex(matrix2, normalized=True)
+    recall = sum(_recall(index2.search(q, top_k), exact2.search(q, top_k)) for q in query_vectors) / queries
+    print(f"  incremental  {update_s:8.2f} s  (+{stats['inserted']} / -{stats['deleted']}, "
+          f"nprobe {index2.nprobe} recall {recall:.3f})")
+    results["incremental"] = dict(stats, seconds=update_s, recall=recall)
+    return results
+
+
+def main():
+    if "--benchmark" in sys.argv:
+        idx = sys.argv.index("--benchmark")
+        args = [int(a) for a in sys.argv[idx + 1:idx + 3] if a.isdigit()]
+        benchmark(*args)
+        return
+    print("🧭 ANN Index")
+    index = load()
+    if index is None:
+        print("  📋 No IVF index (disabled, too few rows or numpy missing)")
+        return None
+    sizes = np.diff(index.offsets)
+    print(f"  📊 {len(index)} rows, {index.nlist} lists (sizes {sizes.min()}–{sizes.max()}), "
+          f"trained on {index.trained_count}")
+    return index
+
+
+if __name__ == "__main__":
+    main()
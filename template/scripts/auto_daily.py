@@ -2,43 +2,46 @@
 📅 Daily Note Auto-Generator
 
 Automatically creates today's Daily Note from template if it doesn't exist.
+The template is compiled once by note_template.py (Obsidian / Templater
+date tokens). The previous note's unfinished tasks are carried over under
+the 今日のタスク heading, or wherever the template puts {{carryover}}.
 
 Usage:
   python auto_daily.py
+  python auto_daily.py --backfill 2025-01-01 2025-01-31   # Create every missing note in a range
 """
 
-from datetime import datetime
+import json
+import sys
+from datetime import datetime, timedelta
 from pathlib import Path
 
-VAULT_DIR = Path(__file__).parent.parent
+import note_template
+import vault_lock
+from note_index import dailies, get_meta, parse_note
+from vault_scanner import notes_in, write_note
+
+SCRIPTS_DIR = Path(__file__).parent
+CONFIG_PATH = SCRIPTS_DIR / "config.json"
+VAULT_DIR = SCRIPTS_DIR.parent
 DAILY_DIR = VAULT_DIR / "Daily"
 TEMPLATE_PATH = VAULT_DIR / "Templates" / "Daily テンプレート.md"
+TASKS_HEADING = "## 📋 今日のタスク"
 
 
-def create_daily(date=None):
-    """Create today's Daily Note if it doesn't exist"""
-    if date is None:
-        date = datetime.now()
-    
+def load_config():
+    if CONFIG_PATH.exists():
+        return json.loads(CONFIG_PATH.read_text(encoding="utf-8"))
+    return {}
+
+
+def default_daily(date, carryover=()):
+    """Built-in Daily Note used when there is no template"""
     date_str = date.strftime("%Y-%m-%d")
-    daily_path = DAILY_DIR / f"{date_str}.md"
-    
-    if daily_path.exists():
-        return {"created": False, "message": f"{date_str}.md already exists", "path": str(daily_path)}
-    
-    # Ensure Daily directory exists
-    DAILY_DIR.mkdir(parents=True, exist_ok=True)
-    
-    # Load template or use default
-    if TEMPLATE_PATH.exists():
-        content = TEMPLATE_PATH.read_text(encoding="utf-8")
-        # Replace template variables
-        content = content.replace("{{date:YYYY-MM-DD}}", date_str)
-        content = content.replace("{{date}}", date_str)
-    else:
-        weekday_names = ["月", "火", "水", "木", "金", "土", "日"]
-        weekday = weekday_names[date.weekday()]
-        content = f"""---
+    carried = "".join(f"{line}\n" for line in carryover)
+    weekday_names = ["月", "火", "水", "木", "金", "土", "日"]
+    weekday = weekday_names[date.weekday()]
+    return f"""---
 tags:
   - type/日報
 created: {date_str}
@@ -52,7 +55,7 @@ created: {date_str}
 
 ## 📋 今日のタスク
 
-- [ ] 
+{carried}- [ ] 
 
 ## 🔨 作業内容
 
@@ -78,13 +81,122 @@ created: {date_str}
 
 - [ ] 
 """
+
+
+def load_template():
+    """Compiled template (recompiled only when the file changes), or None to use the built-in note"""
+    locale = load_config().get("templates", {}).get("locale", note_template.DEFAULT_LOCALE)
+    return note_template.load(TEMPLATE_PATH, locale)
+
+
+def unfinished_tasks(meta):
+    """Open and in-progress tasks of a note as task lines (no duplicates or empty placeholders)"""
+    lines = []
+    for state, text in meta["tasks"]:
+        line = f"- [{'/' if state == 'doing' else ' '}] {text}"
+        if state in ("open", "doing") and text and line not in lines:
+            lines.append(line)
+    return lines
+
+
+def previous_tasks(date):
+    """Unfinished tasks of the latest Daily Note before `date`"""
+    date_str = date.strftime("%Y-%m-%d")
+    earlier = [note.rel for note in notes_in("Daily", VAULT_DIR)
+               if note.folder == "Daily" and len(note.stem) == 10 and note.stem[4] == "-" and note.stem < date_str]
+    if not earlier:
+        return []
+    return unfinished_tasks(get_meta(max(earlier), VAULT_DIR))
+
+
+def insert_carryover(content, carryover):
+    """Put carried-over task lines at the top of the 今日のタスク section (unchanged if it has none)"""
+    if not carryover:
+        return content
+    lines = content.split("\n")
+    if TASKS_HEADING not in lines:
+        return content
+    pos = lines.index(TASKS_HEADING) + 1
+    while pos < len(lines) and not lines[pos].strip():
+        pos += 1
+    return "\n".join(lines[:pos] + list(carryover) + lines[pos:])
+
+
+def render_daily(template, date, carryover=()):
+    """Daily Note content for a date from a compiled template"""
+    if template is None:
+        return default_daily(date, carryover)
+    content = template.render(date, title=date.strftime("%Y-%m-%d"), carryover=carryover)
+    # Templates usable from Obsidian itself can't contain {{carryover}}
+    return content if template.uses_carryover else insert_carryover(content, carryover)
+
+
+def mark_backfilled(content):
+    """Add `backfilled: <body hash>` to the frontmatter of a generated note
+
+    note_index.dailies() skips the note while its body still has that hash,
+    so empty backfilled days aren't counted as worked days until edited.
+    """
+    mark = f"backfilled: {parse_note(content)['body_hash']}"
+    lines = content.split("\n")
+    if lines[0].startswith("---"):
+        for end, line in enumerate(lines[1:], 1):
+            if line.strip() == "---":
+                return "\n".join(lines[:end] + [mark] + lines[end:])
+    return f"---\n{mark}\n---\n{content}"
+
+
+def create_daily(date=None):
+    """Create today's Daily Note if it doesn't exist"""
+    if date is None:
+        date = datetime.now()
     
-    daily_path.write_text(content, encoding="utf-8")
+    date_str = date.strftime("%Y-%m-%d")
+    daily_path = DAILY_DIR / f"{date_str}.md"
+    
+    if daily_path.exists():
+        return {"created": False, "message": f"{date_str}.md already exists", "path": str(daily_path)}
+    
+    # Ensure Daily directory exists
+    DAILY_DIR.mkdir(parents=True, exist_ok=True)
+    
+    template = load_template()
+    carryover = previous_tasks(date)
+    write_note(daily_path, render_daily(template, date, carryover), VAULT_DIR)
     return {"created": True, "message": f"Created {date_str}.md", "path": str(daily_path)}
 
 
-def main():
-    result = create_daily()
+def backfill(start, end):
+    """Create every missing Daily Note from start to end (inclusive, up to today)
+
+    Existing notes come from one listing of Daily/ and the template is
+    compiled once, so re-running over the same range is cheap and creates
+    nothing. Unfinished tasks are carried forward from the latest existing
+    note through the created ones. Created notes are marked (see
+    mark_backfilled) so the reviews ignore them until they're edited.
+    """
+    end = min(end, datetime.now().date())
+    existing = {note.rel for note in notes_in("Daily", VAULT_DIR)}
+    template = load_template()
+    carryover = previous_tasks(start)
+    metas = dailies(start, end, VAULT_DIR, placeholders=True)
+    DAILY_DIR.mkdir(parents=True, exist_ok=True)
+    created = []
+    day = start
+    while day <= end:
+        name = f"{day.strftime('%Y-%m-%d')}.md"
+        if f"Daily/{name}" not in existing:
+            write_note(DAILY_DIR / name, mark_backfilled(render_daily(template, day, carryover)), VAULT_DIR)
+            created.append(name)
+        elif day in metas:
+            carryover = unfinished_tasks(metas[day])
+        day += timedelta(days=1)
+    return {"created": bool(created), "count": len(created),
+            "message": f"Backfilled {len(created)} daily note(s) from {start} to {end}"}
+
+
+def main(date=None):
+    result = create_daily(date)
     if result["created"]:
         print(f"✅ {result['message']}")
     else:
@@ -92,5 +204,17 @@ def main():
     return result
 
 
+def parse_range(argv):
+    """(start, end) dates following --backfill"""
+    idx = argv.index("--backfill")
+    start, end = (datetime.strptime(arg, "%Y-%m-%d").date() for arg in argv[idx + 1:idx + 3])
+    return start, end
+
+
 if __name__ == "__main__":
-    main()
+    with vault_lock.hold("auto_daily"):
+        if "--backfill" in sys.argv:
+            result = backfill(*parse_range(sys.argv))
+            print(f"{'✅' if result['created'] else '📋'} {result['message']}")
+        else:
+            main()
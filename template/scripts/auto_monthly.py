@@ -5,11 +5,20 @@ Automatically generates a monthly review from Daily and Weekly Notes.
 
 Usage:
   python auto_monthly.py
+  python auto_monthly.py --backfill 2025-01-01 2025-12-31   # Create every missing review in a range
 """
 
 from datetime import datetime, timedelta
+from fnmatch import fnmatch
 from pathlib import Path
 import calendar
+import sys
+
+import vault_lock
+import rollups
+from auto_daily import parse_range
+from note_index import require_frontmatter
+from vault_scanner import notes_in, write_note
 
 VAULT_DIR = Path(__file__).parent.parent
 DAILY_DIR = VAULT_DIR / "Daily"
@@ -17,40 +26,24 @@ WEEKLY_DIR = VAULT_DIR / "Weekly"
 MONTHLY_DIR = VAULT_DIR / "Monthly"
 
 
-def generate_monthly(date=None):
-    """Generate a monthly review"""
-    if date is None:
-        date = datetime.now()
-    
-    # Review previous month
-    if date.month == 1:
-        target_year, target_month = date.year - 1, 12
-    else:
-        target_year, target_month = date.year, date.month - 1
-    
+def weekly_names():
+    """File names of the weekly reviews (one listing of Weekly/)"""
+    return {note.path.name for note in notes_in("Weekly", VAULT_DIR) if note.folder == "Weekly"}
+
+
+def render_monthly(target_year, target_month, weeklies, refresh=True):
+    """Monthly review content; pass refresh=False when the rollups were just synced"""
     month_str = f"{target_year}-{target_month:02d}"
-    filename = f"{month_str}.md"
-    monthly_path = MONTHLY_DIR / filename
-    
-    if monthly_path.exists():
-        return {"created": False, "message": f"{filename} already exists"}
-    
-    MONTHLY_DIR.mkdir(parents=True, exist_ok=True)
     
     # Count daily notes in the month
     days_in_month = calendar.monthrange(target_year, target_month)[1]
-    daily_count = 0
-    completed_tasks = 0
-    
-    for day in range(1, days_in_month + 1):
-        daily_path = DAILY_DIR / f"{target_year}-{target_month:02d}-{day:02d}.md"
-        if daily_path.exists():
-            daily_count += 1
-            content = daily_path.read_text(encoding="utf-8")
-            completed_tasks += content.count("- [x]")
+    month = rollups.aggregate(datetime(target_year, target_month, 1),
+                              datetime(target_year, target_month, days_in_month), VAULT_DIR, refresh=refresh)
+    daily_count = month["days"]
+    completed_tasks = month["tasks"]["done"]
     
     # Count weekly reviews
-    weekly_count = len(list(WEEKLY_DIR.glob(f"Week * ({target_year}-{target_month:02d}*).md"))) if WEEKLY_DIR.exists() else 0
+    weekly_count = sum(1 for name in weeklies if fnmatch(name, f"Week * ({month_str}*).md"))
     
     month_names_jp = ["", "1月", "2月", "3月", "4月", "5月", "6月", 
                       "7月", "8月", "9月", "10月", "11月", "12月"]
@@ -96,13 +89,58 @@ month: {month_str}
 
 - [ ] 
 """
+    return require_frontmatter(content, f"{month_str}.md")
+
+
+def generate_monthly(date=None):
+    """Generate a monthly review"""
+    if date is None:
+        date = datetime.now()
     
-    monthly_path.write_text(content, encoding="utf-8")
+    # Review previous month
+    if date.month == 1:
+        target_year, target_month = date.year - 1, 12
+    else:
+        target_year, target_month = date.year, date.month - 1
+    
+    filename = f"{target_year}-{target_month:02d}.md"
+    monthly_path = MONTHLY_DIR / filename
+    
+    if monthly_path.exists():
+        return {"created": False, "message": f"{filename} already exists"}
+    
+    MONTHLY_DIR.mkdir(parents=True, exist_ok=True)
+    
+    write_note(monthly_path, render_monthly(target_year, target_month, weekly_names()), VAULT_DIR)
     return {"created": True, "message": f"Created {filename}"}
 
 
-def main():
-    result = generate_monthly()
+def backfill(start, end):
+    """Create every missing monthly review for the months overlapping start..end
+
+    Months that haven't ended yet are skipped. Existing reviews come from one
+    listing of Monthly/ and the rollups are synced once for the whole batch.
+    """
+    today = datetime.now().date()
+    existing = {note.rel for note in notes_in("Monthly", VAULT_DIR)}
+    weeklies = weekly_names()
+    rollups.sync(VAULT_DIR)
+    MONTHLY_DIR.mkdir(parents=True, exist_ok=True)
+    created = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month) and \
+            datetime(year, month, calendar.monthrange(year, month)[1]).date() < today:
+        filename = f"{year}-{month:02d}.md"
+        if f"Monthly/{filename}" not in existing:
+            write_note(MONTHLY_DIR / filename, render_monthly(year, month, weeklies, refresh=False), VAULT_DIR)
+            created.append(filename)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return {"created": bool(created), "count": len(created),
+            "message": f"Backfilled {len(created)} monthly review(s) from {start} to {end}"}
+
+
+def main(date=None):
+    result = generate_monthly(date)
     if result["created"]:
         print(f"✅ {result['message']}")
     else:
@@ -111,4 +149,9 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    with vault_lock.hold("auto_monthly"):
+        if "--backfill" in sys.argv:
+            result = backfill(*parse_range(sys.argv))
+            print(f"{'✅' if result['created'] else '📋'} {result['message']}")
+        else:
+            main()
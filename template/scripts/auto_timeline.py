@@ -8,10 +8,12 @@ Usage:
   python auto_timeline.py
 """
 
-import re
 from datetime import datetime
 from pathlib import Path
 
+from note_index import get_meta
+from vault_scanner import refresh_note
+
 VAULT_DIR = Path(__file__).parent.parent
 PROJECTS_DIR = VAULT_DIR / "Projects"
 TIMELINE_PATH = VAULT_DIR / "プロジェクトタイムライン.md"
@@ -28,30 +30,23 @@ def get_project_dates():
         if not proj_dir.is_dir():
             continue
         
-        main_file = proj_dir / f"{proj_dir.name}.md"
-        if not main_file.exists():
+        meta = get_meta(f"Projects/{proj_dir.name}/{proj_dir.name}.md", VAULT_DIR)
+        if not meta:
             continue
         
-        content = main_file.read_text(encoding="utf-8", errors="ignore")
-        
         # Extract created date
-        match = re.search(r'created:\s*(\d{4}-\d{2}-\d{2})', content)
-        created = match.group(1) if match else None
+        created = meta["created"]
         
         # Determine status
         status = "active"
-        if "#status/completed" in content:
+        if "status/completed" in meta["tags"]:
             status = "done"
-        elif "#status/paused" in content:
+        elif "status/paused" in meta["tags"]:
             status = "paused"
         
         # Get last modified
-        log_file = proj_dir / f"{proj_dir.name} ログ.md"
-        last_modified = None
-        if log_file.exists():
-            dates = re.findall(r'(\d{4}-\d{2}-\d{2})', log_file.read_text(encoding="utf-8", errors="ignore"))
-            if dates:
-                last_modified = max(dates)
+        log_meta = get_meta(f"Projects/{proj_dir.name}/{proj_dir.name} ログ.md", VAULT_DIR)
+        last_modified = log_meta["latest_date"] if log_meta else None
         
         if not last_modified:
             last_modified = datetime.now().strftime("%Y-%m-%d")
@@ -114,6 +109,7 @@ updated: {datetime.now().strftime('%Y-%m-%d %H:%M')}
 """ + "\n".join(f"| {p['name']} | {p['created']} | {p['last_modified']} | {p['status']} |" for p in projects)
     
     TIMELINE_PATH.write_text(content, encoding="utf-8")
+    refresh_note(TIMELINE_PATH, VAULT_DIR)
     print(f"  ✅ Timeline updated ({len(projects)} projects)")
     return True
 
@@ -5,11 +5,18 @@ Automatically generates a weekly review from Daily Notes.
 
 Usage:
   python auto_weekly.py
+  python auto_weekly.py --backfill 2025-01-01 2025-03-31   # Create every missing review in a range
 """
 
+import sys
 from datetime import datetime, timedelta
 from pathlib import Path
 
+import vault_lock
+from auto_daily import parse_range
+from note_index import dailies, require_frontmatter
+from vault_scanner import notes_in, write_note
+
 VAULT_DIR = Path(__file__).parent.parent
 DAILY_DIR = VAULT_DIR / "Daily"
 WEEKLY_DIR = VAULT_DIR / "Weekly"
@@ -25,45 +32,29 @@ def get_week_range(date=None):
     return start, end
 
 
-def collect_daily_highlights(start_date, end_date):
-    """Collect highlights from Daily Notes in the date range"""
+def collect_daily_highlights(notes):
+    """Collect highlights from the parsed Daily Notes ({date: meta})"""
     highlights = []
-    current = start_date
-    while current <= end_date:
-        daily_path = DAILY_DIR / f"{current.strftime('%Y-%m-%d')}.md"
-        if daily_path.exists():
-            content = daily_path.read_text(encoding="utf-8")
-            # Extract tasks and highlights
-            lines = content.split("\n")
-            for line in lines:
-                stripped = line.strip()
-                if stripped.startswith("- [x]"):
-                    highlights.append(f"✅ {stripped[5:].strip()} ({current.strftime('%m/%d')})")
-                elif stripped.startswith("- [/]"):
-                    highlights.append(f"🔄 {stripped[5:].strip()} ({current.strftime('%m/%d')})")
-        current += timedelta(days=1)
+    for day, meta in notes.items():
+        # Extract tasks and highlights
+        for state, text in meta["tasks"]:
+            if state == "done":
+                highlights.append(f"✅ {text} ({day.strftime('%m/%d')})")
+            elif state == "doing":
+                highlights.append(f"🔄 {text} ({day.strftime('%m/%d')})")
     return highlights
 
 
-def generate_weekly(date=None):
-    """Generate a weekly review"""
-    if date is None:
-        date = datetime.now()
-    
-    start, end = get_week_range(date)
+def weekly_filename(start):
+    """Review file name for the week starting on `start` (a Monday)"""
+    return f"Week {start.isocalendar()[1]} ({start.strftime('%Y-%m-%d')}).md"
+
+
+def render_weekly(start, end, notes):
+    """Weekly review content from the week's parsed Daily Notes"""
     week_num = start.isocalendar()[1]
-    
-    filename = f"Week {week_num} ({start.strftime('%Y-%m-%d')}).md"
-    weekly_path = WEEKLY_DIR / filename
-    
-    if weekly_path.exists():
-        return {"created": False, "message": f"{filename} already exists"}
-    
-    WEEKLY_DIR.mkdir(parents=True, exist_ok=True)
-    
-    # Collect data
-    highlights = collect_daily_highlights(start, end)
-    daily_count = sum(1 for d in range(7) if (DAILY_DIR / f"{(start + timedelta(days=d)).strftime('%Y-%m-%d')}.md").exists())
+    highlights = collect_daily_highlights(notes)
+    daily_count = len(notes)
     
     highlight_text = "\n".join(f"- {h}" for h in highlights) if highlights else "- (記録なし)"
     
@@ -100,13 +91,57 @@ week: {week_num}
 
 - [ ] 
 """
+    return require_frontmatter(content, weekly_filename(start))
+
+
+def generate_weekly(date=None):
+    """Generate a weekly review"""
+    if date is None:
+        date = datetime.now()
+    
+    start, end = get_week_range(date)
+    filename = weekly_filename(start)
+    weekly_path = WEEKLY_DIR / filename
+    
+    if weekly_path.exists():
+        return {"created": False, "message": f"{filename} already exists"}
     
-    weekly_path.write_text(content, encoding="utf-8")
+    WEEKLY_DIR.mkdir(parents=True, exist_ok=True)
+    
+    write_note(weekly_path, render_weekly(start, end, dailies(start, end, VAULT_DIR)), VAULT_DIR)
     return {"created": True, "message": f"Created {filename}"}
 
 
-def main():
-    result = generate_weekly()
+def backfill(start, end):
+    """Create every missing weekly review for the weeks overlapping start..end
+
+    Weeks that haven't ended yet are skipped. Existing reviews come from one
+    listing of Weekly/ and the Daily Notes of the whole span are read once.
+    """
+    today = datetime.now().date()
+    first, _ = get_week_range(start)
+    _, last = get_week_range(min(end, today))
+    if last > today:  # this week isn't over yet
+        last -= timedelta(days=7)
+    existing = {note.rel for note in notes_in("Weekly", VAULT_DIR)}
+    notes = dailies(first, last, VAULT_DIR)
+    WEEKLY_DIR.mkdir(parents=True, exist_ok=True)
+    created = []
+    week_start = first
+    while week_start < last:
+        week_end = week_start + timedelta(days=6)
+        filename = weekly_filename(week_start)
+        if f"Weekly/{filename}" not in existing:
+            week_notes = {day: meta for day, meta in notes.items() if week_start <= day <= week_end}
+            write_note(WEEKLY_DIR / filename, render_weekly(week_start, week_end, week_notes), VAULT_DIR)
+            created.append(filename)
+        week_start += timedelta(days=7)
+    return {"created": bool(created), "count": len(created),
+            "message": f"Backfilled {len(created)} weekly review(s) from {first} to {last}"}
+
+
+def main(date=None):
+    result = generate_weekly(date)
     if result["created"]:
         print(f"✅ {result['message']}")
     else:
@@ -115,4 +150,9 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    with vault_lock.hold("auto_weekly"):
+        if "--backfill" in sys.argv:
+            result = backfill(*parse_range(sys.argv))
+            print(f"{'✅' if result['created'] else '📋'} {result['message']}")
+        else:
+            main()
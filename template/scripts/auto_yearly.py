@@ -0,0 +1,150 @@
+"""
+📊 Yearly Review Auto-Generator
+
+Automatically generates a yearly review (or a review of any date range)
+from the daily-note rollups in rollups.py, so a full year costs a few
+stored rows instead of reading 365 notes.
+
+Usage:
+  python auto_yearly.py                                # Review of the previous year
+  python auto_yearly.py --range 2025-04-01 2025-09-30  # Print a review of a date range
+"""
+
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+import rollups
+import vault_lock
+from vault_scanner import notes_in, refresh_note
+
+VAULT_DIR = Path(__file__).parent.parent
+YEARLY_DIR = VAULT_DIR / "Yearly"
+TOP_TAGS = 10
+TOP_PROJECTS = 10
+
+
+def project_names():
+    """Names of the project folders (Projects/{Name}/)"""
+    return {note.rel.split("/")[1] for note in notes_in("Projects", VAULT_DIR) if note.rel.count("/") >= 2}
+
+
+def _top(counts, limit):
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+
+def render_review(start, end):
+    """Statistics, breakdown, tags and projects sections for a date range"""
+    rollups.sync(VAULT_DIR)
+    total = rollups.aggregate(start, end, refresh=False)
+    span_days = (end - start).days + 1
+    unit = "month" if span_days > 62 else "week"
+    parts = rollups.breakdown(start, end, unit, refresh=False)
+    tasks = total["tasks"]
+
+    rows = "\n".join(
+        f"| {key} ({first.strftime('%m/%d')}〜{last.strftime('%m/%d')}) | {part['days']} | {part['tasks']['done']} |"
+        for key, first, last, part in parts
+    )
+    tags = "\n".join(f"- #{tag} ({n})" for tag, n in _top(total["tags"], TOP_TAGS)) or "- (記録なし)"
+    projects = project_names()
+    mentions = {name: n for name, n in total["links"].items() if name in projects}
+    project_lines = "\n".join(f"- [[{name}]] ({n}回)" for name, n in _top(mentions, TOP_PROJECTS)) or "- (記録なし)"
+
+    return f"""## 📊 統計
+
+| 指標 | 値 |
+|:---|:---|
+| 作業日数 | {total['days']}/{span_days} |
+| 完了タスク | {tasks['done']} |
+| 進行中タスク (期末時点) | {tasks['doing']} |
+| 未完了タスク (期末時点) | {tasks['open']} |
+| キャンセル | {tasks['cancelled']} |
+
+## 📅 {'月別' if unit == 'month' else '週別'}
+
+| 期間 | 作業日数 | 完了タスク |
+|:---|:---|:---|
+{rows}
+
+## 🏷️ よく使ったタグ
+
+{tags}
+
+## 📁 プロジェクト
+
+{project_lines}
+"""
+
+
+def generate_yearly(date=None):
+    """Generate a yearly review"""
+    if date is None:
+        date = datetime.now()
+
+    # Review previous year
+    year = date.year - 1
+    filename = f"{year}.md"
+    yearly_path = YEARLY_DIR / filename
+
+    if yearly_path.exists():
+        return {"created": False, "message": f"{filename} already exists"}
+
+    YEARLY_DIR.mkdir(parents=True, exist_ok=True)
+
+    monthly_count = sum(1 for note in notes_in("Monthly", VAULT_DIR) if note.stem.startswith(f"{year}-"))
+
+    content = f"""---
+tags:
+  - type/年次
+created: {datetime.now().strftime('%Y-%m-%d')}
+year: {year}
+---
+
+# {year}年 年次レビュー
+
+> 📊 期間: {year}-01-01 〜 {year}-12-31 ／ 月次レビュー: {monthly_count}/12
+
+---
+
+{render_review(datetime(year, 1, 1).date(), datetime(year, 12, 31).date())}
+## 🏆 今年の成果
+
+- 
+
+## 📈 成長・学び
+
+- 
+
+## ➡️ 来年の目標
+
+- [ ] 
+"""
+
+    yearly_path.write_text(content, encoding="utf-8")
+    refresh_note(yearly_path, VAULT_DIR)
+    return {"created": True, "message": f"Created {filename}"}
+
+
+def review_range(start, end):
+    """Markdown review of an arbitrary date range (not written to the vault)"""
+    return f"# {start} 〜 {end} レビュー\n\n{render_review(start, end)}"
+
+
+def main(date=None):
+    result = generate_yearly(date)
+    if result["created"]:
+        print(f"✅ {result['message']}")
+    else:
+        print(f"📋 {result['message']}")
+    return result
+
+
+if __name__ == "__main__":
+    if "--range" in sys.argv:
+        idx = sys.argv.index("--range")
+        start, end = (date.fromisoformat(arg) for arg in sys.argv[idx + 1:idx + 3])
+        print(review_range(start, end))
+    else:
+        with vault_lock.hold("auto_yearly"):
+            main()
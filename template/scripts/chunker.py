@@ -0,0 +1,116 @@
+"""
+✂️ Note Chunker
+
+Splits a note into heading-aware chunks for embedding. Each chunk carries
+its heading path and a content hash, so an edit only re-embeds the
+chunks that actually changed.
+
+Usage:
+  python chunker.py path/to/note.md   # Show the chunks of a note
+"""
+
+import hashlib
+import re
+import sys
+from pathlib import Path
+
+MAX_CHARS = 2000
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+FENCE_RE = re.compile(r'^\s*(```|~~~)')
+
+
+def strip_frontmatter(content):
+    """Remove a leading --- YAML block"""
+    if content.startswith("---"):
+        end = content.find("\n---", 3)
+        if end != -1:
+            nl = content.find("\n", end + 4)
+            return content[nl + 1:] if nl != -1 else ""
+    return content
+
+
+def _sections(body):
+    """Yield (heading_path, text) for each heading section, ignoring headings in code fences"""
+    stack = []
+    lines = []
+    in_fence = False
+    for line in body.split("\n"):
+        if FENCE_RE.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else HEADING_RE.match(line)
+        if match:
+            if any(l.strip() for l in lines):
+                yield " > ".join(t for _, t in stack), "\n".join(lines).strip()
+            level = len(match.group(1))
+            stack = [(lv, t) for lv, t in stack if lv < level] + [(level, match.group(2))]
+            lines = []
+        else:
+            lines.append(line)
+    if any(l.strip() for l in lines):
+        yield " > ".join(t for _, t in stack), "\n".join(lines).strip()
+
+
+def _split_long(text, max_chars):
+    """Split an oversized section on paragraph boundaries, then hard-wrap"""
+    parts = []
+    current = ""
+    for para in re.split(r'\n\s*\n', text):
+        while len(para) > max_chars:
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(para[:max_chars])
+            para = para[max_chars:]
+        if current and len(current) + len(para) + 2 > max_chars:
+            parts.append(current)
+            current = para
+        else:
+            current = f"{current}\n\n{para}" if current else para
+    if current:
+        parts.append(current)
+    return parts
+
+
+def chunk_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def chunk_note(title, content, max_chars=MAX_CHARS):
+    """Return [{"heading", "body", "text", "hash"}, ...]; text is what gets embedded"""
+    chunks = []
+    pending_heading, pending = None, ""
+    for heading, text in _sections(strip_frontmatter(content)):
+        for part in _split_long(text, max_chars):
+            # Merge small neighbouring sections so every chunk carries enough context
+            if pending and len(pending) + len(part) + 2 <= max_chars // 2:
+                pending = f"{pending}\n\n{part}"
+                continue
+            if pending:
+                chunks.append((pending_heading, pending))
+            pending_heading, pending = heading, part
+    if pending:
+        chunks.append((pending_heading, pending))
+    if not chunks:
+        chunks.append(("", ""))
+
+    result = []
+    for heading, text in chunks:
+        embed_text = "\n".join(p for p in (title, heading, text) if p)
+        result.append({"heading": heading, "body": text, "text": embed_text, "hash": chunk_hash(embed_text)})
+    return result
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python chunker.py path/to/note.md")
+        return []
+    path = Path(sys.argv[1])
+    chunks = chunk_note(path.stem, path.read_text(encoding="utf-8", errors="ignore"))
+    print(f"✂️ {path.name}: {len(chunks)} chunks")
+    for chunk in chunks:
+        print(f"  [{chunk['hash'][:8]}] {chunk['heading'] or '(top)'} — {len(chunk['text'])} chars")
+    return chunks
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+🗓️ Cron Expressions
+
+Minimal standard 5-field cron parser for scheduler.py:
+
+  minute hour day-of-month month day-of-week
+  "5 0 * * *"       every day at 00:05
+  "30 23 * * sun"   Sundays at 23:30
+  "45 23 1 * *"     the 1st of each month at 23:45
+  "*/15 9-18 * * mon-fri"
+
+Fields accept *, lists (1,15), ranges (1-5), steps (*/10, 0-30/5) and
+English month/day names. As in cron, when both day-of-month and
+day-of-week are restricted a day matching either one fires. The macros
+@hourly, @daily, @weekly, @monthly and @yearly are also accepted.
+
+Usage:
+  python cron_expr.py "30 23 * * sun" [count]   # Show the next fire times
+"""
+
+import sys
+from datetime import datetime, timedelta
+
+MACROS = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+}
+MONTH_NAMES = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+DAY_NAMES = ["sun", "mon", "tue", "wed", "thu", "fri", "sat"]
+# (low, high, names) per field
+FIELDS = [(0, 59, None), (0, 23, None), (1, 31, None), (1, 12, MONTH_NAMES), (0, 7, DAY_NAMES)]
+# Give up looking for a match after this many years (e.g. "0 0 30 2 *")
+SEARCH_YEARS = 5
+
+
+def _value(text, low, names):
+    text = text.lower()
+    if names and text[:3] in names:
+        return names.index(text[:3]) + (low if names is MONTH_NAMES else 0)
+    return int(text)
+
+
+def _parse_field(text, low, high, names):
+    """Set of allowed values for one field"""
+    values = set()
+    for part in text.split(","):
+        part, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (_value(v, low, names) for v in part.split("-", 1))
+        else:
+            start = _value(part, low, names)
+            end = high if step > 1 else start
+        if not (low <= start <= end <= high) or step < 1:
+            raise ValueError(f"cron field out of range: {text!r}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronExpr:
+    """Parsed cron expression; next_after(dt) gives the next fire time"""
+
+    def __init__(self, expr):
+        self.expr = expr.strip()
+        fields = MACROS.get(self.expr.lower(), self.expr).split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression needs 5 fields: {expr!r}")
+        parsed = [_parse_field(text, *spec) for text, spec in zip(fields, FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {d % 7 for d in weekdays}  # 7 is also Sunday
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def __repr__(self):
+        return f"CronExpr({self.expr!r})"
+
+    def _day_matches(self, dt):
+        in_month = dt.day in self.days
+        in_week = (dt.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return in_month and in_week
+        return in_month or in_week
+
+    def next_after(self, after):
+        """First datetime strictly after `after` (minute resolution), or None"""
+        dt = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = after.year + SEARCH_YEARS
+        while dt.year <= limit:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+            elif dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+            elif dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+            else:
+                return dt
+        return None
+
+    def between(self, start, end, limit=None):
+        """Fire times in (start, end], oldest first; at most the last `limit`"""
+        times = []
+        fire = self.next_after(start)
+        while fire is not None and fire <= end:
+            times.append(fire)
+            if limit and len(times) > limit:
+                times.pop(0)
+            fire = self.next_after(fire)
+        return times
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python cron_expr.py \"minute hour day month weekday\" [count]")
+        return
+    cron = CronExpr(sys.argv[1])
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    fire = datetime.now()
+    print(f"🗓️ {cron.expr}")
+    for _ in range(count):
+        fire = cron.next_after(fire)
+        if fire is None:
+            print("  (no further matches)")
+            break
+        print(f"  {fire:%Y-%m-%d %H:%M (%a)}")
+
+
+if __name__ == "__main__":
+    main()
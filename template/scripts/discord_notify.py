@@ -21,8 +21,8 @@ def load_config():
     return {}
 
 
-def notify(message=None, results=None):
-    """Send a notification to Discord webhook"""
+def notify(message=None, results=None, slowest=None):
+    """Send a notification to Discord webhook (slowest: [(step name, seconds)])"""
     import requests
     
     config = load_config()
@@ -52,6 +52,12 @@ def notify(message=None, results=None):
                 "value": ", ".join(skipped),
                 "inline": False
             })
+        if slowest:
+            fields.append({
+                "name": "⏱️ Slowest steps",
+                "value": "\n".join(f"{name}: {seconds:.1f}s" for name, seconds in slowest),
+                "inline": False
+            })
         
         embed = {
             "title": "🚀 Obsidian Pipeline Complete",
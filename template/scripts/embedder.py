@@ -0,0 +1,141 @@
+"""
+🧬 Embedding Clients
+
+Embedding backends for the semantic search index and a batching helper
+that sends texts in batch requests, runs a bounded number of them
+concurrently and backs off on rate limits.
+
+  GeminiEmbedder  google-generativeai batch embed_content calls
+  HashEmbedder    deterministic, offline feature-hashing embedder
+                  (for tests, benchmarks and fake-server setups)
+
+Any object with embed_documents(texts) and embed_query(text) methods can
+be passed to vault_search.build_index(embedder=...).
+"""
+
+import hashlib
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+DEFAULT_MODEL = "models/embedding-001"
+
+
+class GeminiEmbedder:
+    """Gemini embeddings; a list of texts is embedded in one request"""
+
+    def __init__(self, api_key, model=DEFAULT_MODEL):
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        self.genai = genai
+        self.model = model
+
+    def embed_documents(self, texts):
+        result = self.genai.embed_content(model=self.model, content=list(texts),
+                                          task_type="retrieval_document")
+        return result["embedding"]
+
+    def embed_query(self, text):
+        result = self.genai.embed_content(model=self.model, content=text, task_type="retrieval_query")
+        return result["embedding"]
+
+
+class HashEmbedder:
+    """Offline embedder: hashed word and character-bigram counts"""
+
+    model = "local/hash"
+
+    def __init__(self, dim=256):
+        self.dim = dim
+
+    def _embed(self, text):
+        vec = [0.0] * self.dim
+        tokens = re.findall(r"\w+", text.lower())
+        tokens += [text[i:i + 2] for i in range(len(text) - 1) if not text[i:i + 2].isascii()]
+        for token in tokens:
+            h = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            vec[h % self.dim] += 1.0 if (h >> 32) & 1 else -1.0
+        return vec
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def is_rate_limited(error):
+    """True for quota / 429 / ResourceExhausted style errors"""
+    text = f"{type(error).__name__} {error}".lower()
+    return any(s in text for s in ("429", "resourceexhausted", "resource exhausted", "rate limit", "quota"))
+
+
+class _Cooldown:
+    """Shared pause so every worker backs off after a rate-limit response"""
+
+    def __init__(self):
+        self.until = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        delay = self.until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def extend(self, seconds):
+        with self.lock:
+            self.until = max(self.until, time.monotonic() + seconds)
+
+
+def _embed_with_retry(embedder, texts, cooldown, max_retries, base_delay):
+    attempt = 0
+    while True:
+        cooldown.wait()
+        try:
+            vectors = embedder.embed_documents(texts)
+            if len(vectors) != len(texts):
+                raise ValueError(f"expected {len(texts)} embeddings, got {len(vectors)}")
+            return vectors
+        except Exception as e:
+            if attempt >= max_retries:
+                raise
+            delay = base_delay * (2 ** attempt) * (1 + random.random())
+            if is_rate_limited(e):
+                cooldown.extend(delay)
+            else:
+                time.sleep(delay)
+            attempt += 1
+
+
+def embed_batches(embedder, texts, batch_size=50, max_workers=4, max_retries=5,
+                  base_delay=1.0, on_batch=None, on_error=None):
+    """Embed texts in concurrent batches; returns a list aligned with texts
+
+    Failed batches leave None entries. on_batch(start, vectors) is called
+    from the calling thread as each batch finishes (used for checkpoints).
+    """
+    results = [None] * len(texts)
+    if not texts:
+        return results
+    cooldown = _Cooldown()
+    starts = range(0, len(texts), max(1, batch_size))
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {
+            pool.submit(_embed_with_retry, embedder, texts[i:i + batch_size], cooldown,
+                        max_retries, base_delay): i
+            for i in starts
+        }
+        for future in as_completed(futures):
+            start = futures[future]
+            try:
+                vectors = future.result()
+            except Exception as e:
+                if on_error:
+                    on_error(start, e)
+                continue
+            results[start:start + len(vectors)] = vectors
+            if on_batch:
+                on_batch(start, vectors)
+    return results
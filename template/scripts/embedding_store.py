@@ -0,0 +1,269 @@
+"""
+💾 Embedding Store
+
+Binary, memory-mapped storage for the semantic search index. Vectors are
+kept unit-normalized in one contiguous little-endian float32 (or float16)
+file opened with mmap; paths, mtimes and previews live in a small JSON
+sidecar. Loading is close to zero-copy, so memory stays flat as the vault
+grows.
+
+Layout (inside .search_index/):
+  vectors.<n>.bin  N x dim rows, little-endian float32/float16 (generation n)
+  meta.json        {"version", "dtype", "dim", "count", "vectors", "entries": [...]}
+
+Every save writes a new generation of the vector file and then switches
+to it by atomically replacing meta.json, so a reader always sees vectors
+and metadata from the same build, and a file mapped by a running search
+daemon is never overwritten (which Windows refuses). Superseded
+generations are deleted by prune() once nothing maps them any more.
+
+Usage:
+  python embedding_store.py            # Print store statistics
+  python embedding_store.py --migrate  # Convert a legacy index.json
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+from pathlib import Path
+
+from vector_index import VectorIndex, normalize, np
+
+SCRIPTS_DIR = Path(__file__).parent
+INDEX_DIR = SCRIPTS_DIR / ".search_index"
+VECTORS_NAME = "vectors.bin"  # before generations; still read from older indexes
+VECTORS_RE = re.compile(r"^vectors(?:\.(\d+))?\.bin$")
+META_NAME = "meta.json"
+LEGACY_NAME = "index.json"
+STORE_VERSION = 1
+DTYPES = {"float32": ("f", 4), "float16": ("e", 2)}
+
+
+class _Rows:
+    """Sequence of vector rows decoded lazily from a mapped buffer (pure-Python path)"""
+
+    def __init__(self, buf, count, dim, dtype):
+        self.count = count
+        self.dim = dim
+        code, width = DTYPES[dtype]
+        self.stride = dim * width
+        self.buf = buf
+        self.flat = None
+        if code == "f" and sys.byteorder == "little":
+            self.flat = memoryview(buf).cast("B")[:count * self.stride].cast("f")
+        else:
+            self.fmt = struct.Struct(f"<{dim}{code}")
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        if self.flat is not None:
+            return self.flat[i * self.dim:(i + 1) * self.dim]
+        return self.fmt.unpack_from(self.buf, i * self.stride)
+
+    def __iter__(self):
+        return (self[i] for i in range(self.count))
+
+
+class EmbeddingStore:
+    """A loaded (memory-mapped) embedding index"""
+
+    def __init__(self, entries, vectors, dim, dtype, mapping=None):
+        self.entries = entries
+        self.vectors = vectors
+        self.dim = dim
+        self.dtype = dtype
+        self._mapping = mapping
+
+    def __len__(self):
+        return len(self.entries)
+
+    def vector(self, row):
+        """Row as a list of floats (unit-normalized)"""
+        return [float(x) for x in self.vectors[row]]
+
+    def index(self):
+        """VectorIndex over the mapped rows (no copy for float32)"""
+        return VectorIndex(self.vectors, use_numpy=np is not None and not isinstance(self.vectors, _Rows),
+                           normalized=True)
+
+    def close(self):
+        if self._mapping is not None:
+            self.vectors = None
+            try:
+                self._mapping.close()
+            except BufferError:
+                pass  # still referenced by a live view; released on garbage collection
+            self._mapping = None
+
+
+def _atomic_write(path, data):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _generations(index_dir):
+    """{generation: path} of the vector files in the index directory (0 = legacy vectors.bin)"""
+    found = {}
+    for path in Path(index_dir).glob("vectors*.bin"):
+        match = VECTORS_RE.match(path.name)
+        if match:
+            found[int(match.group(1) or 0)] = path
+    return found
+
+
+def _vectors_name(meta):
+    return meta.get("vectors", VECTORS_NAME)
+
+
+def gather(store, sources):
+    """Vectors for save(): each source is a row number in `store` or a new vector
+
+    With NumPy the stored rows are copied out of the mapping by one fancy
+    index into an ndarray, so only newly embedded vectors pass through
+    Python lists and a rebuild doesn't expand the whole store into floats.
+    """
+    if np is None or (store is not None and isinstance(store.vectors, _Rows)):
+        return [store.vector(s) if isinstance(s, int) else s for s in sources]
+    picked = [i for i, s in enumerate(sources) if isinstance(s, int)]
+    fresh = [i for i, s in enumerate(sources) if not isinstance(s, int)]
+    dim = store.dim if picked else (len(sources[fresh[0]]) if fresh else 0)
+    matrix = np.empty((len(sources), dim), dtype=np.float32)
+    if picked:
+        matrix[picked] = store.vectors[[sources[i] for i in picked]]
+    if fresh:
+        matrix[fresh] = np.asarray([sources[i] for i in fresh], dtype=np.float32)
+    return matrix
+
+
+def save(entries, vectors, index_dir=INDEX_DIR, dtype="float32"):
+    """Write normalized vectors (rows or an ndarray) as a new generation, then switch meta.json to it"""
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    dim = len(vectors[0]) if len(vectors) else 0
+    if np is not None:
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), dim)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        data = (matrix / norms).astype("<f4" if dtype == "float32" else "<f2").tobytes()
+    else:
+        code = DTYPES[dtype][0]
+        row = struct.Struct(f"<{dim}{code}")
+        data = b"".join(row.pack(*normalize(v)) for v in vectors)
+    name = f"vectors.{max(_generations(index_dir), default=0) + 1}.bin"
+    _atomic_write(index_dir / name, data)
+    meta = {"version": STORE_VERSION, "dtype": dtype, "dim": dim, "count": len(entries),
+            "vectors": name, "entries": entries}
+    _atomic_write(index_dir / META_NAME, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+    prune(index_dir)
+
+
+def prune(index_dir=INDEX_DIR):
+    """Delete vector generations meta.json no longer points to; returns how many were removed
+
+    Files still mapped by another process can't be deleted on Windows;
+    they're skipped and retried on the next save or daemon reload.
+    """
+    index_dir = Path(index_dir)
+    try:
+        current = _vectors_name(json.loads((index_dir / META_NAME).read_text(encoding="utf-8")))
+    except (OSError, ValueError):
+        return 0
+    removed = 0
+    for path in _generations(index_dir).values():
+        if path.name == current:
+            continue
+        try:
+            path.unlink()
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def load(index_dir=INDEX_DIR):
+    """Open the store, or return None if no binary index exists yet"""
+    index_dir = Path(index_dir)
+    meta_path = index_dir / META_NAME
+    for attempt in range(3):
+        if not meta_path.exists():
+            return None
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        vectors_path = index_dir / _vectors_name(meta)
+        dim, count, dtype = meta["dim"], meta["count"], meta["dtype"]
+        if count == 0 or dim == 0:
+            return EmbeddingStore(meta["entries"], [], dim, dtype)
+        try:
+            with open(vectors_path, "rb") as f:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            break
+        except FileNotFoundError:
+            continue  # a concurrent save switched generations and pruned this one; re-read meta
+    else:
+        return None
+    if mapping.size() < count * dim * DTYPES[dtype][1]:
+        mapping.close()
+        raise ValueError(f"{vectors_path} is truncated")
+    if np is not None:
+        vectors = np.frombuffer(mapping, dtype="<f4" if dtype == "float32" else "<f2",
+                                count=count * dim).reshape(count, dim)
+    else:
+        vectors = _Rows(mapping, count, dim, dtype)
+    return EmbeddingStore(meta["entries"], vectors, dim, dtype, mapping)
+
+
+def stat(index_dir=INDEX_DIR):
+    """(mtime_ns, size) of the sidecar, used to detect a rewritten index"""
+    try:
+        st = (Path(index_dir) / META_NAME).stat()
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+
+def migrate_legacy(index_dir=INDEX_DIR, dtype="float32"):
+    """Convert a legacy index.json (JSON float lists) into the binary store"""
+    legacy = Path(index_dir) / LEGACY_NAME
+    if not legacy.exists():
+        return False
+    data = json.loads(legacy.read_text(encoding="utf-8"))
+    entries, vectors = [], []
+    for path, item in data.items():
+        if "embedding" not in item:
+            continue
+        entries.append({"path": path, "name": item.get("name", Path(path).stem),
+                        "mtime": item.get("mtime"), "preview": item.get("preview", "")})
+        vectors.append(item["embedding"])
+    save(entries, vectors, index_dir, dtype)
+    legacy.unlink()
+    return True
+
+
+def main():
+    print("💾 Embedding Store")
+    if "--migrate" in sys.argv:
+        print("  ✅ Migrated index.json" if migrate_legacy() else "  📋 No legacy index.json found")
+    store = load()
+    if store is None:
+        print("  ⚠️ No index found. Run: python vault_search.py --build")
+        return None
+    meta = json.loads((INDEX_DIR / META_NAME).read_text(encoding="utf-8"))
+    size = (INDEX_DIR / _vectors_name(meta)).stat().st_size
+    print(f"  📊 {len(store)} vectors x {store.dim} dims ({store.dtype}, {size // 1024} KB)")
+    return store
+
+
+if __name__ == "__main__":
+    main()
@@ -3,81 +3,399 @@
 
 Automatically commits and pushes Vault changes to Git.
 
+A run starts with a single `git status --porcelain=v2 -z --branch` (with
+the untracked cache enabled); when nothing changed locally and nothing is
+waiting to be pushed, that is the only git call. Only the changed paths
+are staged. The remote is contacted when there is something to push, or
+every `remote_check_minutes` to see whether it moved (ls-remote), and it
+is only fetched/pulled when it did. Timeouts grow with the amount of data
+being staged or pushed instead of aborting large transfers at 30s.
+
+Backup policy:
+  - Auto-backup commits made within `coalesce_minutes` of the first
+    unpushed one are folded into it (amend / soft reset), and the push is
+    deferred until the window closes (push_due in the state file tells the
+    scheduler when to come back)
+  - New files over `large_file_mb`, or binary files over `binary_file_mb`,
+    are not committed as regular blobs: with large_files "lfs" they are
+    tracked by Git LFS (if installed), otherwise they are added to
+    .git/info/exclude and listed
+  - After each commit the repository size (git count-objects) and its change
+    since the previous backup are reported
+
+Config (config.json → "git_backup"):
+  remote_check_minutes   how often a no-op run checks the remote (default 60)
+  coalesce_minutes       window for folding auto-backups together (0 = off)
+  large_files            "lfs" | "ignore" | "allow"
+  large_file_mb / binary_file_mb   size thresholds for the guard
+
 Usage:
   python git_backup.py
 """
 
+import json
+import os
 import subprocess
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
+
+import vault_lock
 
 VAULT_DIR = Path(__file__).parent.parent
+SCRIPTS_DIR = Path(__file__).parent
+CONFIG_PATH = SCRIPTS_DIR / "config.json"
+STATE_PATH = SCRIPTS_DIR / ".git_backup_state.json"
+
+AUTO_PREFIX = "vault: auto-backup"
+EXCLUDE_PATH = VAULT_DIR / ".git" / "info" / "exclude"
+BINARY_EXTENSIONS = {".pdf", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".heic", ".tif", ".tiff", ".bmp",
+                     ".mp3", ".m4a", ".wav", ".ogg", ".mp4", ".mov", ".webm", ".zip", ".7z", ".gz",
+                     ".docx", ".xlsx", ".pptx", ".psd", ".sqlite", ".db"}
+GIT_TIMEOUT = 30
+# Assume at least this throughput when scaling timeouts to transfer size
+MIN_BYTES_PER_SECOND = 100_000
+MAX_TIMEOUT = 3600
+
+
+def load_config():
+    if CONFIG_PATH.exists():
+        return json.loads(CONFIG_PATH.read_text(encoding="utf-8"))
+    return {}
+
+
+def load_state():
+    try:
+        return json.loads(STATE_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
 
+def save_state(state):
+    tmp = STATE_PATH.with_name(STATE_PATH.name + ".tmp")
+    tmp.write_text(json.dumps(state, indent=2), encoding="utf-8")
+    os.replace(tmp, STATE_PATH)
 
-def run_git(args, cwd=None):
+
+def scaled_timeout(size):
+    """Timeout for an operation moving `size` bytes"""
+    return min(MAX_TIMEOUT, GIT_TIMEOUT + size / MIN_BYTES_PER_SECOND)
+
+
+def run_git(args, cwd=None, timeout=GIT_TIMEOUT, stdin=None, strip=True):
     """Run a git command and return (success, output)"""
     try:
         result = subprocess.run(
             ["git"] + args,
             cwd=cwd or str(VAULT_DIR),
+            input=stdin,
             capture_output=True,
             text=True,
-            timeout=30
+            encoding="utf-8",
+            timeout=timeout
         )
-        return result.returncode == 0, result.stdout.strip()
+        output = result.stdout if result.returncode == 0 else (result.stderr or result.stdout)
+        return result.returncode == 0, output.strip() if strip else output
     except Exception as e:
         return False, str(e)
 
 
-def main():
-    """Auto-backup: pull, add, commit, push"""
-    print("🔄 Git Auto-Backup")
-    
-    # Check if git repo exists
-    if not (VAULT_DIR / ".git").exists():
-        print("  ⚠️ Not a git repository. Initialize with: git init")
+def read_status():
+    """One porcelain v2 status call → {"branch", "upstream", "ahead", "behind", "changes", "paths"}
+
+    `changes` counts every entry; `paths` lists those whose worktree differs
+    from the index (modified, deleted, unmerged, untracked) and so still need
+    staging. Entries already fully staged (e.g. git mv / git rm) are skipped.
+    """
+    ok, out = run_git(["-c", "core.untrackedCache=true", "status", "--porcelain=v2", "-z", "--branch",
+                       "--untracked-files=all"], strip=False)
+    if not ok:
+        return None
+    status = {"branch": None, "upstream": None, "ahead": 0, "behind": 0, "changes": 0, "paths": [],
+              "added": []}
+    records = out.split("\0")
+    i = 0
+    while i < len(records):
+        record = records[i]
+        i += 1
+        if record.startswith("# branch.head "):
+            status["branch"] = record[len("# branch.head "):]
+        elif record.startswith("# branch.upstream "):
+            status["upstream"] = record[len("# branch.upstream "):]
+        elif record.startswith("# branch.ab "):
+            ahead, behind = record[len("# branch.ab "):].split()
+            status["ahead"], status["behind"] = int(ahead), -int(behind)
+        elif record[:2] in ("1 ", "2 ", "u "):
+            fields = record.split(" ", {"1": 8, "2": 9, "u": 10}[record[0]])
+            if record[0] == "2":
+                i += 1  # the rename/copy source follows as its own record; the index has it already
+            status["changes"] += 1
+            if fields[1][1] != "." or record[0] == "u":
+                status["paths"].append(fields[-1])
+        elif record.startswith("? "):
+            status["changes"] += 1
+            status["paths"].append(record[2:])
+            status["added"].append(record[2:])
+    return status
+
+
+def changed_bytes(paths):
+    """Size on disk of the changed paths (deleted ones count as 0)"""
+    total = 0
+    for rel in paths:
+        try:
+            total += (VAULT_DIR / rel).stat().st_size
+        except OSError:
+            pass
+    return total
+
+
+def stage(paths, size):
+    """Stage exactly these paths (additions, modifications and deletions)"""
+    return run_git(["--literal-pathspecs", "add", "-A", "--pathspec-from-file=-", "--pathspec-file-nul"],
+                   timeout=scaled_timeout(size), stdin="\0".join(paths) + "\0")
+
+
+def _is_binary(path):
+    if path.suffix.lower() in BINARY_EXTENSIONS:
+        return True
+    try:
+        with open(path, "rb") as f:
+            return b"\0" in f.read(8192)
+    except OSError:
         return False
-    
-    # Pull latest
-    ok, out = run_git(["pull", "--rebase", "--autostash"])
+
+
+def find_large_files(added, conf):
+    """New files that shouldn't go into the repository as regular blobs"""
+    large = conf.get("large_file_mb", 10) * 1024 * 1024
+    binary = conf.get("binary_file_mb", 2) * 1024 * 1024
+    flagged = []
+    for rel in added:
+        path = VAULT_DIR / rel
+        try:
+            size = path.stat().st_size
+        except OSError:
+            continue
+        if size >= large or (size >= binary and _is_binary(path)):
+            flagged.append((rel, size))
+    return flagged
+
+
+def _exclude_pattern(rel):
+    """Anchored, literal gitignore pattern for one path"""
+    escaped = "".join("\\" + c if c in "*?[\\" else c for c in rel)
+    return "/" + ("\\" + escaped if escaped[0] in "#!" else escaped)
+
+
+def exclude(paths):
+    """Keep paths out of the repository via the local (uncommitted) ignore list"""
+    EXCLUDE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(EXCLUDE_PATH, "a", encoding="utf-8") as f:
+        f.write("# git_backup: large/binary files\n")
+        f.writelines(_exclude_pattern(rel) + "\n" for rel in paths)
+
+
+def guard_large_files(status, conf):
+    """Route large/binary additions to LFS or the ignore list; returns the paths left to stage"""
+    policy = conf.get("large_files", "lfs")
+    flagged = find_large_files(status["added"], conf) if policy != "allow" else []
+    if not flagged:
+        return status["paths"]
+    names = {rel for rel, _ in flagged}
+    listing = ", ".join(f"{rel} ({size / 1024 / 1024:.1f} MB)" for rel, size in flagged)
+    if policy == "lfs" and run_git(["lfs", "version"])[0]:
+        ok, out = run_git(["lfs", "track", "--filename", "--"] + sorted(names))
+        if ok:
+            print(f"  🗄️ Tracked with Git LFS: {listing}")
+            return status["paths"] + [".gitattributes"]
+        print(f"  ⚠️ git lfs track failed: {out}")
+    exclude(sorted(names))
+    print(f"  🚫 Not committed (added to .git/info/exclude): {listing}")
+    status["changes"] -= len(names)
+    return [rel for rel in status["paths"] if rel not in names]
+
+
+def unpushed(upstream):
+    """[(author time, subject)] of local commits not on the upstream, newest first"""
+    ok, out = run_git(["log", "--format=%at%x09%s", f"{upstream}..HEAD"])
+    if not ok or not out:
+        return []
+    return [(int(line.split("\t", 1)[0]), line.split("\t", 1)[1]) for line in out.splitlines()]
+
+
+def repo_size_kb():
+    """Loose + packed object size in KiB (git count-objects)"""
+    ok, out = run_git(["count-objects", "-v"])
+    if not ok:
+        return None
+    fields = dict(line.split(": ") for line in out.splitlines() if ": " in line)
+    return int(fields.get("size", 0)) + int(fields.get("size-pack", 0))
+
+
+def report_size(state):
+    size = repo_size_kb()
+    if size is None:
+        return
+    previous = state.get("repo_kb")
+    delta = f" ({size - previous:+,} KB since last backup)" if previous is not None else ""
+    print(f"  📦 Repository: {size / 1024:,.1f} MB{delta}")
+    state["repo_kb"] = size
+
+
+def push_size(upstream):
+    """Approximate bytes to push (objects not yet on the upstream)"""
+    revs = [f"{upstream}..HEAD"] if upstream else ["HEAD"]
+    ok, out = run_git(["rev-list", "--objects", "--disk-usage"] + revs)
+    return int(out) if ok and out.isdigit() else 0
+
+
+def remote_moved(status):
+    """Has the upstream branch moved on the remote? (one ls-remote, no fetch)"""
+    remote, _, branch = status["upstream"].partition("/")
+    ok, out = run_git(["ls-remote", "--heads", remote, f"refs/heads/{branch}"])
+    if not ok:
+        print(f"  ⚠️ Remote check failed: {out}")
+        return False
+    remote_oid = out.split()[0] if out else None
+    ok, local_oid = run_git(["rev-parse", "--verify", "-q", f"refs/remotes/{status['upstream']}"])
+    return remote_oid is not None and remote_oid != (local_oid if ok else None)
+
+
+def pull():
+    """Rebase local commits onto the remote; abort cleanly on conflicts"""
+    ok, out = run_git(["pull", "--rebase", "--autostash"], timeout=MAX_TIMEOUT)
     if ok:
-        print(f"  📥 Pull: {out or 'up to date'}")
-    else:
-        print(f"  ⚠️ Pull failed: {out}")
-    
-    # Check for changes
-    ok, status = run_git(["status", "--porcelain"])
-    if not status:
-        print("  📋 No changes to commit")
+        print(f"  📥 Pull: {out.splitlines()[-1] if out else 'up to date'}")
         return True
-    
-    # Count changes
-    changes = [l for l in status.split("\n") if l.strip()]
-    print(f"  📝 {len(changes)} file(s) changed")
-    
-    # Add all
-    run_git(["add", "-A"])
-    
-    # Commit
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
-    msg = f"vault: auto-backup {timestamp} ({len(changes)} files)"
-    ok, out = run_git(["commit", "-m", msg])
-    if ok:
-        print(f"  ✅ Committed: {msg}")
-    else:
-        print(f"  ⚠️ Commit: {out}")
-        return False
-    
-    # Push
-    ok, out = run_git(["push"])
+    print(f"  ⚠️ Pull failed: {out}")
+    if (VAULT_DIR / ".git" / "rebase-merge").exists() or (VAULT_DIR / ".git" / "rebase-apply").exists():
+        run_git(["rebase", "--abort"])
+        print("  ↩️ Rebase aborted; resolve the conflict manually")
+    return False
+
+
+def push(status, size_hint=0):
+    """Push (size_hint: bytes just committed, used if rev-list --disk-usage is unavailable)"""
+    ok, out = run_git(["push"], timeout=scaled_timeout(push_size(status["upstream"]) or size_hint))
+    if not ok and status["upstream"] and ("rejected" in out or "fetch first" in out):
+        # The remote moved since our last check: rebase onto it and retry once
+        if pull():
+            ok, out = run_git(["push"], timeout=scaled_timeout(push_size(status["upstream"]) or size_hint))
     if ok:
         print("  🚀 Pushed to remote")
     else:
         print(f"  ⚠️ Push failed: {out}")
         print("  💡 Set remote with: git remote add origin <url>")
-    
+    return ok
+
+
+def commit(status, fold, batch_start):
+    """Commit the index; with `fold` (unpushed auto-backups) rewrite them into one commit
+
+    Returns True when committed, None on failure.
+    """
+    now = datetime.now()
+    if fold:
+        if len(fold) > 1 and not run_git(["reset", "--soft", status["upstream"]])[0]:
+            fold = []
+        else:
+            # Count the files the combined commit touches
+            ok, out = run_git(["diff", "--cached", "--name-only", "-z", status["upstream"]], strip=False)
+            files = len([p for p in out.split("\0") if p]) if ok else status["changes"]
+            span = f"{batch_start:%Y-%m-%d %H:%M}–{now:%H:%M}"
+            msg = f"{AUTO_PREFIX} {span} ({files} files)"
+            args = ["commit", "--amend", "-m", msg] if len(fold) == 1 else [
+                "commit", "-m", msg, f"--date={int(batch_start.timestamp())}"]
+            ok, out = run_git(args)
+            if ok:
+                print(f"  ✅ Committed: {msg} (folded {len(fold)} unpushed auto-backup(s))")
+                return True
+            print(f"  ⚠️ Commit: {out}")
+            return None
+    msg = f"{AUTO_PREFIX} {now:%Y-%m-%d %H:%M} ({status['changes']} files)"
+    ok, out = run_git(["commit", "-m", msg])
+    if ok:
+        print(f"  ✅ Committed: {msg}")
+        return True
+    print(f"  ⚠️ Commit: {out}")
+    return None
+
+
+def main():
+    """Auto-backup: status, stage changed paths, commit, sync with the remote"""
+    print("🔄 Git Auto-Backup")
+
+    # Check if git repo exists
+    if not (VAULT_DIR / ".git").exists():
+        print("  ⚠️ Not a git repository. Initialize with: git init")
+        return False
+
+    conf = load_config().get("git_backup", {})
+    state = load_state()
+    status = read_status()
+    if status is None:
+        print("  ⚠️ git status failed")
+        return False
+
+    now = datetime.now()
+    window = timedelta(minutes=conf.get("coalesce_minutes", 0))
+    pending = unpushed(status["upstream"]) if status["upstream"] and status["ahead"] else []
+    # Only a batch made entirely of our own auto-backups is folded together / held back
+    auto_batch = bool(pending) and all(subject.startswith(AUTO_PREFIX) for _, subject in pending)
+    batch_start = datetime.fromtimestamp(min(t for t, _ in pending)) if pending else now
+    coalescing = bool(window) and auto_batch and now - batch_start < window
+
+    committed = False
+    size = 0
+    if status["changes"]:
+        paths = guard_large_files(status, conf)
+        size = changed_bytes(paths)
+        if paths:
+            print(f"  📝 {status['changes']} file(s) changed")
+            ok, out = stage(paths, size)
+            if not ok:
+                print(f"  ⚠️ Add failed: {out}")
+                return False
+        if status["changes"]:
+            committed = commit(status, pending if coalescing else [], batch_start)
+            if committed is None:
+                return False
+            report_size(state)
+
+    if not status["upstream"]:
+        if committed:
+            push(status, size)
+        else:
+            print("  📋 No changes to commit")
+        save_state(state)
+        return True
+
+    if (committed or status["ahead"]) and window and (coalescing or (committed and not pending)):
+        due = batch_start + window
+        state["push_due"] = due.isoformat(timespec="seconds")
+        print(f"  ⏸️ Push deferred until {due:%H:%M} (coalescing auto-backups)")
+        save_state(state)
+        return True
+    if committed or status["ahead"]:
+        if push(status, size):
+            state.pop("push_due", None)
+    else:
+        state.pop("push_due", None)
+        last_check = state.get("last_remote_check")
+        interval = timedelta(minutes=conf.get("remote_check_minutes", 60))
+        if last_check and datetime.now() - datetime.fromisoformat(last_check) < interval:
+            print("  📋 No changes to commit")
+            return True
+        if status["behind"] or remote_moved(status):
+            pull()
+        else:
+            print("  📋 No changes to commit; remote unchanged")
+    state["last_remote_check"] = datetime.now().isoformat(timespec="seconds")
+    save_state(state)
+
     return True
 
 
 if __name__ == "__main__":
-    main()
+    with vault_lock.hold("git_backup"):
+        main()
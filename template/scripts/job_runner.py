@@ -0,0 +1,301 @@
+"""
+🧰 Job Runner
+
+Runs scheduler jobs inside a long-lived process instead of spawning a
+fresh interpreter per task. Task modules are imported once and their
+functions called directly; everything a job prints is captured and
+appended to a rotating log.
+
+Jobs run concurrently up to max_concurrent, each job name at most
+max_instances at a time. Jobs that modify the vault pass lock=True and
+hold vault_lock.py's cross-process lock while they run; the time spent
+waiting for it is reported as lock_wait.
+
+Isolation modes:
+  thread   call the function on a worker thread of the scheduler process
+           (fastest; a job that times out is reported but cannot be killed,
+           and the same job is not started again until it returns)
+  process  call it in a persistent worker process that is recycled after
+           `recycle_after` jobs and killed and replaced on timeout
+
+Usage:
+  python job_runner.py auto_daily:main [--process] [--lock]   # Run one job and show its log entry
+"""
+
+import contextlib
+import importlib
+import io
+import logging
+import logging.handlers
+import multiprocessing
+import queue
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).parent
+LOG_DIR = SCRIPTS_DIR / ".logs"
+LOG_PATH = LOG_DIR / "jobs.log"
+DEFAULT_TIMEOUT = 1800
+DEFAULT_RECYCLE_AFTER = 20
+DEFAULT_MAX_CONCURRENT = 2
+
+
+class ThreadOutput:
+    """sys.stdout/sys.stderr proxy that buffers each job thread's output separately"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self.local, "buffer", None)
+        return (buffer if buffer is not None else self.stream).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class JobResult:
+    """Outcome of one job run"""
+
+    def __init__(self, name, ok, result=None, output="", error=None, seconds=0.0, lock_wait=None):
+        self.name = name
+        self.ok = ok
+        self.result = result
+        self.output = output
+        self.error = error
+        self.seconds = seconds
+        self.lock_wait = lock_wait
+
+    def __repr__(self):
+        return f"JobResult({self.name!r}, ok={self.ok}, {self.seconds:.1f}s)"
+
+
+def resolve(target):
+    """"module:function" -> callable (imports are cached after the first job)"""
+    module, attr = target.split(":")
+    return getattr(importlib.import_module(module), attr)
+
+
+def _plain(value):
+    """Job return values crossing a process boundary are kept simple"""
+    return value if isinstance(value, (bool, int, float, str, type(None))) else repr(value)
+
+
+def _invoke(target, args):
+    """(ok, result, error); output goes to the current stdout"""
+    import vault_scanner
+    vault_scanner.clear_cache()  # each job sees a fresh view of the vault
+    try:
+        result = resolve(target)(*args)
+        return result is not False, result, None
+    except SystemExit as e:  # a task's main() may call sys.exit()
+        return e.code in (0, None), None, None if e.code in (0, None) else f"exit status {e.code}"
+    except BaseException as e:
+        traceback.print_exc()
+        return False, None, f"{type(e).__name__}: {e}"
+
+
+def _call(target, args, lock_owner=None, lock_timeout=None):
+    """Run a target in this process, under the vault lock if lock_owner is set
+
+    Returns (ok, result, error, seconds waited for the lock or None).
+    """
+    if lock_owner is None:
+        return (*_invoke(target, args), None)
+    import vault_lock
+    try:
+        with vault_lock.hold(lock_owner, lock_timeout) as lease:
+            return (*_invoke(target, args), lease.wait_s)
+    except TimeoutError as e:
+        return False, None, str(e), lock_timeout
+
+
+def _worker_main(conn):
+    """Persistent worker process: run jobs received over the pipe until told to stop"""
+    while True:
+        message = conn.recv()
+        if message is None:
+            return
+        target, args, lock_owner, lock_timeout = message
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(out):
+            ok, result, error, lock_wait = _call(target, args, lock_owner, lock_timeout)
+        conn.send((ok, _plain(result), out.getvalue(), error, lock_wait))
+
+
+class ProcessWorker:
+    """A worker process that serves jobs one at a time"""
+
+    def __init__(self):
+        ctx = multiprocessing.get_context("spawn")
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+        self.jobs = 0
+
+    def run(self, target, args, timeout, lock_owner=None):
+        """(ok, result, output, error, lock_wait); raises TimeoutError if the job overruns"""
+        self.jobs += 1
+        self.conn.send((target, args, lock_owner, timeout))
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"timed out after {timeout}s")
+        return self.conn.recv()
+
+    def stop(self, kill=False):
+        if not kill and self.process.is_alive():
+            with contextlib.suppress(OSError):
+                self.conn.send(None)
+            self.process.join(5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+def _job_logger(log_path):
+    logger = logging.getLogger(f"OAK_Jobs.{log_path}")
+    if not logger.handlers:
+        Path(log_path).parent.mkdir(parents=True, exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(log_path, maxBytes=1_000_000, backupCount=5,
+                                                       encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s", "%Y-%m-%d %H:%M:%S"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
+
+class JobRunner:
+    """Runs "module:function" jobs in-process (thread) or in recycled worker processes"""
+
+    def __init__(self, isolation="thread", recycle_after=DEFAULT_RECYCLE_AFTER, log_path=LOG_PATH,
+                 max_concurrent=DEFAULT_MAX_CONCURRENT):
+        self.isolation = isolation
+        self.recycle_after = recycle_after
+        self.log = _job_logger(log_path)
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(max(1, max_concurrent))
+        self.active = Counter()  # job name -> runs executing (a timed-out thread still counts)
+        self.idle = queue.LifoQueue()  # idle ProcessWorkers (process mode)
+        self.output = None
+        if isolation == "thread":
+            self.output = ThreadOutput(sys.stdout)
+            self.errors = ThreadOutput(sys.stderr)
+            sys.stdout, sys.stderr = self.output, self.errors
+
+    def run(self, name, target, args=(), timeout=DEFAULT_TIMEOUT, max_instances=1, lock=False):
+        """Run one job and log its output; blocks until it finishes, never raises
+
+        Waiting for a free concurrency slot doesn't count towards `timeout`;
+        waiting for the vault lock (lock=True) does.
+        """
+        with self.lock:
+            if self.active[name] >= max_instances:
+                return self._finish(JobResult(name, False, error="previous run still in progress"))
+            self.active[name] += 1
+        self.slots.acquire()
+        start = time.perf_counter()
+        lock_owner = name if lock else None
+        if self.isolation == "process":
+            try:
+                result = self._run_process(name, target, args, timeout, lock_owner)
+            finally:
+                self._release(name)
+        else:
+            result = self._run_thread(name, target, args, timeout, lock_owner)
+        result.seconds = time.perf_counter() - start
+        return self._finish(result)
+
+    def _run_thread(self, name, target, args, timeout, lock_owner):
+        box = {}
+        out, err = self.output, self.errors
+
+        def work():
+            buffer = io.StringIO()
+            out.local.buffer = err.local.buffer = buffer
+            try:
+                box["outcome"] = _call(target, args, lock_owner, timeout)
+            finally:
+                out.local.buffer = err.local.buffer = None
+                box["output"] = buffer.getvalue()
+                self._release(name)  # only now, even if run() already gave up waiting
+
+        thread = threading.Thread(target=work, name=f"job-{name}", daemon=True)
+        thread.start()
+        thread.join(timeout)
+        if thread.is_alive():
+            return JobResult(name, False, error=f"timed out after {timeout}s (still running)")
+        ok, value, error, lock_wait = box["outcome"]
+        return JobResult(name, ok, value, box["output"], error, lock_wait=lock_wait)
+
+    def _run_process(self, name, target, args, timeout, lock_owner):
+        try:
+            worker = self.idle.get_nowait()
+        except queue.Empty:
+            worker = ProcessWorker()
+        try:
+            ok, value, output, error, lock_wait = worker.run(target, list(args), timeout, lock_owner)
+        except TimeoutError as e:
+            worker.stop(kill=True)
+            return JobResult(name, False, error=f"{e} (worker killed)")
+        except (EOFError, OSError):
+            worker.stop(kill=True)
+            return JobResult(name, False, error=f"worker crashed (exit code {worker.process.exitcode})")
+        if worker.jobs >= self.recycle_after:
+            worker.stop()
+        else:
+            self.idle.put(worker)
+        return JobResult(name, ok, value, output, error, lock_wait=lock_wait)
+
+    def _release(self, name):
+        """A run of `name` has really finished: free its instance and concurrency slot"""
+        with self.lock:
+            self.active[name] -= 1
+        self.slots.release()
+
+    def _finish(self, result):
+        status = "ok" if result.ok else f"FAILED ({result.error})"
+        waited = f", {result.lock_wait:.1f}s waiting for vault lock" if (result.lock_wait or 0) >= 0.1 else ""
+        self.log.info(f"=== {result.name}: {status} in {result.seconds:.1f}s{waited}")
+        if result.output.strip():
+            self.log.info(result.output.rstrip())
+        return result
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().stop()
+            except queue.Empty:
+                break
+        if self.output is not None:
+            sys.stdout, sys.stderr = self.output.stream, self.errors.stream
+            self.output = None
+
+
+def main():
+    if len(sys.argv) < 2 or ":" not in sys.argv[1]:
+        print("Usage: python job_runner.py module:function [--process] [--lock]")
+        return None
+    runner = JobRunner("process" if "--process" in sys.argv else "thread")
+    try:
+        result = runner.run(sys.argv[1], sys.argv[1], lock="--lock" in sys.argv)
+    finally:
+        runner.close()
+    print(f"🧰 {result.name}: {'✅' if result.ok else '❌'} {result.seconds:.2f}s"
+          + (f" — {result.error}" if result.error else ""))
+    print(result.output.rstrip())
+    print(f"  📄 Log: {LOG_PATH}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -8,10 +8,11 @@ Usage:
   python knowledge_organizer.py
 """
 
-import re
 from pathlib import Path
 from collections import Counter
 
+import note_index
+
 VAULT_DIR = Path(__file__).parent.parent
 KNOWLEDGE_DIR = VAULT_DIR / "Knowledge"
 
@@ -25,19 +26,17 @@ def scan_knowledge():
         print("  📁 Created Knowledge directory")
         return True
     
-    notes = list(KNOWLEDGE_DIR.rglob("*.md"))
+    notes = note_index.load_folder("Knowledge", VAULT_DIR)
     print(f"  📊 Knowledge notes: {len(notes)}")
     
     untagged = []
     topics = Counter()
     
-    for note in notes:
-        content = note.read_text(encoding="utf-8", errors="ignore")
-        
+    for rel, meta in notes.items():
         # Check for tags
-        tags = re.findall(r'#([a-zA-Z0-9_/\-\u3040-\u309f\u30a0-\u30ff\u4e00-\u9fff]+)', content)
+        tags = meta["tags"]
         if not tags:
-            untagged.append(note.stem)
+            untagged.append(Path(rel).stem)
         
         # Extract topics from tech tags
         for tag in tags:
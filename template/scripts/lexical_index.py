@@ -0,0 +1,168 @@
+"""
+🔤 Lexical Search Index (BM25)
+
+Offline inverted index over the vault with BM25 ranking, stored in SQLite
+next to the semantic index. Japanese/Chinese text is tokenized into
+character bigrams, everything else into lowercase words. Only notes whose
+mtime or size changed are re-tokenized.
+
+Usage:
+  python lexical_index.py --build          # Build/update the index
+  python lexical_index.py --search "query" # Search offline
+"""
+
+import math
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from chunker import strip_frontmatter
+from vault_scanner import scan_vault
+
+SCRIPTS_DIR = Path(__file__).parent
+VAULT_DIR = SCRIPTS_DIR.parent
+INDEX_DIR = SCRIPTS_DIR / ".search_index"
+DB_PATH = INDEX_DIR / "lexical.db"
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+CJK_CHARS = r'\u3040-\u309f\u30a0-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff66-\uff9f'
+TOKEN_RE = re.compile(rf'[{CJK_CHARS}]+|[^\W_{CJK_CHARS}]+')
+CJK_RE = re.compile(rf'[{CJK_CHARS}]')
+
+_lock = threading.RLock()
+
+
+def tokenize(text):
+    """Lowercase words for alphabetic scripts, character bigrams for CJK runs"""
+    tokens = []
+    for match in TOKEN_RE.finditer(text.lower()):
+        run = match.group(0)
+        if CJK_RE.match(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def connect(path=DB_PATH):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS docs (
+            id INTEGER PRIMARY KEY, path TEXT UNIQUE, name TEXT,
+            mtime REAL, size INTEGER, length INTEGER, preview TEXT);
+        CREATE TABLE IF NOT EXISTS postings (
+            term TEXT, doc INTEGER, tf INTEGER, PRIMARY KEY (term, doc)) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc);
+    """)
+    return conn
+
+
+def update(records=None, conn=None):
+    """Re-tokenize changed notes and drop deleted ones; returns (updated, removed)"""
+    records = scan_vault(VAULT_DIR) if records is None else records
+    own = conn is None
+    conn = conn or connect()
+    with _lock, conn:
+        stored = {path: (doc_id, mtime, size) for doc_id, path, mtime, size
+                  in conn.execute("SELECT id, path, mtime, size FROM docs")}
+        updated = 0
+        seen = set()
+        for record in records:
+            seen.add(record.rel)
+            old = stored.get(record.rel)
+            if old and old[1] == record.mtime and old[2] == record.size:
+                continue
+            if old:
+                conn.execute("DELETE FROM postings WHERE doc = ?", (old[0],))
+                conn.execute("DELETE FROM docs WHERE id = ?", (old[0],))
+            body = strip_frontmatter(record.content)
+            counts = Counter(tokenize(f"{record.stem}\n{body}"))
+            cur = conn.execute(
+                "INSERT INTO docs (path, name, mtime, size, length, preview) VALUES (?, ?, ?, ?, ?, ?)",
+                (record.rel, record.stem, record.mtime, record.size, sum(counts.values()),
+                 body.strip()[:200].replace("\n", " ")),
+            )
+            conn.executemany("INSERT INTO postings VALUES (?, ?, ?)",
+                             [(term, cur.lastrowid, tf) for term, tf in counts.items()])
+            updated += 1
+        removed = [(doc_id,) for path, (doc_id, _, _) in stored.items() if path not in seen]
+        conn.executemany("DELETE FROM postings WHERE doc = ?", removed)
+        conn.executemany("DELETE FROM docs WHERE id = ?", removed)
+    if own:
+        conn.close()
+    return updated, len(removed)
+
+
+def search(query, top_k=5, conn=None):
+    """BM25 search: [(score, path, {"name", "preview"}), ...]"""
+    own = conn is None
+    conn = conn or connect()
+    try:
+        with _lock:
+            total, avg_len = conn.execute("SELECT COUNT(*), AVG(length) FROM docs").fetchone()
+            if not total:
+                return []
+            avg_len = avg_len or 1.0
+            scores = Counter()
+            for term, qtf in Counter(tokenize(query)).items():
+                postings = conn.execute(
+                    "SELECT p.doc, p.tf, d.length FROM postings p JOIN docs d ON d.id = p.doc WHERE p.term = ?",
+                    (term,),
+                ).fetchall()
+                if not postings:
+                    continue
+                idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc, tf, length in postings:
+                    scores[doc] += qtf * idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / avg_len))
+            results = []
+            for doc, score in scores.most_common(top_k):
+                path, name, preview = conn.execute(
+                    "SELECT path, name, preview FROM docs WHERE id = ?", (doc,)).fetchone()
+                results.append((score, path, {"path": path, "name": name, "preview": preview}))
+            return results
+    finally:
+        if own:
+            conn.close()
+
+
+def main():
+    if "--build" in sys.argv:
+        start = time.perf_counter()
+        updated, removed = update()
+        print(f"🔤 Lexical index: {updated} updated, {removed} removed "
+              f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+    elif "--search" in sys.argv:
+        idx = sys.argv.index("--search")
+        if idx + 1 >= len(sys.argv):
+            print("Usage: python lexical_index.py --search \"query\"")
+            return
+        update()
+        start = time.perf_counter()
+        results = search(sys.argv[idx + 1])
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"\n🔤 Results for: \"{sys.argv[idx + 1]}\" ({elapsed:.1f} ms)\n")
+        for score, path, data in results:
+            print(f"  📄 {data['name']} ({score:.2f})")
+            print(f"     {data['preview'][:80]}...")
+    else:
+        print("Usage:")
+        print("  python lexical_index.py --build")
+        print("  python lexical_index.py --search \"query\"")
+
+
+if __name__ == "__main__":
+    main()
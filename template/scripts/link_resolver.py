@@ -0,0 +1,137 @@
+"""
+🔗 Wiki Link Resolver
+
+Resolves [[wiki links]] the way Obsidian does, using lookup tables built
+once per vault scan (note paths, basenames, aliases, folders and
+attachments), so each link resolves in O(1).
+
+Usage:
+  python link_resolver.py "Note name" [source/note.md]
+"""
+
+import posixpath
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+import note_index
+from vault_scanner import list_attachments, list_folders, scan_vault
+
+VAULT_DIR = Path(__file__).parent.parent
+
+RESOLVED = "resolved"
+AMBIGUOUS = "ambiguous"
+BROKEN = "broken"
+FOLDER = "folder"
+
+
+def _aliases(meta):
+    aliases = meta["frontmatter"].get("aliases") or meta["frontmatter"].get("alias") or []
+    if isinstance(aliases, str):
+        aliases = [a.strip() for a in aliases.split(",")]
+    return [a for a in aliases if a]
+
+
+class LinkResolver:
+    """Lookup tables for resolving link text to vault-relative note paths"""
+
+    def __init__(self, note_paths, aliases=None, folders=(), attachments=()):
+        self.paths = {}                  # "folder/note" (lowercase, no .md) -> rel
+        self.by_name = defaultdict(list)  # "note" / "file.pdf" (lowercase) -> [rel, ...]
+        self.by_suffix = defaultdict(list)  # "sub/note" for every trailing path -> [rel, ...]
+        self.by_alias = defaultdict(list)
+        self.folders = {f.lower() for f in folders}
+        self.folder_names = {f.rpartition("/")[2].lower() for f in folders}
+
+        for rel in note_paths:
+            self._add(rel, rel[:-3])
+        for rel in attachments:
+            self._add(rel, rel)
+        for rel, names in (aliases or {}).items():
+            for alias in names:
+                self.by_alias[alias.lower()].append(rel)
+
+    def _add(self, rel, key):
+        key = key.lower()
+        self.paths[key] = rel
+        parts = key.split("/")
+        self.by_name[parts[-1]].append(rel)
+        for i in range(1, len(parts) - 1):
+            self.by_suffix["/".join(parts[i:])].append(rel)
+
+    @staticmethod
+    def _pick(candidates, source_rel):
+        """Obsidian's tie-break: same folder as the source, else the shortest path"""
+        if len(candidates) == 1:
+            return RESOLVED, candidates
+        source_dir = posixpath.dirname(source_rel or "")
+        for rel in candidates:
+            if posixpath.dirname(rel) == source_dir:
+                return RESOLVED, [rel]
+        return AMBIGUOUS, sorted(candidates, key=lambda r: (r.count("/"), len(r), r))
+
+    def resolve(self, link, source_rel=None):
+        """Return (status, targets) for link text as written inside [[...]]"""
+        text = link.strip().replace("\\", "/")
+        if not text:
+            return BROKEN, []
+        if text.endswith("/"):
+            return (FOLDER, [text.rstrip("/")]) if text.rstrip("/").lower() in self.folders else (BROKEN, [])
+        key = text[:-3] if text.lower().endswith(".md") else text
+        key = key.lower()
+
+        if key.startswith(("./", "../")) and source_rel is not None:
+            key = posixpath.normpath(posixpath.join(posixpath.dirname(source_rel.lower()), key))
+            if key in self.paths:
+                return RESOLVED, [self.paths[key]]
+            return BROKEN, []
+
+        key = key.lstrip("/")
+        if "/" in key:
+            if key in self.paths:
+                return RESOLVED, [self.paths[key]]
+            if key in self.by_suffix:
+                return self._pick(self.by_suffix[key], source_rel)
+            if key in self.folders:
+                return FOLDER, [key]
+            return BROKEN, []
+
+        if key in self.by_name:
+            return self._pick(self.by_name[key], source_rel)
+        if key in self.by_alias:
+            return self._pick(self.by_alias[key], source_rel)
+        if key in self.folder_names:
+            return FOLDER, [key]
+        return BROKEN, []
+
+
+def build_resolver(root=None, metas=None):
+    """Build a resolver from the shared vault scan and note metadata"""
+    root = root or VAULT_DIR
+    notes = scan_vault(root)
+    if metas is None:
+        metas = note_index.load(root)
+    aliases = {rel: _aliases(meta) for rel, meta in metas.items()}
+    return LinkResolver(
+        [r.rel for r in notes],
+        aliases={rel: names for rel, names in aliases.items() if names},
+        folders=list_folders(root),
+        attachments=list_attachments(root),
+    )
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python link_resolver.py \"Note name\" [source/note.md]")
+        return None
+    resolver = build_resolver()
+    source = sys.argv[2] if len(sys.argv) > 2 else None
+    status, targets = resolver.resolve(sys.argv[1], source)
+    print(f"🔗 [[{sys.argv[1]}]] → {status}")
+    for target in targets:
+        print(f"  📄 {target}")
+    return status, targets
+
+
+if __name__ == "__main__":
+    main()
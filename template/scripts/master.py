@@ -1,25 +1,44 @@
 """
 🚀 Obsidian Master Orchestrator
 
-Run all automation scripts in sequence with a single command.
+Run all automation scripts with a single command. Steps declare the
+vault paths they read and write; independent steps run concurrently on a
+thread pool, and Git backup / Discord notification always run last.
 
 Usage:
   python master.py           # Full pipeline
+  python master.py --incremental  # Skip steps whose input notes are unchanged
   python master.py --quick   # Export + NLM upload only
   python master.py --weekly  # Weekly review generation
   python master.py --monthly # Monthly review generation
+  python master.py --yearly  # Yearly review generation
+  python master.py --cprofile # Full pipeline with per-step cProfile dumps + tracemalloc
+  python master.py --profile [runs]  # Step timing/memory/I-O summary from the run log
 """
 
 import sys
+import fnmatch
+import hashlib
 import importlib
+import io
+import os
+import time
 import traceback
+import tracemalloc
 import json
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from pathlib import Path
 
+import step_metrics
+import vault_lock
+import vault_scanner
+from job_runner import ThreadOutput
+
 SCRIPTS_DIR = Path(__file__).parent
 VAULT_DIR = SCRIPTS_DIR.parent
 CONFIG_PATH = SCRIPTS_DIR / "config.json"
+STATE_PATH = SCRIPTS_DIR / ".pipeline_state.json"
 
 
 def load_config():
@@ -43,110 +62,277 @@ def run_step(name: str, func, *args, **kwargs):
         return None
 
 
-def run_full():
-    """Full pipeline execution"""
-    config = load_config()
-    
-    print("🚀 Obsidian Automation Kit — Full Pipeline")
-    print("=" * 50)
-    print(f"⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    
-    results = {}
-    
-    # 1. Weekly Review (Sunday only)
-    if datetime.now().weekday() == 6:
-        from auto_weekly import main as weekly_main
-        results["weekly"] = run_step("Weekly Review", weekly_main)
-    
-    # 2. Monthly Review (first 3 days of month)
-    if datetime.now().day <= 3:
-        from auto_monthly import main as monthly_main
-        results["monthly"] = run_step("Monthly Review", monthly_main)
-    
-    # 3. Daily Note generation
+class Step:
+    """A pipeline step and the vault paths it reads and writes
+
+    Paths are vault-relative; a trailing "/" covers a whole folder and "*"
+    the entire vault. Steps that touch overlapping paths keep their declared
+    order; barrier steps wait for everything declared before them.
+
+    `inputs` (folders or globs) lets --incremental skip the step when the
+    notes it depends on are unchanged since its last successful run; steps
+    without inputs (date-driven or side-effecting ones) always run.
+    """
+
+    def __init__(self, key, name, target, reads=(), writes=(), after=(), barrier=False, inputs=None):
+        self.key = key
+        self.name = name
+        self.target = target
+        self.reads = tuple(reads)
+        self.writes = tuple(writes)
+        self.after = tuple(after)
+        self.barrier = barrier
+        self.inputs = tuple(inputs) if inputs is not None else None
+
+    def load(self):
+        """Resolve "module:function" targets lazily (imports happen in the worker)"""
+        if callable(self.target):
+            return self.target
+        module, attr = self.target.split(":")
+        return getattr(importlib.import_module(module), attr)
+
+
+def _overlaps(a, b):
+    return a == "*" or b == "*" or a.startswith(b) or b.startswith(a)
+
+
+def _conflicts(first, second):
+    """True if second must wait for first (write/read, read/write or write/write overlap)"""
+    return any(_overlaps(w, p) for w in first.writes for p in second.reads + second.writes) \
+        or any(_overlaps(r, w) for r in first.reads for w in second.writes)
+
+
+def _matches(rel, patterns):
+    for pattern in patterns:
+        if pattern == "*" or rel == pattern or (pattern.endswith("/") and rel.startswith(pattern)):
+            return True
+        if any(c in pattern for c in "*?[") and fnmatch.fnmatch(rel, pattern):
+            return True
+    return False
+
+
+def fingerprint(step):
+    """(digest, note count) over the step's input notes, from the shared vault scan
+
+    The step's own outputs are excluded so a step doesn't invalidate itself.
+    """
+    digest = hashlib.sha1()
+    count = 0
+    for record in sorted(vault_scanner.scan_vault(VAULT_DIR), key=lambda r: r.rel):
+        if _matches(record.rel, step.inputs) and not _matches(record.rel, step.writes):
+            digest.update(f"{record.rel}\0{record.mtime}\0{record.size}\n".encode("utf-8"))
+            count += 1
+    return digest.hexdigest(), count
+
+
+def load_state():
+    """Input fingerprints of each step's last successful run"""
     try:
-        from auto_daily import create_daily
-        result = create_daily()
-        if result["created"]:
-            print(f"  ✅ {result['message']}")
-        else:
-            print(f"  📋 {result['message']}")
-        results["daily"] = True
-    except Exception as e:
-        print(f"  ⏭️ Daily generation skipped: {e}")
-    
-    # 4. Timeline update
+        return json.loads(STATE_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state):
+    tmp = STATE_PATH.with_name(STATE_PATH.name + ".tmp")
+    tmp.write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, STATE_PATH)
+
+
+def plan(steps):
+    """{step key: keys of earlier steps it must wait for}"""
+    deps = {}
+    for i, step in enumerate(steps):
+        deps[step.key] = {
+            prev.key for prev in steps[:i]
+            if step.barrier or prev.barrier or prev.key in step.after or _conflicts(prev, step)
+        }
+    return deps
+
+
+def _run_captured(step, output, profile_dir=None, last=None, incremental=False):
+    """Run one step on a worker thread
+
+    Returns {"text", "ran", "result", "record", "inputs"}; `last` is the
+    step's saved state, used to skip it in incremental mode.
+    """
+    output.local.buffer = io.StringIO()
+    outcome = {"ran": False, "result": None, "record": None, "inputs": None}
     try:
-        from auto_timeline import main as timeline_main
-        results["timeline"] = run_step("Timeline Update", timeline_main)
-    except Exception as e:
-        print(f"  ⏭️ Timeline skipped: {e}")
-    
-    # 5. Home.md update
+        # Fingerprint when the step starts, after the steps it depends on have written
+        if step.inputs is not None:
+            digest, count = fingerprint(step)
+            outcome["inputs"] = {"fingerprint": digest, "notes": count}
+            if incremental and last and last.get("fingerprint") == digest:
+                print(f"  ⏭️ {step.name} skipped: {count} input notes unchanged since {last.get('at', '?')}"
+                      f" ({', '.join('whole vault' if p == '*' else p for p in step.inputs)})")
+                outcome["skipped"] = True
+                return outcome
+        with step_metrics.StepMeasurement(step.key, step.name, profile_dir) as measurement:
+            try:
+                func = step.load()
+            except Exception as e:
+                print(f"  ⏭️ {step.name} skipped: {e}")
+                return outcome
+            if incremental and step.inputs is not None:
+                print(f"  🔄 {step.name}: " + ("inputs changed" if last else "no previous successful run"))
+            result = run_step(step.name, func)
+        measurement.record["ok"] = result is not None and result is not False
+        outcome.update(ran=True, result=result, record=measurement.record)
+        return outcome
+    finally:
+        outcome["text"] = output.local.buffer.getvalue()
+        output.local.buffer = None
+
+
+def run_pipeline(steps, results, max_workers=4, metrics=None, profile_dir=None, state=None, incremental=False):
+    """Run steps concurrently as their dependencies finish; output is printed per step
+
+    Per-step measurements are appended to `metrics` as steps finish. Input
+    fingerprints of successful steps are recorded in `state`; with
+    incremental=True, steps whose fingerprint matches are skipped.
+    """
+    state = {} if state is None else state
+    deps = plan(steps)
+    pending = {step.key: step for step in steps}
+    running = {}
+    done = set()
+    output = ThreadOutput(sys.stdout)
+    sys.stdout = output
     try:
-        from update_home import main as home_main
-        results["home"] = run_step("Home.md Update", home_main)
-    except ImportError:
-        print("  ⏭️ update_home.py not available")
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            while pending or running:
+                for key, step in list(pending.items()):
+                    if deps[key] <= done:
+                        running[pool.submit(_run_captured, step, output, profile_dir,
+                                            state.get(step.key), incremental)] = step
+                        del pending[key]
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    step = running.pop(future)
+                    outcome = future.result()
+                    output.stream.write(outcome["text"])
+                    output.stream.flush()
+                    if outcome["ran"] or outcome.get("skipped"):
+                        results[step.key] = outcome["result"]
+                    if outcome["record"] is not None and metrics is not None:
+                        metrics.append(outcome["record"])
+                    if outcome["ran"] and outcome["record"]["ok"] and outcome["inputs"]:
+                        state[step.key] = dict(outcome["inputs"], at=datetime.now().strftime("%Y-%m-%d %H:%M"))
+                    done.add(step.key)
+    finally:
+        sys.stdout = output.stream
+    return results
+
+
+def _daily_step():
+    from auto_daily import create_daily
+    result = create_daily()
+    print(f"  {'✅' if result['created'] else '📋'} {result['message']}")
+    return True
+
+
+def build_steps(config, results, metrics=None):
+    """Steps of the full pipeline, in their logical order"""
+    now = datetime.now()
+    steps = []
     
-    # 6. Knowledge organization
-    try:
-        from knowledge_organizer import main as knowledge_main
-        results["knowledge"] = run_step("Knowledge Organization", knowledge_main)
-    except ImportError:
-        print("  ⏭️ knowledge_organizer.py not available")
+    # Weekly Review (Sunday only), Monthly Review (first 3 days of month), Yearly Review (first 3 days of year)
+    if now.weekday() == 6:
+        steps.append(Step("weekly", "Weekly Review", "auto_weekly:main",
+                          reads=("Daily/", "Templates/"), writes=("Weekly/",)))
+    if now.day <= 3:
+        steps.append(Step("monthly", "Monthly Review", "auto_monthly:main",
+                          reads=("Daily/", "Weekly/"), writes=("Monthly/",)))
+    if now.month == 1 and now.day <= 3:
+        steps.append(Step("yearly", "Yearly Review", "auto_yearly:main",
+                          reads=("Daily/", "Monthly/", "Projects/"), writes=("Yearly/",)))
+    
+    steps.append(Step("daily", "Daily Note", _daily_step, reads=("Templates/",), writes=("Daily/",)))
     
-    # 7. NotebookLM export (if configured)
+    if config.get("auto_ai_reporter", False) and config.get("gemini_api_key"):
+        steps.append(Step("ai_report", f"AI Report ({config.get('gemini_model', 'gemini-2.0-flash')})",
+                          "ai_reporter:enrich_daily", reads=("Daily/",), writes=("Daily/",)))
+    
+    steps += [
+        Step("timeline", "Timeline Update", "auto_timeline:main",
+             reads=("Projects/",), writes=("プロジェクトタイムライン.md",), inputs=("Projects/",)),
+        # Vault-wide note count/size, recent dailies and project status
+        Step("home", "Home.md Update", "update_home:main",
+             reads=("*",), writes=("Home.md",), inputs=("*",)),
+        Step("knowledge", "Knowledge Organization", "knowledge_organizer:main",
+             reads=("Knowledge/",), inputs=("Knowledge/",)),
+        # Indexes every note, so it waits for the (fast) dashboard writers above
+        Step("search_index", "Search Index Update", "vault_search:build_index",
+             reads=("*",), writes=("scripts/.search_index/",), inputs=("*",)),
+    ]
+    
+    # NotebookLM export + upload (if configured)
     if config.get("auto_nlm_upload", False):
-        try:
-            from export_to_notebooklm import main as export_main
-            results["export"] = run_step("NLM Export", export_main)
-            
-            from upload_to_notebooklm import main as upload_main
-            results["upload"] = run_step("NLM Upload", upload_main)
-        except ImportError:
-            print("  ⏭️ NotebookLM dependencies not installed")
+        steps.append(Step("export", "NLM Export", "export_to_notebooklm:main", reads=("*",), inputs=("*",)))
+        steps.append(Step("upload", "NLM Upload", "upload_to_notebooklm:main", after=("export",)))
     
-    # 8. Git backup (if configured)
+    # Git backup and Discord notification always run last
     if config.get("auto_git_backup", True):
-        try:
-            from git_backup import main as git_main
-            results["git"] = run_step("Git Backup", git_main)
-        except Exception as e:
-            print(f"  ⏭️ Git backup skipped: {e}")
-    
-    # 9. Discord notification (if configured)
+        steps.append(Step("git", "Git Backup", "git_backup:main", reads=("*",), barrier=True))
     if config.get("auto_discord_notify", False) and config.get("discord_webhook_url"):
-        try:
+        def discord_step():
             from discord_notify import notify
-            results["discord"] = run_step("Discord Notification", lambda: notify(results=results))
-        except Exception as e:
-            print(f"  ⏭️ Discord notification skipped: {e}")
+            slowest = step_metrics.slowest(metrics or [], config.get("pipeline", {}).get("discord_slowest", 3))
+            return notify(results=results, slowest=slowest)
+        steps.append(Step("discord", "Discord Notification", discord_step, barrier=True))
+    return steps
+
+
+def run_full():
+    """Full pipeline execution (independent steps run concurrently)"""
+    config = load_config()
     
-    # 10. AI Reporter (if configured)
-    if config.get("auto_ai_reporter", False) and config.get("gemini_api_key"):
-        try:
-            from ai_reporter import enrich_daily
-            results["ai_report"] = run_step(f"AI Report ({config.get('gemini_model', 'gemini-2.0-flash')})", enrich_daily)
-        except Exception as e:
-            print(f"  ⏭️ AI Reporter skipped: {e}")
+    print("🚀 Obsidian Automation Kit — Full Pipeline")
+    print("=" * 50)
+    print(f"⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
-    # 11. Semantic Search index update
-    try:
-        from vault_search import build_index
-        results["search_index"] = run_step("Search Index Update", build_index)
-    except Exception as e:
-        print(f"  ⏭️ Search index skipped: {e}")
+    results = {}
+    
+    # One shared vault scan for every step of this run
+    vault_scanner.clear_cache()
+    
+    metrics = []
+    run_id = step_metrics.new_run_id()
+    max_workers = config.get("pipeline", {}).get("max_workers", 4)
+    profile_dir = None
+    if "--cprofile" in sys.argv:
+        # Profiled runs are serial so each dump and memory peak belongs to one step
+        profile_dir = step_metrics.PROFILE_DIR / run_id.replace(":", "").replace(".", "-")
+        max_workers = 1
+        tracemalloc.start()
+    
+    incremental = "--incremental" in sys.argv or config.get("pipeline", {}).get("incremental", False)
+    if incremental:
+        print("♻️ Incremental mode: steps with unchanged inputs are skipped")
+    state = load_state()
+    
+    steps = build_steps(config, results, metrics)
+    start = time.perf_counter()
+    run_pipeline(steps, results, max_workers, metrics, profile_dir, state, incremental)
+    save_state(state)
+    step_metrics.append_run(run_id, metrics)
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
     
     # Summary
     print(f"\n{'='*50}")
-    print(f"✅ Pipeline complete ({datetime.now().strftime('%H:%M:%S')})")
+    print(f"✅ Pipeline complete ({datetime.now().strftime('%H:%M:%S')}, {time.perf_counter() - start:.1f}s)")
     active = [k for k, v in results.items() if v is not None and v is not False]
     skipped = [k for k, v in results.items() if v is None or v is False]
     if active:
         print(f"  Executed: {', '.join(active)}")
     if skipped:
         print(f"  Skipped: {', '.join(skipped)}")
+    if metrics:
+        print(f"  ⏱️ Slowest: {', '.join(f'{name} {wall:.1f}s' for name, wall in step_metrics.slowest(metrics))}")
+    if profile_dir:
+        print(f"  🔬 cProfile dumps: {profile_dir}")
 
 
 def run_quick():
@@ -173,15 +359,29 @@ def run_monthly():
     monthly_main()
 
 
+def run_yearly():
+    """Yearly review only"""
+    from auto_yearly import main as yearly_main
+    yearly_main()
+
+
 def main():
     if "--quick" in sys.argv:
         run_quick()
-    elif "--weekly" in sys.argv:
-        run_weekly()
-    elif "--monthly" in sys.argv:
-        run_monthly()
+    elif "--profile" in sys.argv:
+        idx = sys.argv.index("--profile")
+        step_metrics.summary(int(sys.argv[idx + 1]) if sys.argv[idx + 1:idx + 2] and sys.argv[idx + 1].isdigit() else 10)
     else:
-        run_full()
+        # Serialized with the scheduler's and other manual runs' vault writes
+        with vault_lock.hold("master"):
+            if "--weekly" in sys.argv:
+                run_weekly()
+            elif "--monthly" in sys.argv:
+                run_monthly()
+            elif "--yearly" in sys.argv:
+                run_yearly()
+            else:
+                run_full()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,315 @@
+"""
+🗃️ Note Metadata Index
+
+Persistent SQLite store of parsed note metadata (links, tags, tasks in
+every state, headings, frontmatter, content and body hashes). Each note is streamed
+line by line in a single pass and only re-parsed when its mtime or size
+changes, so repeated pipeline runs on an unchanged vault stay cheap and the
+weekly/monthly reviews share the same parse of each daily note.
+
+Usage:
+  python note_index.py           # Sync index and print statistics
+  python note_index.py --rebuild # Drop and re-parse every note
+"""
+
+import hashlib
+import io
+import json
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+from vault_scanner import notes_in, get_note, scan_vault
+
+SCRIPTS_DIR = Path(__file__).parent
+VAULT_DIR = SCRIPTS_DIR.parent
+DB_PATH = SCRIPTS_DIR / ".note_index.db"
+DAILY_FOLDER = "Daily"
+
+# Bump when parse_note() output changes so stale rows are re-parsed
+PARSER_VERSION = 3
+
+LINK_RE = re.compile(r'\[\[([^\]|#]+?)(?:\|[^\]]*?)?\]\]')
+TAG_RE = re.compile(r'#([a-zA-Z0-9_/\-\u3040-\u309f\u30a0-\u30ff\u4e00-\u9fff]+)')
+CREATED_RE = re.compile(r'created:\s*(\d{4}-\d{2}-\d{2})')
+DATE_RE = re.compile(r'(\d{4}-\d{2}-\d{2})')
+TASK_RE = re.compile(r'^[-*] \[(.)\]')
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.+?)(?:\s+#+)?\s*$')
+TASK_STATES = {"x": "done", "X": "done", "/": "doing", " ": "open", "-": "cancelled"}
+
+_lock = threading.RLock()
+_conn = None
+_memo = {}
+
+
+def _frontmatter_lines(lines):
+    """Parse YAML frontmatter lines (flat keys, inline and block lists)"""
+    data = {}
+    key = None
+    for line in lines:
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if stripped.startswith("- ") and key is not None:
+            if not isinstance(data.get(key), list):
+                data[key] = []
+            data[key].append(stripped[2:].strip().strip("\"'"))
+            continue
+        if ":" in line and not line.startswith((" ", "\t")):
+            key, _, value = line.partition(":")
+            key = key.strip()
+            value = value.strip()
+            if value.startswith("[") and value.endswith("]"):
+                data[key] = [v.strip().strip("\"'") for v in value[1:-1].split(",") if v.strip()]
+            else:
+                data[key] = value.strip("\"'")
+    return data
+
+
+def parse_frontmatter(content):
+    """Parse the leading YAML frontmatter block ({} if there is none or it isn't closed)"""
+    if not content.startswith("---"):
+        return {}
+    lines = content.split("\n")
+    for end, line in enumerate(lines[1:], 1):
+        if line.strip() == "---":
+            return _frontmatter_lines(lines[1:end])
+    return {}
+
+
+def require_frontmatter(content, name):
+    """Return generated note content, raising ValueError if its frontmatter doesn't parse"""
+    if not parse_frontmatter(content):
+        raise ValueError(f"{name}: generated note has no valid frontmatter")
+    return content
+
+
+def parse_lines(lines):
+    """Extract links, tags, tasks, headings and frontmatter in one pass over a note's lines
+
+    `lines` may be an open text file (see NoteRecord.lines), so a note is
+    streamed instead of being loaded and split; the hash covers the same
+    text that read_text() would return; body_hash covers what follows the
+    frontmatter.
+    """
+    digest = hashlib.sha1()
+    body = hashlib.sha1()
+    tasks, links, tags, headings = [], [], [], []
+    frontmatter = {}
+    fm_lines = None  # collecting frontmatter while not None
+    in_code = False
+    body_lines = 0
+    summary = created = latest = None
+    for number, line in enumerate(lines):
+        digest.update(line.encode("utf-8"))
+        if fm_lines is None and not (number == 0 and line.startswith("---")):
+            body.update(line.encode("utf-8"))
+        line = line.rstrip("\n")
+        stripped = line.strip()
+        if number == 0 and line.startswith("---"):
+            fm_lines = []
+        elif fm_lines is not None:
+            if stripped == "---":
+                frontmatter = _frontmatter_lines(fm_lines)
+                fm_lines = None
+            else:
+                fm_lines.append(line)
+        if stripped.startswith("```"):
+            in_code = not in_code
+        elif line.startswith("#") and not in_code:
+            match = HEADING_RE.match(line)
+            if match:
+                headings.append([len(match.group(1)), match.group(2)])
+        match = TASK_RE.match(stripped)
+        if match and match.group(1) in TASK_STATES:
+            tasks.append([TASK_STATES[match.group(1)], stripped[5:].strip()])
+        if stripped and not line.startswith("---") and not line.startswith("#"):
+            body_lines += 1
+            if summary is None and not line.startswith(">") and not line.startswith("tags:") \
+                    and "type/" not in line and "created:" not in line:
+                summary = stripped
+        if "[[" in line:
+            links += LINK_RE.findall(line)
+        if "#" in line:
+            tags += TAG_RE.findall(line)
+        if "-" in line:
+            if created is None and "created:" in line:
+                match = CREATED_RE.search(line)
+                created = match.group(1) if match else None
+            dates = DATE_RE.findall(line)
+            if dates:
+                latest = max(latest or "", *dates)
+    return {
+        "hash": digest.hexdigest(),
+        "body_hash": body.hexdigest(),
+        "frontmatter": frontmatter,
+        "links": links,
+        "tags": tags,
+        "tasks": tasks,
+        "headings": headings,
+        "created": created,
+        "latest_date": latest,
+        "body_lines": body_lines,
+        "summary": summary,
+    }
+
+
+def parse_note(content):
+    """Metadata for note content already in memory (see parse_lines)"""
+    return parse_lines(io.StringIO(content))
+
+
+def is_placeholder(meta):
+    """Whether a backfilled note is still exactly as generated (see auto_daily.backfill)"""
+    return meta["frontmatter"].get("backfilled") == meta["body_hash"]
+
+
+def task_counts(meta):
+    """{"done": n, "doing": n, "open": n, "cancelled": n} for a note's tasks"""
+    counts = dict.fromkeys(("done", "doing", "open", "cancelled"), 0)
+    for state, _ in meta["tasks"]:
+        counts[state] += 1
+    return counts
+
+
+def _connect():
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute("PRAGMA synchronous=NORMAL")
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS notes ("
+            " rel TEXT PRIMARY KEY, mtime REAL, size INTEGER, version INTEGER, meta TEXT)"
+        )
+    return _conn
+
+
+def _load_rows(rels=None):
+    conn = _connect()
+    if rels is None:
+        rows = conn.execute("SELECT rel, mtime, size, version, meta FROM notes")
+    else:
+        rows = []
+        rels = list(rels)
+        for i in range(0, len(rels), 500):
+            chunk = rels[i:i + 500]
+            rows += conn.execute(
+                f"SELECT rel, mtime, size, version, meta FROM notes WHERE rel IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+    return {rel: (mtime, size, version, meta) for rel, mtime, size, version, meta in rows}
+
+
+def _sync(records, prune=False):
+    """Return {rel: meta} for the given scanner records, re-parsing only changed notes"""
+    with _lock:
+        missing = [r.rel for r in records if r.rel not in _memo]
+        stored = {}
+        if missing:
+            stored = _load_rows(None if len(missing) > 500 else missing)
+        changed = []
+        result = {}
+        for record in records:
+            key = (record.mtime, record.size)
+            cached = _memo.get(record.rel)
+            if cached and cached[0] == key:
+                result[record.rel] = cached[1]
+                continue
+            row = stored.get(record.rel)
+            if row and (row[0], row[1]) == key and row[2] == PARSER_VERSION:
+                meta = json.loads(row[3])
+            else:
+                meta = parse_lines(record.lines())
+                changed.append((record.rel, record.mtime, record.size, PARSER_VERSION,
+                                json.dumps(meta, ensure_ascii=False)))
+            _memo[record.rel] = (key, meta)
+            result[record.rel] = meta
+
+        conn = _connect()
+        with conn:
+            if changed:
+                conn.executemany("INSERT OR REPLACE INTO notes VALUES (?, ?, ?, ?, ?)", changed)
+            if prune:
+                gone = [rel for (rel,) in conn.execute("SELECT rel FROM notes") if rel not in result]
+                conn.executemany("DELETE FROM notes WHERE rel = ?", [(rel,) for rel in gone])
+                for rel in gone:
+                    _memo.pop(rel, None)
+        return result
+
+
+def load(root=None):
+    """Metadata for every note in the vault: {rel_path: meta}"""
+    return _sync(scan_vault(root or VAULT_DIR), prune=True)
+
+
+def load_folder(folder, root=None):
+    """Metadata for notes under a vault-relative folder"""
+    return _sync(notes_in(folder, root or VAULT_DIR))
+
+
+def get_meta(rel, root=None):
+    """Metadata for a single note by vault-relative path, or None if it doesn't exist"""
+    record = get_note(rel, root or VAULT_DIR)
+    if record is None:
+        return None
+    return _sync([record])[rel]
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def dailies(start, end, root=None, placeholders=False):
+    """{date: meta} for the Daily/YYYY-MM-DD.md notes from start to end (inclusive)
+
+    One folder listing and one cached parse per note, shared by the weekly,
+    monthly and yearly reviews. Backfilled notes nobody has edited yet are
+    left out unless placeholders=True, so they don't count as worked days.
+    """
+    start, end = _as_date(start), _as_date(end)
+    found = []
+    for record in notes_in(DAILY_FOLDER, root or VAULT_DIR):
+        if record.folder != DAILY_FOLDER or len(record.stem) != 10:
+            continue
+        try:
+            day = date.fromisoformat(record.stem)
+        except ValueError:
+            continue
+        if start <= day <= end:
+            found.append((day, record))
+    metas = _sync([record for _, record in found])
+    return {day: metas[record.rel] for day, record in sorted(found, key=lambda item: item[0])
+            if placeholders or not is_placeholder(metas[record.rel])}
+
+
+def rebuild():
+    """Drop all stored metadata"""
+    with _lock:
+        conn = _connect()
+        with conn:
+            conn.execute("DELETE FROM notes")
+        _memo.clear()
+
+
+def main():
+    print("🗃️ Note Metadata Index")
+    if "--rebuild" in sys.argv:
+        rebuild()
+        print("  🧹 Index cleared")
+    start = time.perf_counter()
+    notes = load()
+    elapsed = time.perf_counter() - start
+    links = sum(len(m["links"]) for m in notes.values())
+    tasks = sum(len(m["tasks"]) for m in notes.values())
+    print(f"  📊 Notes: {len(notes)} | Links: {links} | Tasks: {tasks}")
+    print(f"  ⏱️ Sync: {elapsed * 1000:.1f} ms")
+    return notes
+
+
+if __name__ == "__main__":
+    main()
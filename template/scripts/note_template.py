@@ -0,0 +1,314 @@
+"""
+🧩 Note Templates
+
+Compiles an Obsidian template once into literal chunks and token
+renderers, cached until the template file's mtime changes, so rendering a
+note (or a whole backfilled year of them) is a single join per date.
+
+Supported tokens:
+  {{date}} {{date:dddd, MMMM Do}} {{time}} {{time:HH:mm}} {{title}}
+  {{date+1d:YYYY-MM-DD}} {{date-1w}}      offsets in y Q M w d h m s
+  {{yesterday}} {{tomorrow}} {{monday:YYYY-MM-DD}} ... {{sunday}}
+  <% tp.date.now("YYYY-MM-DD", -1) %> <% tp.date.yesterday() %>
+  <% tp.date.tomorrow() %> <% tp.date.weekday("YYYY-MM-DD", 0) %>
+  <% tp.file.title %>
+  {{carryover}}  unfinished tasks ([ ] and [/]) carried over from the previous note
+                 (scripts only: Obsidian's core Templates plugin leaves it as
+                 literal text, so the shipped template doesn't use it and
+                 auto_daily.py inserts the tasks under 今日のタスク instead)
+
+Dates are relative to the note's own date (so backfilled notes get their
+own day), {{time}} is the time of rendering. Formats use moment.js tokens
+(YYYY MM DD Do dddd ddd ww WW A ...) with the "ja" (default) or "en" locale, and
+unknown tokens are left as they are, like Obsidian does.
+
+Usage:
+  python note_template.py "Templates/Daily テンプレート.md" [YYYY-MM-DD]  # Preview a rendering
+"""
+
+import calendar
+import re
+import sys
+from datetime import date as Date, datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+
+VAULT_DIR = Path(__file__).parent.parent
+DEFAULT_LOCALE = "ja"
+
+LOCALES = {
+    "en": {
+        "months": ["January", "February", "March", "April", "May", "June", "July",
+                   "August", "September", "October", "November", "December"],
+        "months_short": ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"],
+        # Sunday first, as in moment.js
+        "weekdays": ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"],
+        "weekdays_short": ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"],
+        "weekdays_min": ["Su", "Mo", "Tu", "We", "Th", "Fr", "Sa"],
+        "meridiem": ("AM", "PM"),
+        "ordinal": lambda n: f"{n}{'th' if 11 <= n % 100 <= 13 else {1: 'st', 2: 'nd', 3: 'rd'}.get(n % 10, 'th')}",
+        "dow": 0, "doy": 6,  # week starts on Sunday, the week containing Jan 1st is week 1
+    },
+    "ja": {
+        "months": [f"{m}月" for m in range(1, 13)],
+        "months_short": [f"{m}月" for m in range(1, 13)],
+        "weekdays": ["日曜日", "月曜日", "火曜日", "水曜日", "木曜日", "金曜日", "土曜日"],
+        "weekdays_short": ["日", "月", "火", "水", "木", "金", "土"],
+        "weekdays_min": ["日", "月", "火", "水", "木", "金", "土"],
+        "meridiem": ("午前", "午後"),
+        "ordinal": lambda n: f"{n}日",
+        "dow": 0, "doy": 6,
+    },
+}
+
+FORMAT_RE = re.compile(r"\[[^\]]*\]|YYYY|YY|Q|MMMM|MMM|MM|M|DDDD|DDD|Do|DD|D|dddd|ddd|dd|d|E|e"
+                       r"|ww|w|WW|W|gggg|GGGG|HH|H|hh|h|mm|m|ss|s|A|a|X|x")
+TOKEN_RE = re.compile(r"\{\{\s*(.+?)\s*\}\}|<%[-_]?\s*(.+?)\s*[-_]?%>", re.S)
+DATE_TOKEN_RE = re.compile(r"^(date|time)\s*(?:([+-]\d+)\s*([yQMwdhms]))?\s*(?::(.+))?$")
+WEEKDAY_TOKEN_RE = re.compile(r"^(sunday|monday|tuesday|wednesday|thursday|friday|saturday)\s*(?::(.+))?$", re.I)
+TP_DATE_RE = re.compile(r"^tp\.date\.(now|yesterday|tomorrow|weekday)\(\s*(?:([\"'])(.*?)\2)?"
+                        r"\s*(?:,\s*(-?\d+|([\"'])P(-?\d+)([DWMY])\5))?[^)]*\)$", re.I)
+TIMEDELTA_UNITS = {"w": "weeks", "d": "days", "h": "hours", "m": "minutes", "s": "seconds"}
+WEEKDAY_NAMES = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+# ---- moment.js-style formatting ----
+
+def _weekday(dt):
+    """Day of week with Sunday = 0"""
+    return (dt.weekday() + 1) % 7
+
+
+def _first_week_offset(year, dow, doy):
+    fwd = 7 + dow - doy
+    return -((7 + _weekday(Date(year, 1, fwd)) - dow) % 7) + fwd - 1
+
+
+def _weeks_in_year(year, dow, doy):
+    days = 366 if calendar.isleap(year) else 365
+    return (days - _first_week_offset(year, dow, doy) + _first_week_offset(year + 1, dow, doy)) // 7
+
+
+def locale_week(dt, loc):
+    """(week-year, week) using the locale's week rules (moment's w / gggg)"""
+    dow, doy = loc["dow"], loc["doy"]
+    week = (dt.timetuple().tm_yday - _first_week_offset(dt.year, dow, doy) - 1) // 7 + 1
+    if week < 1:
+        return dt.year - 1, week + _weeks_in_year(dt.year - 1, dow, doy)
+    if week > _weeks_in_year(dt.year, dow, doy):
+        return dt.year + 1, week - _weeks_in_year(dt.year, dow, doy)
+    return dt.year, week
+
+
+def _hour12(dt):
+    return dt.hour % 12 or 12
+
+
+FORMATTERS = {
+    "YYYY": lambda dt, loc: f"{dt.year:04d}",
+    "YY": lambda dt, loc: f"{dt.year % 100:02d}",
+    "Q": lambda dt, loc: str((dt.month - 1) // 3 + 1),
+    "MMMM": lambda dt, loc: loc["months"][dt.month - 1],
+    "MMM": lambda dt, loc: loc["months_short"][dt.month - 1],
+    "MM": lambda dt, loc: f"{dt.month:02d}",
+    "M": lambda dt, loc: str(dt.month),
+    "DDDD": lambda dt, loc: f"{dt.timetuple().tm_yday:03d}",
+    "DDD": lambda dt, loc: str(dt.timetuple().tm_yday),
+    "Do": lambda dt, loc: loc["ordinal"](dt.day),
+    "DD": lambda dt, loc: f"{dt.day:02d}",
+    "D": lambda dt, loc: str(dt.day),
+    "dddd": lambda dt, loc: loc["weekdays"][_weekday(dt)],
+    "ddd": lambda dt, loc: loc["weekdays_short"][_weekday(dt)],
+    "dd": lambda dt, loc: loc["weekdays_min"][_weekday(dt)],
+    "d": lambda dt, loc: str(_weekday(dt)),
+    "E": lambda dt, loc: str(dt.isoweekday()),
+    "e": lambda dt, loc: str((_weekday(dt) - loc["dow"]) % 7),
+    "ww": lambda dt, loc: f"{locale_week(dt, loc)[1]:02d}",
+    "w": lambda dt, loc: str(locale_week(dt, loc)[1]),
+    "WW": lambda dt, loc: f"{dt.isocalendar()[1]:02d}",
+    "W": lambda dt, loc: str(dt.isocalendar()[1]),
+    "gggg": lambda dt, loc: f"{locale_week(dt, loc)[0]:04d}",
+    "GGGG": lambda dt, loc: f"{dt.isocalendar()[0]:04d}",
+    "HH": lambda dt, loc: f"{dt.hour:02d}",
+    "H": lambda dt, loc: str(dt.hour),
+    "hh": lambda dt, loc: f"{_hour12(dt):02d}",
+    "h": lambda dt, loc: str(_hour12(dt)),
+    "mm": lambda dt, loc: f"{dt.minute:02d}",
+    "m": lambda dt, loc: str(dt.minute),
+    "ss": lambda dt, loc: f"{dt.second:02d}",
+    "s": lambda dt, loc: str(dt.second),
+    "A": lambda dt, loc: loc["meridiem"][dt.hour >= 12],
+    "a": lambda dt, loc: loc["meridiem"][dt.hour >= 12].lower(),
+    "X": lambda dt, loc: str(int(dt.timestamp())),
+    "x": lambda dt, loc: str(int(dt.timestamp() * 1000)),
+}
+
+
+@lru_cache(maxsize=256)
+def compile_format(fmt, locale=DEFAULT_LOCALE):
+    """Function formatting a datetime with a moment.js format string"""
+    loc = LOCALES.get(locale, LOCALES[DEFAULT_LOCALE])
+    parts = []
+    pos = 0
+    for match in FORMAT_RE.finditer(fmt):
+        parts.append(fmt[pos:match.start()])
+        token = match.group(0)
+        parts.append(token[1:-1] if token.startswith("[") else FORMATTERS[token])
+        pos = match.end()
+    parts.append(fmt[pos:])
+    parts = [p for p in parts if p != ""]
+    return lambda dt: "".join(p if isinstance(p, str) else p(dt, loc) for p in parts)
+
+
+def format_date(dt, fmt, locale=DEFAULT_LOCALE):
+    return compile_format(fmt, locale)(dt)
+
+
+def shift(dt, amount, unit):
+    """dt moved by `amount` units (y Q M w d h m s), clamping the day like moment.js"""
+    if unit in "yQM":
+        months = dt.month - 1 + amount * {"y": 12, "Q": 3, "M": 1}[unit]
+        year, month = dt.year + months // 12, months % 12 + 1
+        return dt.replace(year=year, month=month, day=min(dt.day, calendar.monthrange(year, month)[1]))
+    return dt + timedelta(**{TIMEDELTA_UNITS[unit]: amount})
+
+
+# ---- Templates ----
+
+class Context:
+    """What a rendering is about: the note's date and title, and the tasks to carry over"""
+
+    __slots__ = ("date", "now", "title", "carryover")
+
+    def __init__(self, date, title=None, carryover=(), now=None):
+        if not isinstance(date, datetime):
+            date = datetime(date.year, date.month, date.day)
+        self.date = date
+        self.now = now or datetime.now()
+        self.title = title if title is not None else date.strftime("%Y-%m-%d")
+        self.carryover = carryover
+
+
+def _date_renderer(fmt, locale, offset=0, unit="d", use_now=False, weekday=None, locale_weekday=None):
+    formatter = compile_format(fmt, locale)
+    loc = LOCALES.get(locale, LOCALES[DEFAULT_LOCALE])
+
+    def render(ctx):
+        dt = ctx.now if use_now else ctx.date
+        if weekday is not None:  # Monday-based week of the note's date
+            dt = dt - timedelta(days=dt.weekday()) + timedelta(days=weekday)
+        if locale_weekday is not None:  # tp.date.weekday: locale week of the note's date
+            dt = dt - timedelta(days=(_weekday(dt) - loc["dow"]) % 7) + timedelta(days=locale_weekday)
+        return formatter(shift(dt, offset, unit) if offset else dt)
+    return render
+
+
+def _compile_token(expr, locale):
+    """Renderer for a token's inner text, or None for unknown tokens"""
+    if expr == "title" or expr == "tp.file.title":
+        return lambda ctx: ctx.title
+    if expr == "carryover":
+        return lambda ctx: "\n".join(ctx.carryover)
+    if expr in ("yesterday", "tomorrow"):
+        return _date_renderer("YYYY-MM-DD", locale, offset=-1 if expr == "yesterday" else 1)
+    match = DATE_TOKEN_RE.match(expr)
+    if match:
+        kind, amount, unit, fmt = match.groups()
+        fmt = fmt.strip() if fmt else ("HH:mm" if kind == "time" else "YYYY-MM-DD")
+        return _date_renderer(fmt, locale, int(amount or 0), unit or "d", use_now=kind == "time")
+    match = WEEKDAY_TOKEN_RE.match(expr)
+    if match:
+        name, fmt = match.groups()
+        return _date_renderer((fmt or "YYYY-MM-DD").strip(), locale, weekday=WEEKDAY_NAMES.index(name.lower()))
+    match = TP_DATE_RE.match(expr)
+    if match:
+        func, _, fmt, offset, _, duration, unit = match.groups()
+        fmt = fmt or "YYYY-MM-DD"
+        if func == "weekday":
+            return _date_renderer(fmt, locale, locale_weekday=int(offset or 0))
+        if func in ("yesterday", "tomorrow"):
+            return _date_renderer(fmt, locale, offset=-1 if func == "yesterday" else 1)
+        if duration is not None:
+            return _date_renderer(fmt, locale, int(duration), {"D": "d", "W": "w", "M": "M", "Y": "y"}[unit.upper()])
+        return _date_renderer(fmt, locale, int(offset or 0))
+    return None
+
+
+class Template:
+    """A template compiled into literal chunks and token renderers"""
+
+    def __init__(self, text, locale=DEFAULT_LOCALE):
+        self.parts = []
+        self.uses_carryover = False
+        pos = 0
+        for match in TOKEN_RE.finditer(text):
+            expr = (match.group(1) or match.group(2)).strip()
+            renderer = _compile_token(expr, locale)
+            if renderer is None:
+                continue  # left in the surrounding literal text
+            start, end = match.span()
+            if expr == "carryover":
+                self.uses_carryover = True
+                # On a line of its own the token takes its line break with it when empty
+                if (start == 0 or text[start - 1] == "\n") and text[end:end + 1] == "\n":
+                    end += 1
+                    renderer = self._own_line(renderer)
+            self.parts.append(text[pos:start])
+            self.parts.append(renderer)
+            pos = end
+        self.parts.append(text[pos:])
+        self.parts = [p for p in self.parts if p != ""]
+
+    @staticmethod
+    def _own_line(renderer):
+        def render(ctx):
+            text = renderer(ctx)
+            return f"{text}\n" if text else ""
+        return render
+
+    def render(self, date, title=None, carryover=(), now=None):
+        """Render for a note date (date or datetime)"""
+        ctx = Context(date, title, carryover, now)
+        return "".join(p if isinstance(p, str) else p(ctx) for p in self.parts)
+
+
+_cache = {}
+
+
+def load(path, locale=DEFAULT_LOCALE):
+    """Compiled template for a file, or None if it doesn't exist
+
+    Recompiled only when the file's mtime or size changes.
+    """
+    path = Path(path)
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    key = (str(path), locale)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _cache.get(key)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    template = Template(path.read_text(encoding="utf-8"), locale)
+    _cache[key] = (stamp, template)
+    return template
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python note_template.py <template.md> [YYYY-MM-DD]")
+        return
+    path = Path(sys.argv[1])
+    if not path.is_absolute() and not path.exists():
+        path = VAULT_DIR / path
+    template = load(path)
+    if template is None:
+        print(f"  ❌ Template not found: {path}")
+        return
+    day = datetime.strptime(sys.argv[2], "%Y-%m-%d") if len(sys.argv) > 2 else datetime.now()
+    print(template.render(day, carryover=["- [ ] (carried over task)"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+🗃️ Query Embedding Cache
+
+Persistent cache of query embeddings for vault_search, so saved searches
+that run many times a day cost no API call after the first one. Entries
+are keyed by embedding model and normalized query text, evicted by age
+and by count (least recently used first), and hits/misses are counted.
+
+Usage:
+  python query_cache.py          # Print cache statistics
+  python query_cache.py --clear  # Drop all cached embeddings
+"""
+
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).parent
+INDEX_DIR = SCRIPTS_DIR / ".search_index"
+CACHE_PATH = INDEX_DIR / "query_cache.db"
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_MAX_AGE_DAYS = 30
+
+
+def normalize_query(text):
+    """Case- and whitespace-insensitive cache key text"""
+    return " ".join(text.lower().split())
+
+
+class QueryCache:
+    """SQLite-backed {(model, query): embedding} with LRU/age eviction"""
+
+    def __init__(self, path=CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, max_age_days=DEFAULT_MAX_AGE_DAYS):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS queries (
+                model TEXT, query TEXT, vector BLOB, created REAL, used REAL, hits INTEGER DEFAULT 0,
+                PRIMARY KEY (model, query));
+            CREATE INDEX IF NOT EXISTS queries_used ON queries (used);
+            CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER);
+        """)
+
+    def _count(self, name):
+        self.conn.execute(
+            "INSERT INTO counters VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,))
+
+    def get(self, model, query):
+        """Cached embedding (list of floats) or None; expired entries count as misses"""
+        key = normalize_query(query)
+        now = time.time()
+        with self.lock, self.conn:
+            row = self.conn.execute("SELECT vector, created FROM queries WHERE model = ? AND query = ?",
+                                    (model, key)).fetchone()
+            if row is None or now - row[1] > self.max_age:
+                self._count("misses")
+                return None
+            self.conn.execute("UPDATE queries SET used = ?, hits = hits + 1 WHERE model = ? AND query = ?",
+                              (now, model, key))
+            self._count("hits")
+        return array("f", row[0]).tolist()
+
+    def put(self, model, query, vector):
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO queries (model, query, vector, created, used) VALUES (?, ?, ?, ?, ?)",
+                (model, normalize_query(query), array("f", vector).tobytes(), now, now))
+            self._evict(now)
+
+    def _evict(self, now):
+        self.conn.execute("DELETE FROM queries WHERE created < ?", (now - self.max_age,))
+        self.conn.execute(
+            "DELETE FROM queries WHERE rowid IN (SELECT rowid FROM queries ORDER BY used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,))
+
+    def embed(self, embedder, query):
+        """embedder.embed_query(query) through the cache"""
+        model = getattr(embedder, "model", type(embedder).__name__)
+        vector = self.get(model, query)
+        if vector is None:
+            vector = list(embedder.embed_query(query))
+            self.put(model, query, vector)
+        return vector
+
+    def stats(self):
+        with self.lock:
+            counters = dict(self.conn.execute("SELECT name, value FROM counters"))
+            entries = self.conn.execute("SELECT COUNT(*) FROM queries").fetchone()[0]
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        return {"entries": entries, "hits": hits, "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0}
+
+    def clear(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM queries")
+            self.conn.execute("DELETE FROM counters")
+
+    def close(self):
+        self.conn.close()
+
+
+def from_config(search_conf):
+    """QueryCache using the search.query_cache_* settings"""
+    return QueryCache(max_entries=search_conf.get("query_cache_entries", DEFAULT_MAX_ENTRIES),
+                      max_age_days=search_conf.get("query_cache_days", DEFAULT_MAX_AGE_DAYS))
+
+
+def main():
+    cache = QueryCache()
+    if "--clear" in sys.argv:
+        cache.clear()
+        print("  🗑️ Query cache cleared")
+    stats = cache.stats()
+    print("🗃️ Query Embedding Cache")
+    print(f"  📊 {stats['entries']} queries cached")
+    print(f"  🎯 {stats['hits']} hits / {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)")
+    cache.close()
+    return stats
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+📈 Period Rollups
+
+Aggregates of the daily notes per day, ISO week, month and year (active
+days, task counts by state, tags, link targets for project mentions),
+stored in SQLite next to the note index. Done and cancelled tasks are
+summed over a span, while open and in-progress counts are those of its
+latest note: auto_daily carries unfinished tasks into every new note, so
+summing them would count one task once per day it stayed open. Only days whose note changed
+since the last sync are re-aggregated, and only the periods containing
+them are recomputed, so reviews of any span read a handful of rows:
+whole years, months and weeks inside the range plus at most a few
+leftover days.
+
+Usage:
+  python rollups.py                        # Sync and print statistics
+  python rollups.py 2025-01-01 2025-12-31  # Aggregate for a date range
+  python rollups.py --rebuild              # Drop and recompute every rollup
+"""
+
+import json
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import note_index
+
+SCRIPTS_DIR = Path(__file__).parent
+VAULT_DIR = SCRIPTS_DIR.parent
+DB_PATH = SCRIPTS_DIR / ".rollups.db"
+
+# Bump when day_rollup() output changes so every day is re-aggregated
+ROLLUP_VERSION = 2
+TASK_KEYS = ("done", "doing", "open", "cancelled")
+SUMMED_KEYS = ("done", "cancelled")
+LATEST_KEYS = ("doing", "open")  # state as of the span's last note
+ONE_DAY = timedelta(days=1)
+
+_lock = threading.RLock()
+_conn = None
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def empty():
+    """A rollup with nothing in it"""
+    return {"days": 0, "last": None, "tasks": dict.fromkeys(TASK_KEYS, 0), "tags": {}, "links": {}}
+
+
+def day_rollup(meta, day):
+    """Aggregate of one daily note's metadata"""
+    tags = Counter(meta["tags"])
+    fm_tags = meta["frontmatter"].get("tags", [])
+    tags.update(t for t in (fm_tags if isinstance(fm_tags, list) else [fm_tags]) if t and not t.startswith("type/"))
+    return {
+        "days": 1,
+        "last": day.isoformat(),
+        "tasks": note_index.task_counts(meta),
+        "tags": dict(tags),
+        "links": dict(Counter(link.rpartition("/")[2].strip() for link in meta["links"])),
+    }
+
+
+def merge(rollups):
+    """Combine several rollups (in any order) into one"""
+    total = empty()
+    tags, links = Counter(), Counter()
+    for rollup in rollups:
+        total["days"] += rollup["days"]
+        for key in SUMMED_KEYS:
+            total["tasks"][key] += rollup["tasks"][key]
+        if rollup["last"] is not None and (total["last"] is None or rollup["last"] > total["last"]):
+            total["last"] = rollup["last"]
+            for key in LATEST_KEYS:
+                total["tasks"][key] = rollup["tasks"][key]
+        tags.update(rollup["tags"])
+        links.update(rollup["links"])
+    total["tags"], total["links"] = dict(tags), dict(links)
+    return total
+
+
+# ---- Periods: "2025" (year), "2025-03" (month), "2025-W09" (ISO week) ----
+
+def period_key(unit, day):
+    """Key of the year/month/week containing `day`"""
+    if unit == "year":
+        return f"{day.year}"
+    if unit == "month":
+        return f"{day.year}-{day.month:02d}"
+    iso_year, week, _ = day.isocalendar()
+    return f"{iso_year}-W{week:02d}"
+
+
+def period_span(key):
+    """(first day, last day) of a period key"""
+    if len(key) == 4:
+        year = int(key)
+        return date(year, 1, 1), date(year, 12, 31)
+    if "-W" in key:
+        year, week = key.split("-W")
+        start = date.fromisocalendar(int(year), int(week), 1)
+        return start, start + timedelta(days=6)
+    year, month = (int(x) for x in key.split("-"))
+    start = date(year, month, 1)
+    return start, (start + timedelta(days=32)).replace(day=1) - ONE_DAY
+
+
+def _cover(start, end, units=("year", "month", "week")):
+    """Split [start, end] into whole stored periods (largest first) and leftover day spans"""
+    if start > end:
+        return [], []
+    if not units:
+        return [], [(start, end)]
+    unit, smaller = units[0], units[1:]
+    first = period_span(period_key(unit, start))
+    cursor = start if first[0] == start else first[1] + ONE_DAY
+    keys = []
+    while cursor <= end:
+        span = period_span(period_key(unit, cursor))
+        if span[1] > end:
+            break
+        keys.append(period_key(unit, cursor))
+        cursor = span[1] + ONE_DAY
+    if not keys:
+        return _cover(start, end, smaller)
+    head_keys, head_days = _cover(start, period_span(keys[0])[0] - ONE_DAY, smaller)
+    tail_keys, tail_days = _cover(cursor, end, smaller)
+    return head_keys + keys + tail_keys, head_days + tail_days
+
+
+# ---- Store ----
+
+def _connect():
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute("PRAGMA synchronous=NORMAL")
+        _conn.execute("CREATE TABLE IF NOT EXISTS days (day TEXT PRIMARY KEY, hash TEXT, data TEXT)")
+        _conn.execute("CREATE TABLE IF NOT EXISTS periods (period TEXT PRIMARY KEY, data TEXT)")
+    return _conn
+
+
+def _recompute(conn, key):
+    start, end = period_span(key)
+    if len(key) == 4:
+        rows = conn.execute("SELECT data FROM periods WHERE period BETWEEN ? AND ?",
+                            (f"{key}-01", f"{key}-12")).fetchall()
+    else:
+        rows = conn.execute("SELECT data FROM days WHERE day BETWEEN ? AND ?",
+                            (start.isoformat(), end.isoformat())).fetchall()
+    if rows:
+        data = json.dumps(merge(json.loads(data) for (data,) in rows), ensure_ascii=False)
+        conn.execute("INSERT OR REPLACE INTO periods VALUES (?, ?)", (key, data))
+    else:
+        conn.execute("DELETE FROM periods WHERE period = ?", (key,))
+
+
+def sync(root=None):
+    """Bring the rollups up to date with the daily notes; returns the number of changed days"""
+    notes = note_index.dailies(date.min, date.max, root or VAULT_DIR)
+    with _lock:
+        conn = _connect()
+        stored = dict(conn.execute("SELECT day, hash FROM days"))
+        current = {day.isoformat(): f"{ROLLUP_VERSION}:{meta['hash']}" for day, meta in notes.items()}
+        changed = [day for day, meta in notes.items() if stored.get(day.isoformat()) != current[day.isoformat()]]
+        removed = [day for day in stored if day not in current]
+        if not changed and not removed:
+            return 0
+        dirty = set()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO days VALUES (?, ?, ?)", [
+                (day.isoformat(), current[day.isoformat()], json.dumps(day_rollup(notes[day], day), ensure_ascii=False))
+                for day in changed
+            ])
+            conn.executemany("DELETE FROM days WHERE day = ?", [(day,) for day in removed])
+            for day in changed + [date.fromisoformat(d) for d in removed]:
+                dirty.update(period_key(unit, day) for unit in ("week", "month", "year"))
+            # Years are merged from their months, so those go last
+            for key in sorted(dirty, key=lambda k: len(k) == 4):
+                _recompute(conn, key)
+        return len(changed) + len(removed)
+
+
+def aggregate(start, end, root=None, refresh=True):
+    """Rollup of the daily notes from start to end (inclusive)
+
+    Pass refresh=False when sync() was already called for this run.
+    """
+    if refresh:
+        sync(root)
+    start, end = _as_date(start), _as_date(end)
+    keys, day_spans = _cover(start, end)
+    with _lock:
+        conn = _connect()
+        rows = []
+        if keys:
+            rows += conn.execute(f"SELECT data FROM periods WHERE period IN ({','.join('?' * len(keys))})",
+                                 keys).fetchall()
+        for first, last in day_spans:
+            rows += conn.execute("SELECT data FROM days WHERE day BETWEEN ? AND ?",
+                                 (first.isoformat(), last.isoformat())).fetchall()
+    return merge(json.loads(data) for (data,) in rows)
+
+
+def breakdown(start, end, unit, root=None, refresh=True):
+    """[(key, first day, last day, rollup)] per month or week, clipped to [start, end]"""
+    if refresh:
+        sync(root)
+    start, end = _as_date(start), _as_date(end)
+    parts = []
+    cursor = start
+    while cursor <= end:
+        key = period_key(unit, cursor)
+        last = min(period_span(key)[1], end)
+        parts.append((key, cursor, last, aggregate(cursor, last, refresh=False)))
+        cursor = last + ONE_DAY
+    return parts
+
+
+def rebuild():
+    """Drop all stored rollups"""
+    with _lock:
+        conn = _connect()
+        with conn:
+            conn.execute("DELETE FROM days")
+            conn.execute("DELETE FROM periods")
+
+
+def main():
+    print("📈 Period Rollups")
+    if "--rebuild" in sys.argv:
+        rebuild()
+        print("  🧹 Rollups cleared")
+    start = time.perf_counter()
+    changed = sync()
+    elapsed = time.perf_counter() - start
+    print(f"  🔄 Sync: {changed} day(s) updated in {elapsed * 1000:.1f} ms")
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if len(args) == 2:
+        start = time.perf_counter()
+        total = aggregate(date.fromisoformat(args[0]), date.fromisoformat(args[1]), refresh=False)
+        elapsed = time.perf_counter() - start
+        tasks = total["tasks"]
+        print(f"  📅 {args[0]} 〜 {args[1]}: {total['days']} active day(s)")
+        print(f"  ✅ done {tasks['done']} | 🔄 doing {tasks['doing']} | ⬜ open {tasks['open']} | ✖️ cancelled {tasks['cancelled']}")
+        print(f"  ⏱️ Aggregate: {elapsed * 1000:.2f} ms")
+        return total
+    with _lock:
+        conn = _connect()
+        days = conn.execute("SELECT COUNT(*) FROM days").fetchone()[0]
+        periods = conn.execute("SELECT COUNT(*) FROM periods").fetchone()[0]
+    print(f"  📊 Days: {days} | Periods: {periods}")
+    return {"days": days, "periods": periods}
+
+
+if __name__ == "__main__":
+    main()
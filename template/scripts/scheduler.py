@@ -2,20 +2,53 @@
 """
 ⏰ OAK Built-in Scheduler
 ========================
-config.json の設定に基づいて自動化タスクをバックグラウンドで定期実行します。
+config.json の設定に基づいて自動化タスクをバックグラウンドで実行します。
 OSのタスクスケジューラ（cron等）なしで運用可能です。
 
+固定間隔のポーリングではなく、Vault の変更通知（Linux は inotify、
+その他はポーリングにフォールバック）と次回実行時刻までのスリープで動作します。
+  - Daily / Weekly / Monthly / Yearly: cron 式（例: "cron": "30 23 * * sun"）または
+    time / day_of_week / day_of_month で指定した時刻に実行
+  - Git バックアップ / 検索インデックス: ノートが変更されたときだけ、
+    連続保存をまとめて（デバウンス）実行
+
+最後に処理した実行枠は scripts/.scheduler_state.json に保存され、再起動しても
+二重実行や取りこぼしは起きません。停止中に逃した実行枠は catch_up で制御します:
+  "skip"   逃した分は実行しない（misfire_grace_seconds 以内の遅れは実行）
+  "latest" 最新の 1 回分だけ実行（既定）
+  "all"    逃した各回を古い順に実行（最大 catch_up_limit 回）
+
+各タスクは job_runner.py によりスケジューラのプロセス内で実行されます
+（モジュールは初回のみ import、出力は scripts/.logs/jobs.log にローテーション保存）。
+scheduler.runner.isolation を "process" にすると、N ジョブごとに再起動される
+常駐ワーカープロセスで実行します。ジョブは別スレッドで並行実行され（同時実行数は
+runner.max_concurrent、ジョブごとの上限は max_instances・既定 1）、長いジョブが
+他のジョブやスケジューラ自体を止めることはありません。Vault や検索インデックスを
+書き換えるジョブは vault_lock.py のプロセス間ロックを取得するため、master.py や
+手動実行とも直列化されます。
+
+config.json の変更は再起動なしで反映されます。時刻指定のジョブは最後に処理した
+実行枠から再計算されるため（catch_up に従う）、変更の前後の枠を取りこぼしません。
+runner の設定は実行中のジョブがなくなった時点でランナーを作り直して反映します
+（poll_seconds のみ再起動が必要です）。
+
 使い方:
     python scheduler.py
 """
 
-import time
+import heapq
 import json
 import logging
-import subprocess
+import os
+import threading
+from collections import Counter
 from datetime import datetime, timedelta
 from pathlib import Path
 
+import cron_expr
+import job_runner
+import vault_watcher
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -25,26 +58,60 @@ logging.basicConfig(
 logger = logging.getLogger("OAK_Scheduler")
 
 SCRIPT_DIR = Path(__file__).parent
+VAULT_DIR = SCRIPT_DIR.parent
 CONFIG_PATH = SCRIPT_DIR / "config.json"
+STATE_PATH = SCRIPT_DIR / ".scheduler_state.json"
 MASTER_SCRIPT = SCRIPT_DIR / "master.py"
 
+# Re-check the wall clock at least this often (clock changes, suspend/resume)
+MAX_SLEEP = 300
+# A due job whose previous run is still going is retried after this long
+RETRY_SECONDS = 30
+CATCH_UP_POLICIES = ("skip", "latest", "all")
+
+# Jobs run in-process by job_runner: config key -> ("module:function", label)
+# Time jobs receive the slot they run for, so catch-up runs produce the right note.
+# They all write notes, so they hold the vault lock.
+TIME_JOBS = {
+    "daily_note": ("auto_daily:main", "Daily Note"),
+    "weekly_review": ("auto_weekly:main", "Weekly Review"),
+    "monthly_review": ("auto_monthly:main", "Monthly Review"),
+    "yearly_review": ("auto_yearly:main", "Yearly Review"),
+}
+# Change-triggered jobs: config key -> ("module:function", label, holds the vault lock)
+CHANGE_JOBS = {
+    "git_backup": ("git_backup:main", "Git Backup", True),
+    # Writes .search_index/ (vector generations, checkpoint), so builds must not overlap master.py's
+    "search_index": ("vault_search:build_index", "Search Index Update", True),
+}
+DEFAULT_TIMES = {"daily_note": "00:05", "weekly_review": "23:30", "monthly_review": "23:45",
+                 "yearly_review": "23:50"}
+
 # State tracking to avoid duplicate runs
 state = {
     "last_git_backup": datetime.min,
-    "last_daily_note_date": None,
-    "last_weekly_review_date": None,
-    "last_monthly_review_date": None,
+    "last_fire": {},      # time job -> latest slot already handled (persisted)
+    "last_runs": {},      # job -> {"at", "ok", "seconds", "lock_wait"} (persisted, informational)
+    "next_fire": {},      # time job -> datetime of its next slot
+    "heap": [],           # (next fire, job); entries not matching next_fire are stale
+    "pending": {},        # change job -> datetime it becomes due
+    "burst_start": None,  # first change of the current burst of saves
+    "running": Counter(), # job -> dispatched runs not finished yet
     "last_config_mtime": 0
 }
+# Guards `state` between the main loop and job threads
+state_lock = threading.Lock()
 
 current_config = {}
+runner = None
+runner_conf = None  # scheduler.runner settings the current runner was opened with
 
 def load_config():
     """Reload config.json if modified (Hot Reload)"""
     global current_config
     if not CONFIG_PATH.exists():
         return False
-    
+
     mtime = CONFIG_PATH.stat().st_mtime
     if mtime > state["last_config_mtime"]:
         try:
@@ -57,98 +124,279 @@ def load_config():
             logger.error(f"Failed to load config: {e}")
     return True
 
-def run_script(args, name):
-    """Execute a python script as a subprocess"""
-    logger.info(f"🚀 Starting task: {name}")
+def load_state():
+    """Restore persisted slots and backup time from the last session"""
     try:
-        cmd = [str(Path(sys.executable)), str(MASTER_SCRIPT)] + args
-        subprocess.run(cmd, check=True, capture_output=True, text=True)
-        logger.info(f"✅ Task complete: {name}")
-    except subprocess.CalledProcessError as e:
-        logger.error(f"❌ Task failed: {name}\n{e.stderr}")
-    except Exception as e:
-        logger.error(f"❌ Execution error: {e}")
-
-def check_schedule():
-    """Evaluate current time against config schedule"""
-    now = datetime.now()
-    today_str = now.strftime('%Y-%m-%d')
-    current_time_str = now.strftime('%H:%M')
-    current_day_of_week = now.strftime('%A')
-    current_day_of_month = now.day
+        data = json.loads(STATE_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return
+    if data.get("last_git_backup"):
+        state["last_git_backup"] = datetime.fromisoformat(data["last_git_backup"])
+    state["last_fire"] = {job: datetime.fromisoformat(t) for job, t in data.get("last_fire", {}).items()}
+    state["last_runs"] = data.get("last_runs", {})
+
+def save_state():
+    """Write the persisted part of the state atomically"""
+    data = {
+        "last_git_backup": (state["last_git_backup"].isoformat()
+                            if state["last_git_backup"] != datetime.min else None),
+        "last_fire": {job: t.isoformat() for job, t in state["last_fire"].items()},
+        "last_runs": state["last_runs"],
+    }
+    tmp = STATE_PATH.with_name(STATE_PATH.name + ".tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, STATE_PATH)
+
+def open_runner():
+    """Job runner per scheduler.runner (isolation: thread | process)"""
+    global runner_conf
+    conf = current_config.get("scheduler", {}).get("runner", {})
+    runner_conf = conf
+    return job_runner.JobRunner(conf.get("isolation", "thread"),
+                                conf.get("recycle_after", job_runner.DEFAULT_RECYCLE_AFTER),
+                                max_concurrent=conf.get("max_concurrent", job_runner.DEFAULT_MAX_CONCURRENT))
 
+def refresh_runner():
+    """Reopen the runner if scheduler.runner changed, once none of its jobs is still running"""
+    global runner
+    if current_config.get("scheduler", {}).get("runner", {}) == runner_conf:
+        return
+    if any(state["running"].values()):
+        return  # retried on the next wake-up
+    runner.close()
+    runner = open_runner()
+    logger.info("🔧 Job runner restarted with the new runner settings")
+
+def run_job(job, target, name, args=(), lock=False):
+    """Run a job in-process (blocking); its output goes to the rotating job log"""
+    sched = current_config.get("scheduler", {})
+    conf = sched.get(job, {})
+    timeout = conf.get("timeout_seconds", sched.get("runner", {}).get("timeout_seconds", job_runner.DEFAULT_TIMEOUT))
+    logger.info(f"🚀 Starting task: {name}")
+    result = runner.run(job, target, args, timeout=timeout, max_instances=conf.get("max_instances", 1), lock=lock)
+    waited = f", waited {result.lock_wait:.1f}s for vault lock" if (result.lock_wait or 0) >= 0.1 else ""
+    if result.ok:
+        logger.info(f"✅ Task complete: {name} ({result.seconds:.1f}s{waited})")
+    else:
+        logger.error(f"❌ Task failed: {name}: {result.error or 'returned False'}{waited} "
+                     f"(see {job_runner.LOG_PATH.name})")
+    with state_lock:
+        state["last_runs"][job] = {"at": datetime.now().isoformat(timespec="seconds"), "ok": result.ok,
+                                   "seconds": round(result.seconds, 1), "lock_wait": result.lock_wait}
+    return result.ok
+
+def dispatch(job, target, name, arg_sets, lock=False, on_done=None):
+    """Run a job on its own thread (once per args tuple, in order) so the main loop never blocks"""
+    def work():
+        ok = True
+        for args in arg_sets:
+            ok = run_job(job, target, name, args, lock) and ok
+        with state_lock:
+            state["running"][job] -= 1
+            if on_done is not None:
+                on_done(ok)
+            save_state()
+
+    state["running"][job] += 1
+    threading.Thread(target=work, name=f"dispatch-{job}", daemon=True).start()
+
+def job_cron(job, conf):
+    """CronExpr from the job's "cron" key, or from the legacy time/day settings"""
+    if conf.get("cron"):
+        return cron_expr.CronExpr(conf["cron"])
+    hour, minute = (int(x) for x in conf.get("time", DEFAULT_TIMES[job]).split(":"))
+    day, month, weekday = "*", "*", "*"
+    if job == "weekly_review":
+        weekday = conf.get("day_of_week", "Sunday")[:3]
+    elif job == "monthly_review":
+        day = conf.get("day_of_month", 1)
+    elif job == "yearly_review":
+        day, month = 1, 1
+    return cron_expr.CronExpr(f"{minute} {hour} {day} {month} {weekday}")
+
+def _push(job, fire):
+    state["next_fire"][job] = fire
+    if fire is not None:
+        heapq.heappush(state["heap"], (fire, job))
+
+def schedule_all(now, resume=False):
+    """Recompute the next slot of every enabled time-based job
+
+    With resume=True (startup, config reload) each job continues after the
+    last slot it handled, so slots missed while the scheduler was stopped
+    (or that passed just before the reload) are due now and run_due()
+    applies the catch-up policy to them.
+    """
+    sched = current_config.get("scheduler", {})
+    state["next_fire"] = {}
+    state["heap"] = []
+    for job in TIME_JOBS:
+        conf = sched.get(job, {})
+        if not (sched.get("enabled", False) and conf.get("enabled", False)):
+            continue
+        try:
+            cron = job_cron(job, conf)
+        except ValueError as e:
+            logger.error(f"Invalid schedule for {job}: {e}")
+            continue
+        last = state["last_fire"].get(job) if resume else None
+        _push(job, cron.next_after(last or now))
+
+def due_slots(job, conf, fire, now):
+    """(slots to run, latest slot passed) for a due job under its catch-up policy"""
+    sched = current_config.get("scheduler", {})
+    policy = conf.get("catch_up", sched.get("catch_up", "latest"))
+    if policy not in CATCH_UP_POLICIES:
+        logger.warning(f"Unknown catch_up {policy!r} for {job}; using 'latest'")
+        policy = "latest"
+    limit = max(1, sched.get("catch_up_limit", 7))
+    slots = ([fire] + job_cron(job, conf).between(fire, now, limit))[-limit:]
+    latest = slots[-1]
+    if policy == "all":
+        return slots, latest
+    if policy == "skip" and now - latest > timedelta(seconds=sched.get("misfire_grace_seconds", 300)):
+        return [], latest
+    return [latest], latest
+
+def mark_changed(changes, now):
+    """Debounce a burst of saves into one run of each change-triggered job"""
     sched = current_config.get("scheduler", {})
     if not sched.get("enabled", False):
         return
+    if state["burst_start"] is None:
+        state["burst_start"] = now
+    debounce = timedelta(seconds=sched.get("debounce_seconds", 10))
+    max_delay = timedelta(seconds=sched.get("max_delay_seconds", 120))
+    due = min(now + debounce, state["burst_start"] + max_delay)
 
-    # 1. Daily Note
-    dn_conf = sched.get("daily_note", {})
-    if dn_conf.get("enabled", False):
-        if current_time_str == dn_conf.get("time", "00:05"):
-            if state["last_daily_note_date"] != today_str:
-                state["last_daily_note_date"] = today_str
-                import sys
-                cmd = [sys.executable, str(SCRIPT_DIR / "auto_daily.py")]
-                subprocess.run(cmd, capture_output=True)
-                logger.info("✅ Daily Note task executed")
-
-    # 2. Git Backup
     git_conf = sched.get("git_backup", {})
     if git_conf.get("enabled", False):
-        interval_min = git_conf.get("interval_minutes", 60)
-        if now - state["last_git_backup"] >= timedelta(minutes=interval_min):
-            state["last_git_backup"] = now
-            import sys
-            cmd = [sys.executable, str(SCRIPT_DIR / "git_backup.py")]
-            subprocess.run(cmd, capture_output=True)
-            logger.info("✅ Git Backup task executed")
-
-    # 3. Weekly Review
-    wk_conf = sched.get("weekly_review", {})
-    if wk_conf.get("enabled", False):
-        if current_day_of_week == wk_conf.get("day_of_week", "Sunday") and current_time_str == wk_conf.get("time", "23:30"):
-            if state["last_weekly_review_date"] != today_str:
-                state["last_weekly_review_date"] = today_str
-                import sys
-                cmd = [sys.executable, str(SCRIPT_DIR / "auto_weekly.py")]
-                subprocess.run(cmd, capture_output=True)
-                logger.info("✅ Weekly Review task executed")
-
-    # 4. Monthly Review
-    mo_conf = sched.get("monthly_review", {})
-    if mo_conf.get("enabled", False):
-        if current_day_of_month == mo_conf.get("day_of_month", 1) and current_time_str == mo_conf.get("time", "23:45"):
-            if state["last_monthly_review_date"] != today_str:
-                state["last_monthly_review_date"] = today_str
-                import sys
-                cmd = [sys.executable, str(SCRIPT_DIR / "auto_monthly.py")]
-                subprocess.run(cmd, capture_output=True)
-                logger.info("✅ Monthly Review task executed")
+        # interval_minutes is now the minimum gap between backups
+        interval = timedelta(minutes=git_conf.get("interval_minutes", 60))
+        state["pending"]["git_backup"] = max(due, state["last_git_backup"] + interval)
+
+    notes_changed = any(rel.endswith(".md") or rel == vault_watcher.OVERFLOW for rel in changes)
+    if notes_changed and sched.get("search_index", {}).get("enabled", False):
+        state["pending"]["search_index"] = due
+
+def handle_changes(changes, now):
+    if vault_watcher.CONFIG_REL in changes:
+        load_config()
+        # Continue from the last handled slots so one due around the reload isn't skipped
+        schedule_all(now, resume=True)
+        changes = changes - {vault_watcher.CONFIG_REL}
+    if changes:
+        logger.info(f"📝 {len(changes)} file(s) changed")
+        mark_changed(changes, now)
+
+def _busy(job, sched):
+    """The job already has max_instances runs going"""
+    return state["running"][job] >= sched.get(job, {}).get("max_instances", 1)
+
+def _git_backup_done(ok):
+    state["last_git_backup"] = datetime.now()
+    # A backup that deferred its push (commit coalescing) asks to be run again
+    import git_backup
+    push_due = git_backup.load_state().get("push_due")
+    if push_due:
+        due = datetime.fromisoformat(push_due)
+        state["pending"]["git_backup"] = min(due, state["pending"].get("git_backup", due))
+
+def run_due(now):
+    """Dispatch every job whose slot or debounce deadline has passed
+
+    A job that already has max_instances runs going (default 1, i.e. no
+    overlapping runs) stays due and is retried after RETRY_SECONDS.
+    """
+    sched = current_config.get("scheduler", {})
+    heap = state["heap"]
+    busy = []
+    while heap and heap[0][0] <= now:
+        fire, job = heapq.heappop(heap)
+        if state["next_fire"].get(job) != fire:
+            continue  # superseded by a reschedule
+        if _busy(job, sched):
+            busy.append((fire, job))
+            continue
+        conf = sched.get(job, {})
+        target, label = TIME_JOBS[job]
+        slots, latest = due_slots(job, conf, fire, now)
+        if latest != fire:
+            logger.info(f"⏪ {label}: missed slots since {fire:%Y-%m-%d %H:%M}; running {len(slots)}")
+        if slots:
+            dispatch(job, target, label, [(slot,) for slot in slots], lock=True)
+        state["last_fire"][job] = latest
+        _push(job, job_cron(job, conf).next_after(latest))
+        save_state()
+    for entry in busy:
+        heapq.heappush(heap, entry)
+
+    for job, due in list(state["pending"].items()):
+        if due <= now and not _busy(job, sched):
+            del state["pending"][job]
+            target, label, lock = CHANGE_JOBS[job]
+            dispatch(job, target, label, [()], lock, _git_backup_done if job == "git_backup" else None)
+    if not state["pending"]:
+        state["burst_start"] = None
+
+def seconds_until_next(now):
+    """Sleep budget until the earliest deadline (capped by MAX_SLEEP)"""
+    sched = current_config.get("scheduler", {})
+    heap = state["heap"]
+    while heap and state["next_fire"].get(heap[0][1]) != heap[0][0]:
+        heapq.heappop(heap)
+    retry = now + timedelta(seconds=RETRY_SECONDS)
+    deadlines = [max(fire, retry) if _busy(job, sched) else fire
+                 for fire, job in heap if state["next_fire"].get(job) == fire]
+    deadlines += [max(due, retry) if _busy(job, sched) else due for job, due in state["pending"].items()]
+    if not deadlines:
+        return MAX_SLEEP
+    return max(0.0, min(MAX_SLEEP, (min(deadlines) - now).total_seconds()))
 
 
 def main():
+    global runner
     print("==================================================")
     print("  ⏰ OAK Built-in Scheduler is starting...")
     print("  Leave this terminal open to keep it running.")
     print("  Press Ctrl+C to stop.")
     print("==================================================\n")
-    
+
     if not load_config():
         logger.warning("config.json not found. Waiting for it to be created...")
+    load_state()
+
+    sched = current_config.get("scheduler", {})
+    runner = open_runner()
+    watcher = vault_watcher.open_watcher(VAULT_DIR, sched.get("poll_seconds", 60), logger.warning)
+    logger.info(f"👀 Watching vault ({type(watcher).__name__})")
+
+    now = datetime.now()
+    with state_lock:
+        schedule_all(now, resume=True)
+    for job, fire in sorted(state["next_fire"].items(), key=lambda item: item[1] or datetime.max):
+        if fire is not None:
+            logger.info(f"🗓️ {TIME_JOBS[job][1]}: next at {fire:%Y-%m-%d %H:%M}")
+    # Pick up edits made while the scheduler wasn't running
+    with state_lock:
+        mark_changed({vault_watcher.OVERFLOW}, now)
 
     try:
-        import sys
         while True:
-            load_config()
-            
-            if current_config.get("scheduler", {}).get("enabled", False):
-                check_schedule()
-            
-            # Sleep for a bit before checking again (aligns with minute boundaries reasonably well)
-            time.sleep(30)
-            
+            with state_lock:
+                timeout = seconds_until_next(datetime.now())
+            changes = watcher.wait(timeout)
+            now = datetime.now()
+            with state_lock:
+                if changes:
+                    handle_changes(changes, now)
+                refresh_runner()
+                run_due(now)
     except KeyboardInterrupt:
         print("\n⏹️ Scheduler stopped by user.")
+    finally:
+        watcher.close()
+        runner.close()
 
 
 if __name__ == "__main__":
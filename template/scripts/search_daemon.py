@@ -0,0 +1,338 @@
+"""
+🛰️ Search Daemon
+
+Resident search process for vault_search. Keeps the embedding store
+(memory-mapped), ANN/exact index, lexical index connection and Gemini
+client warm, and answers queries over HTTP on localhost. The index is
+hot-reloaded when build_index() writes a new version, the lexical index
+is refreshed at startup and every search.daemon_refresh_seconds in the
+background (queries themselves never touch the vault), and query
+embeddings are kept in an LRU cache (backed by query_cache.py) so
+repeated queries skip the API.
+
+The client side only needs the standard library, so queries don't pay
+for importing NumPy or google-generativeai.
+
+Endpoints (127.0.0.1 only):
+  GET  /search?q=...&k=5&mode=auto   → {"mode", "results": [...]}
+  GET  /health                        → index size, cache and request stats
+  POST /shutdown                      → stop the daemon (needs the X-Daemon-Token header)
+
+Requests whose Host header isn't 127.0.0.1:<port> or localhost:<port> are
+refused, so a web page can't reach the daemon through DNS rebinding.
+Shutdown takes the random token the daemon writes to its state file
+(.search_index/daemon.json), which only local processes of the user can
+read; a browser can't send it cross-origin.
+
+Usage:
+  python search_daemon.py --serve              # Run the daemon (or: vault_search.py --serve)
+  python search_daemon.py --query "query"      # Thin client
+  python search_daemon.py --stop               # Stop a running daemon
+"""
+
+import hmac
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from pathlib import Path
+
+from query_cache import normalize_query
+
+SCRIPTS_DIR = Path(__file__).parent
+INDEX_DIR = SCRIPTS_DIR / ".search_index"
+STATE_PATH = INDEX_DIR / "daemon.json"
+DEFAULT_PORT = 8765
+QUERY_CACHE_SIZE = 256
+REFRESH_SECONDS = 60
+TOKEN_HEADER = "X-Daemon-Token"
+
+
+class QueryLRU:
+    """Thread-safe LRU of query embeddings keyed by (model, normalized query)"""
+
+    def __init__(self, size=QUERY_CACHE_SIZE):
+        self.size = size
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model, query):
+        return model, normalize_query(query)
+
+    def get(self, model, query):
+        key = self.key(model, query)
+        with self.lock:
+            if key in self.items:
+                self.items.move_to_end(key)
+                self.hits += 1
+                return self.items[key]
+            self.misses += 1
+            return None
+
+    def put(self, model, query, vector):
+        with self.lock:
+            self.items[self.key(model, query)] = vector
+            self.items.move_to_end(self.key(model, query))
+            while len(self.items) > self.size:
+                self.items.popitem(last=False)
+
+
+class SearchService:
+    """Warm search state shared by all request threads"""
+
+    def __init__(self, config):
+        import lexical_index
+        import query_cache
+        import vault_search
+        self.vs = vault_search
+        self.config = config
+        self.search_conf = config.get("search", {})
+        self.embedder = None
+        if config.get("gemini_api_key", ""):
+            self.embedder = vault_search.get_embedder(config)
+        self.queries = QueryLRU(self.search_conf.get("daemon_cache_size", QUERY_CACHE_SIZE))
+        self.cache = query_cache.from_config(self.search_conf)
+        self.lexical = lexical_index.connect()
+        self.lock = threading.Lock()
+        self.store = None
+        self.index = None
+        self.stamp = None
+        self.reloads = 0
+        self.requests = 0
+        self.reload(lexical=True)
+
+    def reload(self, lexical=False):
+        """(Re)open the store if build_index() has written a new version
+
+        lexical=True also re-tokenizes notes edited since the last refresh;
+        that walks the vault, so it runs at startup and from the background
+        refresher, never on a query.
+        """
+        import ann_index
+        import embedding_store
+        if lexical:
+            self.vs.refresh_lexical()
+            # Generations this process released since the last swap (Windows can't delete mapped files)
+            embedding_store.prune(INDEX_DIR)
+        stamp = embedding_store.stat(INDEX_DIR)
+        if stamp == self.stamp:
+            return False
+        with self.lock:
+            if stamp == self.stamp:
+                return False
+            store = embedding_store.load(INDEX_DIR)
+            index = ann_index.for_store(store, INDEX_DIR, self.search_conf) if store is not None else None
+            # The old mapping is released once in-flight queries drop their references
+            self.store, self.index, self.stamp = store, index, stamp
+            self.reloads += 1
+        embedding_store.prune(INDEX_DIR)
+        if store is not None:
+            print(f"  🔄 Index loaded: {len(store)} chunks")
+        return True
+
+    def embed_query(self, query):
+        model = getattr(self.embedder, "model", "")
+        vector = self.queries.get(model, query)
+        if vector is None:
+            vector = self.cache.embed(self.embedder, query)
+            self.queries.put(model, query, vector)
+        return vector
+
+    def semantic(self, query, top_k):
+        store, index = self.store, self.index
+        if store is None or self.embedder is None:
+            return []
+        hits = index.search(self.embed_query(query), top_k * self.vs.CHUNK_FANOUT)
+        return self.vs.aggregate_by_note(hits, store.entries, top_k)
+
+    def search(self, query, top_k=5, mode="auto"):
+        import lexical_index
+        self.requests += 1
+        self.reload()
+        if mode == "auto":
+            mode = "hybrid" if self.embedder is not None and self.store is not None else "lexical"
+        if mode == "semantic":
+            results = self.semantic(query, top_k)
+        elif mode == "lexical":
+            results = lexical_index.search(query, top_k, self.lexical)
+        else:
+            pool = top_k * 4
+            results = self.vs.fuse([lexical_index.search(query, pool, self.lexical),
+                                    self.semantic(query, pool)], top_k)
+        return mode, results
+
+    def health(self):
+        return {
+            "pid": os.getpid(),
+            "chunks": len(self.store) if self.store is not None else 0,
+            "semantic": self.embedder is not None,
+            "reloads": self.reloads,
+            "requests": self.requests,
+            "query_lru": {"size": len(self.queries.items), "hits": self.queries.hits,
+                          "misses": self.queries.misses},
+            "query_cache": self.cache.stats(),
+        }
+
+
+def _handler(service, token):
+    from http.server import BaseHTTPRequestHandler
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _local(self):
+            """Refuse requests not addressed to this daemon by a loopback name (DNS rebinding)"""
+            port = self.server.server_address[1]
+            if self.headers.get("Host") in (f"127.0.0.1:{port}", f"localhost:{port}"):
+                return True
+            self._send(403, {"error": "forbidden host"})
+            return False
+
+        def do_GET(self):
+            if not self._local():
+                return
+            url = urllib.parse.urlparse(self.path)
+            params = urllib.parse.parse_qs(url.query)
+            try:
+                if url.path == "/health":
+                    self._send(200, service.health())
+                elif url.path == "/search" and params.get("q"):
+                    mode, results = service.search(params["q"][0], int(params.get("k", ["5"])[0]),
+                                                   params.get("mode", ["auto"])[0])
+                    self._send(200, {"mode": mode, "results": [
+                        {"score": float(score), "path": path, **data} for score, path, data in results]})
+                else:
+                    self._send(404, {"error": "unknown endpoint"})
+            except Exception as e:
+                self._send(500, {"error": f"{type(e).__name__}: {e}"})
+
+        def do_POST(self):
+            if not self._local():
+                return
+            if urllib.parse.urlparse(self.path).path != "/shutdown":
+                self._send(404, {"error": "unknown endpoint"})
+            elif not hmac.compare_digest(self.headers.get(TOKEN_HEADER, ""), token):
+                self._send(403, {"error": "invalid token"})
+            else:
+                self._send(200, {"ok": True})
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+        def log_message(self, format, *args):
+            pass  # keep the console quiet; /health has request counts
+
+    return Handler
+
+
+def serve(config=None, port=None):
+    """Run the daemon until interrupted (or /shutdown)"""
+    from http.server import ThreadingHTTPServer
+    import vault_search
+    config = vault_search.load_config() if config is None else config
+    port = port or config.get("search", {}).get("daemon_port", DEFAULT_PORT)
+    print("🛰️ Search daemon starting...")
+    service = SearchService(config)
+    token = secrets.token_hex(16)
+    server = ThreadingHTTPServer(("127.0.0.1", port), _handler(service, token))
+    server.daemon_threads = True
+    interval = config.get("search", {}).get("daemon_refresh_seconds", REFRESH_SECONDS)
+    stopped = threading.Event()
+
+    def refresher():
+        while not stopped.wait(interval):
+            try:
+                service.reload(lexical=True)
+            except Exception as e:
+                print(f"  ⚠️ Background refresh failed: {e}")
+
+    if interval:
+        threading.Thread(target=refresher, daemon=True).start()
+    INDEX_DIR.mkdir(parents=True, exist_ok=True)
+    STATE_PATH.unlink(missing_ok=True)  # so a stale file's permissions aren't kept
+    fd = os.open(STATE_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"port": server.server_address[1], "pid": os.getpid(), "token": token,
+                   "started": time.time()}, f)
+    print(f"  ✅ Listening on http://127.0.0.1:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stopped.set()
+        server.server_close()
+        STATE_PATH.unlink(missing_ok=True)
+        print("  👋 Search daemon stopped")
+
+
+def _request(path, timeout, method="GET"):
+    """Call a daemon endpoint; None if no daemon is running"""
+    try:
+        state = json.loads(STATE_PATH.read_text(encoding="utf-8"))
+        port = state["port"]
+    except (OSError, ValueError, KeyError):
+        return None
+    request = urllib.request.Request(f"http://127.0.0.1:{port}{path}", method=method,
+                                     headers={TOKEN_HEADER: state.get("token", "")})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def query(text, top_k=5, mode="auto", timeout=30):
+    """Ask a running daemon: (mode, [(score, path, data)]) or None if unavailable"""
+    params = urllib.parse.urlencode({"q": text, "k": top_k, "mode": mode})
+    reply = _request(f"/search?{params}", timeout)
+    if reply is None or "results" not in reply:
+        return None
+    return reply["mode"], [(r.pop("score"), r["path"], r) for r in reply["results"]]
+
+
+def main():
+    if "--serve" in sys.argv:
+        serve()
+    elif "--query" in sys.argv:
+        idx = sys.argv.index("--query")
+        if idx + 1 >= len(sys.argv):
+            print("Usage: python search_daemon.py --query \"query\" [--mode lexical|semantic|hybrid]")
+            return
+        mode = sys.argv[sys.argv.index("--mode") + 1] if "--mode" in sys.argv[:-1] else "auto"
+        start = time.perf_counter()
+        reply = query(sys.argv[idx + 1], mode=mode)
+        if reply is None:
+            print("  ⚠️ Search daemon not running. Start it with: python vault_search.py --serve")
+            return
+        mode, results = reply
+        print(f"\n🛰️ Results for: \"{sys.argv[idx + 1]}\" ({mode}, {(time.perf_counter() - start) * 1000:.0f} ms)\n")
+        for score, path, data in results:
+            heading = f" § {data['heading']}" if data.get("heading") else ""
+            print(f"  📄 {data['name']}{heading} ({score:.3f})")
+            print(f"     {data.get('preview', '')[:80]}...")
+    elif "--stop" in sys.argv:
+        print("  👋 Stopped" if _request("/shutdown", 5, method="POST") else "  📋 Search daemon not running")
+    elif "--health" in sys.argv:
+        print(json.dumps(_request("/health", 5), indent=2, ensure_ascii=False))
+    else:
+        print("Usage:")
+        print("  python search_daemon.py --serve")
+        print("  python search_daemon.py --query \"query\" [--mode lexical|semantic|hybrid]")
+        print("  python search_daemon.py --health | --stop")
+
+
+if __name__ == "__main__":
+    main()
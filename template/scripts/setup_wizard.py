@@ -57,8 +57,15 @@ DEFAULT_CONFIG = {
             "day_of_month": 1,
             "time": "23:45",
             "enabled": True
+        },
+        "yearly_review": {
+            "cron": "50 23 1 1 *",
+            "enabled": True
         }
     },
+    "templates": {
+        "locale": "ja"
+    },
     "features": {
         "daily_note": True,
         "weekly_review": True,
@@ -0,0 +1,207 @@
+"""
+⏱️ Pipeline Step Metrics
+
+Measures each master.py step: wall and CPU time, peak memory, files
+opened, bytes read/written, network connections and subprocesses. Results
+are appended to a JSON-lines run log so trends can be compared across runs.
+
+I/O is attributed per thread (steps run on their own worker thread):
+file/socket/subprocess counts come from a sys.addaudithook hook, and byte
+counts from /proc/thread-self/io on Linux. Peak RSS is process-wide
+because steps share one interpreter; `master.py --cprofile` runs steps
+serially and adds a per-step tracemalloc peak and cProfile dump.
+
+Usage:
+  python step_metrics.py [runs]   # Summary of the last run + averages (same as master.py --profile)
+"""
+
+import cProfile
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SCRIPTS_DIR = Path(__file__).parent
+RUN_LOG = SCRIPTS_DIR / ".pipeline_runs.jsonl"
+PROFILE_DIR = SCRIPTS_DIR / ".profiles"
+THREAD_IO = Path("/proc/thread-self/io")
+
+_local = threading.local()
+_hook_lock = threading.Lock()
+_hook_installed = False
+
+
+def _audit(event, args):
+    counters = getattr(_local, "counters", None)
+    if counters is None:
+        return
+    if event == "open":
+        path, mode = args[0], args[1]
+        if not isinstance(path, (str, bytes)) and not hasattr(path, "__fspath__"):
+            return
+        writing = isinstance(mode, str) and any(c in mode for c in "wax+")
+        counters["files_written" if writing else "files_read"].add(str(path))
+    elif event == "socket.connect":
+        counters["net_connects"] += 1
+    elif event == "subprocess.Popen":
+        counters["subprocesses"] += 1
+
+
+def _install_hook():
+    global _hook_installed
+    with _hook_lock:
+        if not _hook_installed:
+            sys.addaudithook(_audit)
+            _hook_installed = True
+
+
+def _thread_io():
+    """(bytes read, bytes written) by the calling thread, or None off Linux"""
+    try:
+        fields = dict(line.split(": ") for line in THREAD_IO.read_text().splitlines())
+        return int(fields["rchar"]), int(fields["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class StepMeasurement:
+    """Context manager recording metrics for one step on the current thread
+
+    with StepMeasurement("home", "Home.md Update", profile_dir=...) as m:
+        ...
+    m.record  # dict written to the run log
+    """
+
+    def __init__(self, key, name, profile_dir=None):
+        self.record = {"step": key, "name": name}
+        self.profile_dir = profile_dir
+        self.profiler = None
+
+    def __enter__(self):
+        _install_hook()
+        _local.counters = {"files_read": set(), "files_written": set(), "net_connects": 0, "subprocesses": 0}
+        self.io = _thread_io()
+        if self.profile_dir:
+            self.profiler = cProfile.Profile()
+            try:
+                self.profiler.enable()
+            except ValueError:  # another profiler is active (Python 3.12+ allows only one)
+                self.profiler = None
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()  # profiled runs are serial, so the peak is this step's
+        self.wall = time.perf_counter()
+        self.cpu = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record = self.record
+        record["wall_s"] = round(time.perf_counter() - self.wall, 3)
+        record["cpu_s"] = round(time.thread_time() - self.cpu, 3)
+        if self.profiler is not None:
+            self.profiler.disable()
+            Path(self.profile_dir).mkdir(parents=True, exist_ok=True)
+            self.profiler.dump_stats(str(Path(self.profile_dir) / f"{record['step']}.prof"))
+        counters = _local.counters
+        _local.counters = None
+        record["files_read"] = len(counters["files_read"])
+        record["files_written"] = len(counters["files_written"])
+        record["net_connects"] = counters["net_connects"]
+        record["subprocesses"] = counters["subprocesses"]
+        io_after = _thread_io()
+        if self.io and io_after:
+            record["bytes_read"] = io_after[0] - self.io[0]
+            record["bytes_written"] = io_after[1] - self.io[1]
+        record["rss_peak_mb"] = _peak_rss_mb()
+        if tracemalloc.is_tracing():
+            record["traced_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+        return False
+
+
+def append_run(run_id, records, path=RUN_LOG):
+    """Append one line per step to the run log"""
+    with open(path, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps({"run": run_id, **record}, ensure_ascii=False) + "\n")
+
+
+def load_runs(path=RUN_LOG, limit=None):
+    """[(run_id, [records])] oldest first, at most the last `limit` runs"""
+    runs = {}
+    if path.exists():
+        for line in path.read_text(encoding="utf-8").splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            runs.setdefault(record.pop("run"), []).append(record)
+    items = list(runs.items())
+    return items[-limit:] if limit else items
+
+
+def slowest(records, count=3):
+    """[(name, wall_s)] of the slowest steps"""
+    ranked = sorted(records, key=lambda r: r.get("wall_s", 0), reverse=True)[:count]
+    return [(r["name"], r["wall_s"]) for r in ranked]
+
+
+def _size(n):
+    if n is None:
+        return "—"
+    for unit in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f}{unit}"
+        n /= 1024
+    return f"{n:.1f}GB"
+
+
+def summary(runs=10, path=RUN_LOG):
+    """Print the last run's steps (slowest first) with averages over recent runs"""
+    history = load_runs(path, runs)
+    if not history:
+        print("  📋 No pipeline runs recorded yet")
+        return None
+    run_id, records = history[-1]
+    walls = {}
+    for _, recs in history:
+        for r in recs:
+            walls.setdefault(r["step"], []).append(r.get("wall_s", 0))
+
+    print(f"⏱️ Pipeline profile — run {run_id} (averages over {len(history)} runs)\n")
+    print(f"  {'step':<16}{'wall':>8}{'avg':>8}{'cpu':>8}{'rss':>8}{'read':>9}{'written':>9}"
+          f"{'files':>7}{'net':>5}{'proc':>5}")
+    for r in sorted(records, key=lambda r: r.get("wall_s", 0), reverse=True):
+        avg = sum(walls[r["step"]]) / len(walls[r["step"]])
+        rss = f"{r['rss_peak_mb']:.0f}MB" if r.get("rss_peak_mb") is not None else "—"
+        print(f"  {r['step']:<16}{r['wall_s']:>7.2f}s{avg:>7.2f}s{r['cpu_s']:>7.2f}s{rss:>8}"
+              f"{_size(r.get('bytes_read')):>9}{_size(r.get('bytes_written')):>9}"
+              f"{r['files_read'] + r['files_written']:>7}{r['net_connects']:>5}{r['subprocesses']:>5}")
+    return history
+
+
+def new_run_id():
+    return datetime.now().isoformat(timespec="milliseconds")
+
+
+def main():
+    runs = next((int(a) for a in sys.argv[1:] if a.isdigit()), 10)
+    summary(runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,39 +12,30 @@ import re
 from datetime import datetime
 from pathlib import Path
 
+import note_index
+from vault_scanner import notes_in, refresh_note, scan_vault
+
 VAULT_DIR = Path(__file__).parent.parent
 HOME_PATH = VAULT_DIR / "Home.md"
 DAILY_DIR = VAULT_DIR / "Daily"
 PROJECTS_DIR = VAULT_DIR / "Projects"
-IGNORE_DIRS = {".git", ".obsidian", "node_modules", "__pycache__", "scripts", ".github", "exports"}
 
 
 def get_vault_stats():
     """Get vault statistics"""
-    note_count = 0
-    total_size = 0
-    for md in VAULT_DIR.rglob("*.md"):
-        if any(part in IGNORE_DIRS for part in md.parts):
-            continue
-        note_count += 1
-        total_size += md.stat().st_size
-    return note_count, total_size
+    notes = scan_vault(VAULT_DIR)
+    return len(notes), sum(r.size for r in notes)
 
 
 def get_recent_dailies(count=5):
     """Get recent daily notes"""
-    if not DAILY_DIR.exists():
-        return []
-    dailies = sorted(DAILY_DIR.glob("*.md"), reverse=True)[:count]
+    dailies = [r for r in notes_in("Daily", VAULT_DIR) if r.folder == "Daily"]
+    dailies = sorted(dailies, key=lambda r: r.stem, reverse=True)[:count]
     results = []
     for d in dailies:
-        content = d.read_text(encoding="utf-8", errors="ignore")
-        # Extract first meaningful content line
-        lines = [l.strip() for l in content.split("\n") 
-                 if l.strip() and not l.startswith("#") and not l.startswith("---") 
-                 and not l.startswith(">") and not l.startswith("tags:") 
-                 and "type/" not in l and "created:" not in l]
-        summary = lines[0][:60] if lines else "—"
+        # First meaningful content line (see note_index.parse_note)
+        meta = note_index.get_meta(d.rel, VAULT_DIR)
+        summary = meta["summary"][:60] if meta["summary"] else "—"
         results.append({"date": d.stem, "summary": summary})
     return results
 
@@ -56,15 +47,15 @@ def get_projects():
     projects = []
     for proj_dir in sorted(PROJECTS_DIR.iterdir()):
         if proj_dir.is_dir():
-            main_file = proj_dir / f"{proj_dir.name}.md"
+            meta = note_index.get_meta(f"Projects/{proj_dir.name}/{proj_dir.name}.md", VAULT_DIR)
             status = "🟡 Unknown"
-            if main_file.exists():
-                content = main_file.read_text(encoding="utf-8", errors="ignore")
-                if "#status/active" in content:
+            if meta:
+                tags = meta["tags"]
+                if "status/active" in tags:
                     status = "🟢 Active"
-                elif "#status/completed" in content:
+                elif "status/completed" in tags:
                     status = "✅ Done"
-                elif "#status/paused" in content:
+                elif "status/paused" in tags:
                     status = "⏸️ Paused"
             projects.append({"name": proj_dir.name, "status": status})
     return projects
@@ -104,6 +95,7 @@ def update_home():
         )
     
     HOME_PATH.write_text(content, encoding="utf-8")
+    refresh_note(HOME_PATH, VAULT_DIR)
     print(f"  ✅ Home.md updated (notes: {note_count}, size: {size_kb}KB)")
     return True
 
@@ -8,33 +8,32 @@ Usage:
   python vault_health.py
 """
 
-import re
 from pathlib import Path
 from collections import Counter
 
+import note_index
+from link_resolver import AMBIGUOUS, BROKEN, build_resolver
+from vault_scanner import scan_vault
+
 VAULT_DIR = Path(__file__).parent.parent
-IGNORE_DIRS = {".git", ".obsidian", "node_modules", "__pycache__", "scripts", ".github", "exports"}
 
 
 def get_all_notes():
-    """Get all markdown files in the vault"""
+    """Get all markdown files in the vault, keyed by vault-relative path"""
     notes = {}
-    for md in VAULT_DIR.rglob("*.md"):
-        if any(part in IGNORE_DIRS for part in md.parts):
-            continue
-        rel = md.relative_to(VAULT_DIR)
-        notes[md.stem] = {"path": rel, "full_path": md}
+    for record in scan_vault(VAULT_DIR):
+        notes[record.rel] = {"name": record.stem, "path": Path(record.rel), "full_path": record.path, "record": record}
     return notes
 
 
 def extract_links(content):
     """Extract [[wiki links]] from content"""
-    return re.findall(r'\[\[([^\]|#]+?)(?:\|[^\]]*?)?\]\]', content)
+    return note_index.LINK_RE.findall(content)
 
 
 def extract_tags(content):
     """Extract #tags from content"""
-    return re.findall(r'#([a-zA-Z0-9_/\-\u3040-\u309f\u30a0-\u30ff\u4e00-\u9fff]+)', content)
+    return note_index.TAG_RE.findall(content)
 
 
 def check_health():
@@ -43,46 +42,47 @@ def check_health():
     print("=" * 50)
     
     notes = get_all_notes()
+    metas = note_index.load(VAULT_DIR)
+    resolver = build_resolver(VAULT_DIR, metas)
     print(f"\n📊 Total notes: {len(notes)}")
     
     all_links = {}
     all_tags = Counter()
     broken_links = []
+    ambiguous_links = []
     orphan_notes = set(notes.keys())
     notes_without_tags = []
     empty_notes = []
     
-    for name, info in notes.items():
-        content = info["full_path"].read_text(encoding="utf-8", errors="ignore")
+    for rel, info in notes.items():
+        name = info["name"]
+        meta = metas[rel]
         
         # Check links
-        links = extract_links(content)
-        all_links[name] = links
+        links = meta["links"]
+        all_links[rel] = links
         for link in links:
-            link_base = link.split("/")[-1]
-            if link_base not in notes and link_base not in [d.name for d in VAULT_DIR.iterdir() if d.is_dir()]:
+            status, targets = resolver.resolve(link, rel)
+            if status == BROKEN:
                 broken_links.append({"from": name, "to": link})
-            if link_base in orphan_notes:
-                orphan_notes.discard(link_base)
-        
-        # Track referencing notes
-        if name in orphan_notes and links:
-            pass  # Will be removed if referenced
+            elif status == AMBIGUOUS:
+                ambiguous_links.append({"from": name, "to": link, "candidates": targets})
+            for target in targets:
+                orphan_notes.discard(target)
         
         # Check tags
-        tags = extract_tags(content)
+        tags = meta["tags"]
         all_tags.update(tags)
         if not tags:
             notes_without_tags.append(name)
         
         # Check empty
-        content_lines = [l.strip() for l in content.split("\n") if l.strip() and not l.startswith("---") and not l.startswith("#")]
-        if len(content_lines) < 2:
+        if meta["body_lines"] < 2:
             empty_notes.append(name)
     
     # Remove Home and templates from orphans
-    for special in ["Home", "Daily テンプレート", "Weekly テンプレート", "Project テンプレート", "Quick Capture"]:
-        orphan_notes.discard(special)
+    specials = {"Home", "Daily テンプレート", "Weekly テンプレート", "Project テンプレート", "Quick Capture"}
+    orphan_notes = {rel for rel in orphan_notes if notes[rel]["name"] not in specials}
     
     # Report
     print(f"\n🔗 Broken Links: {len(broken_links)}")
@@ -91,6 +91,12 @@ def check_health():
     if len(broken_links) > 10:
         print(f"  ... and {len(broken_links) - 10} more")
     
+    print(f"\n🔀 Ambiguous Links: {len(ambiguous_links)}")
+    for al in ambiguous_links[:10]:
+        print(f"  ❓ {al['from']} → [[{al['to']}]] ({', '.join(al['candidates'][:3])})")
+    if len(ambiguous_links) > 10:
+        print(f"  ... and {len(ambiguous_links) - 10} more")
+    
     print(f"\n🏝️ Orphan Notes (not linked anywhere): {len(orphan_notes)}")
     for orphan in sorted(orphan_notes)[:10]:
         print(f"  📄 {orphan}")
@@ -132,6 +138,7 @@ def check_health():
     return {
         "total_notes": total,
         "broken_links": len(broken_links),
+        "ambiguous_links": len(ambiguous_links),
         "orphan_notes": len(orphan_notes),
         "empty_notes": len(empty_notes),
         "health_score": score
@@ -0,0 +1,169 @@
+"""
+🔒 Vault Lock
+
+Cross-process lock that serializes jobs which modify the vault or its
+derived state (note generators, git backup, the search index build, the
+master pipeline), whether they are started by the scheduler, master.py or
+by hand. Two index builds must never overlap: they would pick the same
+vector generation and share one checkpoint. Readers (searches, the search
+daemon) don't take it.
+
+The lock is an OS file lock on scripts/.vault.lock (fcntl.flock on
+macOS/Linux, msvcrt.locking on Windows), so it is released automatically
+if the holding process dies. Every acquisition appends its wait and hold
+times to scripts/.logs/vault_lock.jsonl.
+
+Usage:
+  python vault_lock.py            # Lock wait statistics per owner
+  python vault_lock.py --status   # Who holds the lock right now
+"""
+
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+SCRIPTS_DIR = Path(__file__).parent
+LOCK_PATH = SCRIPTS_DIR / ".vault.lock"
+OWNER_PATH = SCRIPTS_DIR / ".vault.lock.json"
+WAIT_LOG = SCRIPTS_DIR / ".logs" / "vault_lock.jsonl"
+POLL_SECONDS = 0.2
+
+
+def _try_lock(fd):
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+def holder():
+    """{"owner", "pid", "since"} of the current holder, or None"""
+    try:
+        return json.loads(OWNER_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _describe(info):
+    return f"{info['owner']} (pid {info['pid']}, since {info['since']})" if info else "another process"
+
+
+def _record(entry):
+    try:
+        WAIT_LOG.parent.mkdir(parents=True, exist_ok=True)
+        with open(WAIT_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError:
+        pass  # metrics are best-effort
+
+
+class Lease:
+    """Handle for a held lock; wait_s is how long acquiring it took"""
+
+    def __init__(self, owner, wait_s):
+        self.owner = owner
+        self.wait_s = wait_s
+
+
+@contextmanager
+def hold(owner, timeout=None, log=print):
+    """Hold the vault lock for the duration of the block
+
+    Raises TimeoutError if it can't be acquired within `timeout` seconds.
+    Not reentrant: don't take it again inside a block that already holds it.
+    """
+    LOCK_PATH.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(LOCK_PATH, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        start = time.monotonic()
+        announced = False
+        while not _try_lock(fd):
+            if not announced:
+                log(f"  🔒 Waiting for vault lock held by {_describe(holder())}")
+                announced = True
+            if timeout is not None and time.monotonic() - start >= timeout:
+                raise TimeoutError(f"vault lock not acquired within {timeout}s")
+            time.sleep(POLL_SECONDS)
+        acquired = time.monotonic()
+        lease = Lease(owner, acquired - start)
+        if announced:
+            log(f"  🔓 Vault lock acquired after {lease.wait_s:.1f}s")
+        try:
+            OWNER_PATH.write_text(json.dumps({"owner": owner, "pid": os.getpid(),
+                                              "since": datetime.now().isoformat(timespec="seconds")}),
+                                  encoding="utf-8")
+            yield lease
+        finally:
+            OWNER_PATH.unlink(missing_ok=True)
+            _unlock(fd)
+            _record({"at": datetime.now().isoformat(timespec="seconds"), "owner": owner, "pid": os.getpid(),
+                     "wait_s": round(lease.wait_s, 3), "held_s": round(time.monotonic() - acquired, 3)})
+    finally:
+        os.close(fd)
+
+
+def stats(path=WAIT_LOG, limit=1000):
+    """{owner: {"count", "avg_wait_s", "max_wait_s", "avg_held_s"}} over the last `limit` acquisitions"""
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()[-limit:]
+    except OSError:
+        return {}
+    grouped = {}
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        grouped.setdefault(entry["owner"], []).append(entry)
+    return {
+        owner: {
+            "count": len(entries),
+            "avg_wait_s": round(sum(e["wait_s"] for e in entries) / len(entries), 3),
+            "max_wait_s": max(e["wait_s"] for e in entries),
+            "avg_held_s": round(sum(e["held_s"] for e in entries) / len(entries), 3),
+        }
+        for owner, entries in grouped.items()
+    }
+
+
+def main():
+    if "--status" in sys.argv:
+        info = holder()
+        print(f"🔒 Held by {_describe(info)}" if info else "🔓 Vault lock is free")
+        return info
+    table = stats()
+    if not table:
+        print("  📋 No lock acquisitions recorded yet")
+        return table
+    print("🔒 Vault lock waits\n")
+    print(f"  {'owner':<18}{'count':>7}{'avg wait':>10}{'max wait':>10}{'avg held':>10}")
+    for owner, s in sorted(table.items(), key=lambda item: item[1]["max_wait_s"], reverse=True):
+        print(f"  {owner:<18}{s['count']:>7}{s['avg_wait_s']:>9.2f}s{s['max_wait_s']:>9.2f}s{s['avg_held_s']:>9.2f}s")
+    return table
+
+
+if __name__ == "__main__":
+    main()
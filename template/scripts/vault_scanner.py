@@ -0,0 +1,210 @@
+"""
+🗂️ Vault Scanner
+
+Walks the vault once with os.scandir and shares the resulting note list
+with every step of a pipeline run. Ignored directories (.git, node_modules,
+...) are pruned while walking instead of being filtered afterwards.
+
+Usage:
+  python vault_scanner.py   # Print scan statistics
+"""
+
+import io
+import os
+import threading
+import time
+from pathlib import Path
+
+VAULT_DIR = Path(__file__).parent.parent
+IGNORE_DIRS = {".git", ".obsidian", "node_modules", "__pycache__", "scripts", ".github", "exports"}
+
+_cache = {}
+_lock = threading.RLock()
+
+
+class NoteRecord:
+    """A markdown note found by the scanner (content is read on first access)"""
+
+    __slots__ = ("path", "rel", "mtime", "size", "_content")
+
+    def __init__(self, path, rel, mtime, size):
+        self.path = path
+        self.rel = rel
+        self.mtime = mtime
+        self.size = size
+        self._content = None
+
+    @property
+    def stem(self):
+        return self.path.stem
+
+    @property
+    def folder(self):
+        """Vault-relative parent folder ("" for the vault root)"""
+        return self.rel.rpartition("/")[0]
+
+    @property
+    def content(self):
+        if self._content is None:
+            self._content = self.path.read_text(encoding="utf-8", errors="ignore")
+        return self._content
+
+    def lines(self):
+        """Iterate the note's lines (with line endings), streaming from disk unless already read"""
+        if self._content is not None:
+            yield from io.StringIO(self._content)
+            return
+        with open(self.path, encoding="utf-8", errors="ignore") as f:
+            yield from f
+
+    def __repr__(self):
+        return f"NoteRecord({self.rel!r})"
+
+
+def _walk(root, folder="", dirs=None, files=None):
+    """Single os.scandir traversal; returns {rel_path: NoteRecord}
+
+    Folder paths and non-markdown files (attachments) are collected into
+    ``dirs`` and ``files`` when given.
+    """
+    notes = {}
+    start_rel = f"{folder}/" if folder else ""
+    stack = [(os.path.join(str(root), folder), start_rel)]
+    while stack:
+        dir_path, rel_dir = stack.pop()
+        try:
+            it = os.scandir(dir_path)
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in IGNORE_DIRS:
+                            stack.append((entry.path, f"{rel_dir}{entry.name}/"))
+                            if dirs is not None:
+                                dirs.add(rel_dir + entry.name)
+                    elif entry.name.endswith(".md") and entry.is_file():
+                        st = entry.stat()
+                        rel = rel_dir + entry.name
+                        notes[rel] = NoteRecord(Path(entry.path), rel, st.st_mtime, st.st_size)
+                    elif files is not None:
+                        files.add(rel_dir + entry.name)
+                except OSError:
+                    continue
+    return notes
+
+
+def _entry(root):
+    return _cache.setdefault(Path(root or VAULT_DIR), {"full": None, "folders": {}, "dirs": set(), "files": set()})
+
+
+def _get(root=None, refresh=False):
+    with _lock:
+        entry = _entry(root)
+        if refresh or entry["full"] is None:
+            entry["dirs"], entry["files"] = set(), set()
+            entry["full"] = _walk(Path(root or VAULT_DIR), dirs=entry["dirs"], files=entry["files"])
+            entry["folders"].clear()
+        return entry["full"]
+
+
+def scan_vault(root=None, refresh=False):
+    """Return all notes in the vault, scanning only once per pipeline run"""
+    return sorted(_get(root, refresh).values(), key=lambda r: r.rel)
+
+
+def list_folders(root=None):
+    """Vault-relative paths of every (non-ignored) folder"""
+    with _lock:
+        _get(root)
+        return set(_entry(root)["dirs"])
+
+
+def list_attachments(root=None):
+    """Vault-relative paths of every non-markdown file"""
+    with _lock:
+        _get(root)
+        return set(_entry(root)["files"])
+
+
+def _folder_notes(folder, root=None):
+    """{rel: record} for a folder; walks only that subtree if the vault wasn't scanned yet"""
+    folder = folder.strip("/")
+    with _lock:
+        entry = _entry(root)
+        if entry["full"] is not None:
+            prefix = f"{folder}/"
+            return {rel: r for rel, r in entry["full"].items() if rel.startswith(prefix)}
+        if folder not in entry["folders"]:
+            entry["folders"][folder] = _walk(Path(root or VAULT_DIR), folder)
+        return entry["folders"][folder]
+
+
+def notes_in(folder, root=None):
+    """Notes under a vault-relative folder (e.g. "Knowledge" or "Projects/Foo")"""
+    return sorted(_folder_notes(folder, root).values(), key=lambda r: r.rel)
+
+
+def get_note(rel, root=None):
+    """Look up a note by vault-relative path ("Daily/2025-01-01.md"), or None"""
+    folder = rel.rpartition("/")[0]
+    with _lock:
+        entry = _entry(root)
+        if entry["full"] is not None or not folder:
+            return _get(root).get(rel)
+        return _folder_notes(folder, root).get(rel)
+
+
+def refresh_note(path, root=None):
+    """Update the cached record for a note that a step just wrote or deleted"""
+    root = Path(root or VAULT_DIR)
+    path = Path(path)
+    rel = path.relative_to(root).as_posix()
+    try:
+        st = path.stat()
+        record = NoteRecord(path, rel, st.st_mtime, st.st_size)
+    except OSError:
+        record = None
+    with _lock:
+        entry = _cache.get(root)
+        if entry is None:
+            return
+        targets = [notes for folder, notes in entry["folders"].items() if rel.startswith(f"{folder}/")]
+        if entry["full"] is not None:
+            targets.append(entry["full"])
+        for notes in targets:
+            if record is None:
+                notes.pop(rel, None)
+            else:
+                notes[rel] = record
+
+
+def write_note(path, content, root=None):
+    """Write a note atomically (temp file + rename) and update its cached record"""
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(content, encoding="utf-8")
+    os.replace(tmp, path)
+    refresh_note(path, root)
+
+
+def clear_cache():
+    """Forget the previous scan (called at the start of each pipeline run)"""
+    with _lock:
+        _cache.clear()
+
+
+def main():
+    start = time.perf_counter()
+    notes = scan_vault()
+    elapsed = time.perf_counter() - start
+    total_size = sum(r.size for r in notes)
+    print("🗂️ Vault Scanner")
+    print(f"  📊 Notes: {len(notes)} ({total_size // 1024} KB)")
+    print(f"  ⏱️ Scan: {elapsed * 1000:.1f} ms")
+    return notes
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,42 @@
 """
-🔍 Vault Semantic Search (Gemini Embedding)
+🔍 Vault Search (Gemini Embedding + offline BM25)
 
 Build a search index and perform natural language search
-across your Obsidian vault using Gemini Embeddings.
+across your Obsidian vault using Gemini Embeddings. A local BM25
+index (lexical_index.py) is always built as well, so keyword search
+works offline and without an API key; hybrid mode fuses both rankings.
 
 Usage:
   python vault_search.py --build     # Build/update index
-  python vault_search.py --search "query"  # Search
+  python vault_search.py --search "query"  # Search (hybrid if possible)
+  python vault_search.py --search "query" --mode lexical|semantic|hybrid
+  python vault_search.py --search "query" --refresh  # Re-tokenize edited notes first
+  python vault_search.py --serve     # Keep the index warm (see search_daemon.py)
 """
 
+import hashlib
 import json
+import os
 import sys
 from pathlib import Path
 
+import ann_index
+import embedding_store
+import lexical_index
+import query_cache
+import search_daemon
+import vault_lock
+from vault_scanner import scan_vault
+
 VAULT_DIR = Path(__file__).parent.parent
 SCRIPTS_DIR = Path(__file__).parent
 INDEX_DIR = SCRIPTS_DIR / ".search_index"
-INDEX_PATH = INDEX_DIR / "index.json"
 CONFIG_PATH = SCRIPTS_DIR / "config.json"
-IGNORE_DIRS = {".git", ".obsidian", "node_modules", "__pycache__", "scripts", ".github", "exports"}
+# Chunks fetched per requested result before collapsing them per note
+CHUNK_FANOUT = 8
+# Reciprocal rank fusion constant for hybrid search
+RRF_K = 60
+MODES = ("auto", "lexical", "semantic", "hybrid")
 
 
 def load_config():
@@ -28,146 +46,347 @@ def load_config():
 
 
 def get_all_notes():
-    """Get all markdown files"""
-    notes = []
-    for md in VAULT_DIR.rglob("*.md"):
-        if any(part in IGNORE_DIRS for part in md.parts):
-            continue
-        notes.append(md)
-    return notes
+    """Get all markdown files (shared scan, see vault_scanner)"""
+    return scan_vault(VAULT_DIR)
 
 
-def build_index():
-    """Build search index using Gemini Embeddings"""
-    config = load_config()
+def _checkpoint_path():
+    return INDEX_DIR / "checkpoint.jsonl"
+
+
+def load_checkpoint():
+    """Embeddings finished by an interrupted build: {chunk_hash: record}"""
+    path = _checkpoint_path()
+    done = {}
+    if path.exists():
+        for line in path.read_text(encoding="utf-8").splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # partially written last line
+            done[record["hash"]] = record
+    return done
+
+
+def get_embedder(config):
+    """Gemini embedder from config.json, or None (with a message) if unavailable"""
     api_key = config.get("gemini_api_key", "")
-    
     if not api_key:
         print("  ⚠️ Gemini API key required for semantic search")
-        return False
-    
+        return None
     try:
-        import google.generativeai as genai
-        genai.configure(api_key=api_key)
+        from embedder import GeminiEmbedder
+        return GeminiEmbedder(api_key)
     except ImportError:
         print("  ⚠️ google-generativeai not installed")
-        return False
+        return None
+
+
+def _preview(text):
+    return text[:200].replace("\n", " ")
+
+
+def build_index(embedder=None):
+    """Build the chunk-level search index using batched embedding requests"""
+    from chunker import chunk_note
+    from embedder import embed_batches
     
+    config = load_config()
+    search_conf = config.get("search", {})
     INDEX_DIR.mkdir(parents=True, exist_ok=True)
     
     notes = get_all_notes()
     print(f"  📊 Indexing {len(notes)} notes...")
     
-    # Load existing index
-    existing = {}
-    if INDEX_PATH.exists():
-        existing = json.loads(INDEX_PATH.read_text(encoding="utf-8"))
+    # Offline keyword index first: it needs no API key and stays usable if embedding fails
+    updated, removed = lexical_index.update(notes)
+    print(f"  🔤 Lexical index: {updated} updated, {removed} removed")
     
-    index = {}
-    updated = 0
+    if embedder is None:
+        embedder = get_embedder(config)
+        if embedder is None:
+            print("  📋 Semantic index skipped; keyword search is available offline")
+            return True
+    
+    # Load existing index (binary store; legacy index.json is converted once)
+    embedding_store.migrate_legacy(INDEX_DIR)
+    store = embedding_store.load(INDEX_DIR)
+    existing = {}      # rel_path -> [(entry, row), ...]
+    chunk_rows = {}    # chunk hash -> row (any path)
+    by_note_hash = {}  # note content hash -> [(entry, row), ...] (for moved/renamed notes)
+    if store is not None:
+        for row, entry in enumerate(store.entries):
+            if "\\" in entry["path"]:  # older builds keyed Windows paths with backslashes
+                entry = dict(entry, path=entry["path"].replace("\\", "/"))
+            existing.setdefault(entry["path"], []).append((entry, row))
+            if "hash" in entry:
+                chunk_rows.setdefault(entry["hash"], row)
+        for rel_path, old in existing.items():
+            if old[0][0].get("note_hash"):
+                by_note_hash.setdefault(old[0][0]["note_hash"], old)
+    checkpoint = load_checkpoint()
+    
+    entries = []   # chunk entries in final order
+    vectors = []   # aligned with entries: a row of the old store, a new vector, or None until embedded
+    pending = []   # (position in entries, embed text)
+    reused = 0
+    unchanged = 0
+    moved = 0
+    
+    def keep(old, **updates):
+        for entry, row in old:
+            entries.append(dict(entry, **updates) if updates else entry)
+            vectors.append(row)
     
     for note in notes:
-        rel_path = str(note.relative_to(VAULT_DIR))
-        mtime = note.stat().st_mtime
+        rel_path = note.rel  # POSIX, the same key lexical_index uses, so fuse() can merge them
+        old = existing.get(rel_path, [])
+        indexed = bool(old) and all("hash" in e for e, _ in old)
         
-        # Skip if not modified
-        if rel_path in existing and existing[rel_path].get("mtime") == mtime:
-            index[rel_path] = existing[rel_path]
+        # Fast path: mtime and size unchanged
+        if indexed and old[0][0].get("mtime") == note.mtime and old[0][0].get("size") == note.size:
+            keep(old)
             continue
         
-        content = note.read_text(encoding="utf-8", errors="ignore")
-        # Truncate to avoid token limits
-        content_trimmed = content[:2000]
+        # Slow path: same content despite a new mtime (git pull, fresh clone, sync tools)
+        note_hash = hashlib.sha1(note.content.encode("utf-8")).hexdigest()
+        stamp = {"mtime": note.mtime, "size": note.size}
+        if indexed and old[0][0].get("note_hash") == note_hash:
+            keep(old, **stamp)
+            unchanged += 1
+            continue
+        
+        # Moved or renamed note: reuse the vectors stored under its old path
+        if not old and note_hash in by_note_hash:
+            keep(by_note_hash.pop(note_hash), path=rel_path, name=note.stem, **stamp)
+            moved += 1
+            continue
         
-        try:
-            result = genai.embed_content(
-                model="models/embedding-001",
-                content=content_trimmed,
-                task_type="retrieval_document"
-            )
-            index[rel_path] = {
+        # Re-chunk; only chunks whose hash is unknown need embedding
+        for chunk in chunk_note(note.stem, note.content, search_conf.get("chunk_chars", 2000)):
+            entry = {
+                "path": rel_path,
                 "name": note.stem,
-                "embedding": result["embedding"],
-                "mtime": mtime,
-                "preview": content[:200].replace("\n", " ")
+                "mtime": note.mtime,
+                "size": note.size,
+                "note_hash": note_hash,
+                "heading": chunk["heading"],
+                "hash": chunk["hash"],
+                "preview": _preview(chunk["body"])
             }
-            updated += 1
-        except Exception as e:
-            print(f"  ⚠️ Failed to embed {note.stem}: {e}")
-            if rel_path in existing:
-                index[rel_path] = existing[rel_path]
-    
-    INDEX_PATH.write_text(json.dumps(index, ensure_ascii=False), encoding="utf-8")
-    print(f"  ✅ Index built: {len(index)} notes ({updated} updated)")
+            entries.append(entry)
+            if chunk["hash"] in chunk_rows:
+                vectors.append(chunk_rows[chunk["hash"]])
+                reused += 1
+            elif chunk["hash"] in checkpoint:
+                vectors.append(checkpoint[chunk["hash"]]["embedding"])
+                reused += 1
+            else:
+                vectors.append(None)
+                pending.append((len(entries) - 1, chunk["text"]))
+    
+    if unchanged or moved:
+        print(f"  🔁 Content unchanged: {unchanged} touched, {moved} moved/renamed")
+    if reused:
+        print(f"  ♻️ Reused {reused} unchanged chunk embeddings")
+    
+    texts = [text for _, text in pending]
+    updated = 0
+    
+    with open(_checkpoint_path(), "a", encoding="utf-8") as ckpt:
+        def on_batch(start, batch_vectors):
+            nonlocal updated
+            for offset, vector in enumerate(batch_vectors):
+                pos = pending[start + offset][0]
+                vectors[pos] = vector
+                ckpt.write(json.dumps({"hash": entries[pos]["hash"], "embedding": list(vector)}) + "\n")
+                updated += 1
+            ckpt.flush()
+        
+        def on_error(start, error):
+            names = {entries[pos]["name"] for pos, _ in pending[start:start + search_conf.get("batch_size", 50)]}
+            print(f"  ⚠️ Failed to embed batch ({', '.join(sorted(names)[:3])}...): {error}")
+        
+        embed_batches(
+            embedder, texts,
+            batch_size=search_conf.get("batch_size", 50),
+            max_workers=search_conf.get("max_workers", 4),
+            max_retries=search_conf.get("max_retries", 5),
+            on_batch=on_batch,
+            on_error=on_error,
+        )
+    
+    # Notes with a failed chunk keep their previous vectors (retried on the next build)
+    failed = {entries[pos]["path"] for pos, _ in pending if vectors[pos] is None}
+    final_entries, final_vectors = [], []
+    for entry, vector in zip(entries, vectors):
+        if entry["path"] not in failed:
+            final_entries.append(entry)
+            final_vectors.append(vector)
+    for rel_path in failed:
+        for entry, row in existing.get(rel_path, []):
+            final_entries.append(dict(entry, mtime=None))
+            final_vectors.append(row)
+    
+    # Stored rows are copied straight out of the mapping; only new vectors are Python lists
+    final_vectors = embedding_store.gather(store, final_vectors)
+    if store is not None:
+        store.close()
+    dtype = search_conf.get("vector_dtype", "float32")
+    embedding_store.save(final_entries, final_vectors, INDEX_DIR, dtype)
+    if failed:
+        # Chunks of the failed notes that did embed aren't in the store; keep them for the retry
+        kept = [(entry["hash"], vector) for entry, vector in zip(entries, vectors)
+                if entry["path"] in failed and vector is not None and not isinstance(vector, int)]
+        tmp = _checkpoint_path().with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as ckpt:
+            for chunk_hash, vector in kept:
+                ckpt.write(json.dumps({"hash": chunk_hash, "embedding": list(vector)}) + "\n")
+        os.replace(tmp, _checkpoint_path())
+        print(f"  ⚠️ {len(failed)} note(s) kept their previous index; {len(kept)} embedded chunk(s) checkpointed for the next build")
+    else:
+        _checkpoint_path().unlink(missing_ok=True)
+    
+    # Keep the optional IVF index in step with the rewritten store
+    store = embedding_store.load(INDEX_DIR)
+    ann_stats = ann_index.sync(store, INDEX_DIR, search_conf)
+    if store is not None:
+        store.close()
+    if ann_stats:
+        action = "retrained" if ann_stats["retrained"] else "updated"
+        print(f"  🧭 ANN index {action}: +{ann_stats['inserted']} / -{ann_stats['deleted']} rows")
+    notes_indexed = len({e["path"] for e in final_entries})
+    print(f"  ✅ Index built: {notes_indexed} notes, {len(final_entries)} chunks ({updated} embedded)")
     return True
 
 
-def search(query, top_k=5):
-    """Search the vault using natural language"""
+def semantic_search(query, top_k=5, embedder=None):
+    """Embedding search: [(score, path, entry)] with the best-matching chunk per note"""
     config = load_config()
-    api_key = config.get("gemini_api_key", "")
-    
-    if not api_key:
-        print("  ⚠️ Gemini API key required")
-        return []
+    if embedder is None:
+        if not config.get("gemini_api_key", ""):
+            print("  ⚠️ Gemini API key required")
+            return []
     
-    if not INDEX_PATH.exists():
+    embedding_store.migrate_legacy(INDEX_DIR)
+    store = embedding_store.load(INDEX_DIR)
+    if store is None:
         print("  ⚠️ Search index not found. Run: python vault_search.py --build")
         return []
     
-    import google.generativeai as genai
-    genai.configure(api_key=api_key)
+    if embedder is None:
+        embedder = get_embedder(config)
+        if embedder is None:
+            return []
     
-    # Embed query
-    result = genai.embed_content(
-        model="models/embedding-001",
-        content=query,
-        task_type="retrieval_query"
-    )
-    query_embedding = result["embedding"]
-    
-    # Load index
-    index = json.loads(INDEX_PATH.read_text(encoding="utf-8"))
+    # Embed query (saved searches are answered from the persistent cache)
+    cache = query_cache.from_config(config.get("search", {}))
+    query_embedding = cache.embed(embedder, query)
+    cache.close()
     
-    # Compute similarities
-    import math
-    
-    def cosine_sim(a, b):
-        dot = sum(x * y for x, y in zip(a, b))
-        norm_a = math.sqrt(sum(x * x for x in a))
-        norm_b = math.sqrt(sum(x * x for x in b))
-        return dot / (norm_a * norm_b) if norm_a and norm_b else 0
+    # Rank chunks over the memory-mapped vectors (IVF on large indexes), then keep the best chunk per note
+    index = ann_index.for_store(store, INDEX_DIR, config.get("search", {}))
+    return aggregate_by_note(index.search(query_embedding, top_k * CHUNK_FANOUT), store.entries, top_k)
+
+
+def refresh_lexical():
+    """Re-tokenize notes edited since the last build or refresh"""
+    updated, removed = lexical_index.update(scan_vault(VAULT_DIR, refresh=True))
+    if updated or removed:
+        print(f"  🔤 Lexical index: {updated} updated, {removed} removed")
+    return updated, removed
+
+
+def lexical_search(query, top_k=5):
+    """Offline BM25 search (read-only; --build or --refresh picks up edits)"""
+    return lexical_index.search(query, top_k)
+
+
+def fuse(rankings, top_k=5, k=RRF_K):
+    """Reciprocal rank fusion of several [(score, path, data)] rankings"""
+    fused = {}
+    for ranking in rankings:
+        for rank, (_, path, data) in enumerate(ranking):
+            score, merged = fused.get(path, (0.0, {}))
+            fused[path] = (score + 1.0 / (k + rank + 1), {**data, **merged})
+    ranked = sorted(fused.items(), key=lambda x: x[1][0], reverse=True)[:top_k]
+    return [(score, path, data) for path, (score, data) in ranked]
+
+
+def _semantic_available(config):
+    return bool(config.get("gemini_api_key", "")) and (
+        (INDEX_DIR / embedding_store.META_NAME).exists() or (INDEX_DIR / embedding_store.LEGACY_NAME).exists()
+    )
+
+
+def search(query, top_k=5, embedder=None, mode="auto", use_daemon=True, refresh=False):
+    """Search the vault; auto uses hybrid when a semantic index and API key exist, else lexical"""
+    if refresh:
+        refresh_lexical()  # the daemon reads the same lexical index
+    # A running search daemon answers with a warm index and client
+    reply = search_daemon.query(query, top_k, mode) if use_daemon and embedder is None else None
+    if reply is not None:
+        mode, scores = reply
+        print_results(query, mode, scores)
+        return scores
     
-    scores = []
-    for path, data in index.items():
-        if "embedding" in data:
-            sim = cosine_sim(query_embedding, data["embedding"])
-            scores.append((sim, path, data))
+    if mode == "auto":
+        mode = "hybrid" if embedder is not None or _semantic_available(load_config()) else "lexical"
     
-    scores.sort(reverse=True)
+    if mode == "semantic":
+        scores = semantic_search(query, top_k, embedder)
+    elif mode == "lexical":
+        scores = lexical_search(query, top_k)
+    else:
+        pool = top_k * 4
+        semantic = semantic_search(query, pool, embedder)
+        scores = fuse([lexical_search(query, pool), semantic], top_k)
     
-    print(f"\n🔍 Search results for: \"{query}\"\n")
-    for score, path, data in scores[:top_k]:
-        print(f"  📄 {data['name']} ({score:.3f})")
+    print_results(query, mode, scores)
+    return scores
+
+
+def print_results(query, mode, scores):
+    print(f"\n🔍 Search results for: \"{query}\" ({mode})\n")
+    for score, path, data in scores:
+        heading = f" § {data['heading']}" if data.get("heading") else ""
+        print(f"  📄 {data['name']}{heading} ({score:.3f})")
         print(f"     {data.get('preview', '')[:80]}...")
         print()
-    
-    return scores[:top_k]
+
+
+def aggregate_by_note(hits, entries, top_k):
+    """[(score, row)] chunk hits -> [(score, path, entry)] with one (best) chunk per note"""
+    best = {}
+    for score, row in hits:
+        entry = entries[row]
+        if entry["path"] not in best or score > best[entry["path"]][0]:
+            best[entry["path"]] = (score, entry["path"], entry)
+    return sorted(best.values(), key=lambda x: x[0], reverse=True)[:top_k]
 
 
 def main():
     if "--build" in sys.argv:
-        build_index()
+        with vault_lock.hold("vault_search"):
+            build_index()
+    elif "--serve" in sys.argv:
+        search_daemon.serve()
     elif "--search" in sys.argv:
         idx = sys.argv.index("--search")
-        if idx + 1 < len(sys.argv):
-            search(sys.argv[idx + 1])
+        mode = "auto"
+        if "--mode" in sys.argv and sys.argv.index("--mode") + 1 < len(sys.argv):
+            mode = sys.argv[sys.argv.index("--mode") + 1]
+        if idx + 1 < len(sys.argv) and mode in MODES:
+            search(sys.argv[idx + 1], mode=mode, refresh="--refresh" in sys.argv)
         else:
-            print("Usage: python vault_search.py --search \"query\"")
+            print("Usage: python vault_search.py --search \"query\" [--mode lexical|semantic|hybrid] [--refresh]")
     else:
         print("Usage:")
         print("  python vault_search.py --build          # Build index")
         print("  python vault_search.py --search \"query\" # Search")
+        print("  python vault_search.py --search \"query\" --mode lexical|semantic|hybrid")
+        print("  python vault_search.py --search \"query\" --refresh  # Re-tokenize edited notes first")
+        print("  python vault_search.py --serve          # Resident search daemon")
 
 
 if __name__ == "__main__":
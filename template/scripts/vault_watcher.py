@@ -0,0 +1,212 @@
+"""
+👀 Vault Watcher
+
+Blocks until files in the vault change, instead of polling on a timer.
+Uses Linux inotify (via ctypes, no extra dependency) with one watch per
+directory; on other platforms, or when inotify is unavailable or out of
+watches, it falls back to periodic os.scandir snapshots.
+
+Ignored directories (.git, .obsidian, node_modules, ...) are not watched.
+Inside scripts/ only config.json is reported.
+
+Usage:
+  python vault_watcher.py   # Print changes as they happen
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+
+from vault_scanner import IGNORE_DIRS
+
+VAULT_DIR = Path(__file__).parent.parent
+CONFIG_REL = "scripts/config.json"
+# Reported instead of paths when the kernel queue overflowed (changes unknown)
+OVERFLOW = "*"
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT = struct.Struct("iIII")
+
+
+def _ignored_dir(name):
+    return name in IGNORE_DIRS or name.startswith(".")
+
+
+def _relevant(rel):
+    """Vault-relative file paths worth reporting"""
+    if rel.startswith("scripts/"):
+        return rel == CONFIG_REL
+    return not any(_ignored_dir(part) for part in rel.split("/")[:-1])
+
+
+class InotifyWatcher:
+    """Recursive inotify watch over the vault"""
+
+    def __init__(self, root=VAULT_DIR):
+        self.root = Path(root)
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = {}  # watch descriptor -> vault-relative folder ("" = root)
+        try:
+            self._watch_tree("")
+            self._watch(self.root / "scripts", "scripts")
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def _watch(self, path, rel):
+        wd = self._add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                raise OSError(err, "inotify watch limit reached (fs.inotify.max_user_watches)")
+            return  # directory vanished or is unreadable
+        self.dirs[wd] = rel
+
+    def _watch_tree(self, rel, found=None):
+        """Watch rel and every non-ignored directory below it (files inside go into found)"""
+        stack = [rel]
+        while stack:
+            folder = stack.pop()
+            self._watch(self.root / folder if folder else self.root, folder)
+            try:
+                entries = list(os.scandir(self.root / folder if folder else self.root))
+            except OSError:
+                continue
+            for entry in entries:
+                child = f"{folder}/{entry.name}" if folder else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if not _ignored_dir(entry.name):
+                        stack.append(child)
+                elif found is not None and _relevant(child):
+                    found.add(child)
+
+    def wait(self, timeout=None):
+        """Block up to timeout seconds; return the set of changed vault-relative paths"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT.unpack_from(data, offset)
+                name = data[offset + EVENT.size:offset + EVENT.size + length].rstrip(b"\0")
+                offset += EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    changed.add(OVERFLOW)
+                    continue
+                if mask & IN_IGNORED:
+                    self.dirs.pop(wd, None)
+                    continue
+                folder = self.dirs.get(wd)
+                if folder is None or not name:
+                    continue
+                name = os.fsdecode(name)
+                rel = f"{folder}/{name}" if folder else name
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO) and folder != "scripts" and not _ignored_dir(name):
+                        self._watch_tree(rel, changed)  # new folder: watch it, report its files
+                elif _relevant(rel):
+                    changed.add(rel)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback: compare os.scandir snapshots every `interval` seconds"""
+
+    def __init__(self, root=VAULT_DIR, interval=60):
+        self.root = Path(root)
+        self.interval = interval
+        self.snapshot = self._snapshot()
+
+    def _snapshot(self):
+        files = {}
+        stack = [""]
+        while stack:
+            folder = stack.pop()
+            try:
+                entries = list(os.scandir(self.root / folder if folder else self.root))
+            except OSError:
+                continue
+            for entry in entries:
+                rel = f"{folder}/{entry.name}" if folder else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not _ignored_dir(entry.name):
+                            stack.append(rel)
+                    elif _relevant(rel):
+                        st = entry.stat(follow_symlinks=False)
+                        files[rel] = (st.st_mtime_ns, st.st_size)
+                except OSError:
+                    continue
+        config = self.root / CONFIG_REL
+        if config.exists():
+            st = config.stat()
+            files[CONFIG_REL] = (st.st_mtime_ns, st.st_size)
+        return files
+
+    def wait(self, timeout=None):
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        snapshot = self._snapshot()
+        old = self.snapshot
+        self.snapshot = snapshot
+        return {rel for rel in old.keys() | snapshot.keys() if old.get(rel) != snapshot.get(rel)}
+
+    def close(self):
+        pass
+
+
+def open_watcher(root=VAULT_DIR, poll_interval=60, log=print):
+    """inotify watcher where supported, polling otherwise"""
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError) as e:
+            log(f"inotify unavailable ({e}); polling every {poll_interval}s")
+    return PollingWatcher(root, poll_interval)
+
+
+def main():
+    watcher = open_watcher()
+    print(f"👀 Watching {VAULT_DIR} ({type(watcher).__name__}). Press Ctrl+C to stop.")
+    try:
+        while True:
+            for rel in sorted(watcher.wait()):
+                print(f"  📝 {rel}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+🧮 Vector Index
+
+Cosine-similarity search over pre-normalized embeddings. Uses a float32
+NumPy matrix (one matrix-vector product + argpartition top-k) when NumPy
+is installed, and falls back to pure Python otherwise.
+
+Usage:
+  python vector_index.py --benchmark [notes] [dim]   # Compare backends
+"""
+
+import heapq
+import math
+import operator
+import random
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+BLOCK_ROWS = 65536
+
+
+def normalize(vector):
+    """Return the vector scaled to unit length (zero vectors stay zero)"""
+    norm = math.sqrt(sum(x * x for x in vector))
+    return [x / norm for x in vector] if norm else list(vector)
+
+
+class VectorIndex:
+    """Exact top-k cosine search; rows are stored unit-normalized"""
+
+    def __init__(self, vectors, use_numpy=None, normalized=False):
+        self.use_numpy = (np is not None) if use_numpy is None else (use_numpy and np is not None)
+        if self.use_numpy:
+            matrix = vectors if isinstance(vectors, np.ndarray) and vectors.dtype == np.float16 \
+                else np.asarray(vectors, dtype=np.float32)
+            if matrix.ndim != 2:
+                matrix = matrix.reshape(len(matrix), -1) if len(matrix) else np.zeros((0, 0), np.float32)
+            if not normalized and len(matrix):
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                norms[norms == 0] = 1.0
+                matrix = matrix / norms
+            self.matrix = matrix
+        else:
+            # Pre-normalized rows (e.g. a memory-mapped store) are used without copying
+            self.matrix = vectors if normalized else [normalize(v) for v in vectors]
+
+    def __len__(self):
+        return len(self.matrix)
+
+    def scores(self, query):
+        """Cosine similarity of the query against every row"""
+        if self.use_numpy:
+            q = np.asarray(query, dtype=np.float32)
+            norm = np.linalg.norm(q)
+            q = q / norm if norm else q
+            if self.matrix.dtype == np.float16:
+                # Upcast in blocks so float16 stores never materialize a float32 copy
+                out = np.empty(len(self.matrix), dtype=np.float32)
+                for i in range(0, len(self.matrix), BLOCK_ROWS):
+                    out[i:i + BLOCK_ROWS] = self.matrix[i:i + BLOCK_ROWS].astype(np.float32) @ q
+                return out
+            return self.matrix @ q
+        q = normalize(query)
+        return [sum(map(operator.mul, q, row)) for row in self.matrix]
+
+    def search(self, query, top_k=5):
+        """Return [(score, row), ...] for the top_k most similar rows"""
+        if not len(self):
+            return []
+        sims = self.scores(query)
+        top_k = min(top_k, len(self))
+        if self.use_numpy:
+            if top_k < len(sims):
+                rows = np.argpartition(-sims, top_k - 1)[:top_k]
+            else:
+                rows = np.arange(len(sims))
+            rows = rows[np.argsort(-sims[rows])]
+            return [(float(sims[i]), int(i)) for i in rows]
+        return heapq.nlargest(top_k, ((s, i) for i, s in enumerate(sims)))
+
+
+def _random_vectors(count, dim, seed=0):
+    rng = random.Random(seed)
+    return [[rng.gauss(0, 1) for _ in range(dim)] for _ in range(count)]
+
+
+def benchmark(count=5000, dim=768, queries=20):
+    """Time exact search with the NumPy and pure-Python backends"""
+    print(f"🧮 Vector search benchmark ({count} vectors x {dim} dims, {queries} queries)")
+    vectors = _random_vectors(count, dim)
+    query_vectors = _random_vectors(queries, dim, seed=1)
+    results = {}
+    backends = [("python", False)] + ([("numpy", True)] if np is not None else [])
+    for label, use_numpy in backends:
+        start = time.perf_counter()
+        index = VectorIndex(vectors, use_numpy=use_numpy)
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        hits = [index.search(q, 10) for q in query_vectors]
+        per_query = (time.perf_counter() - start) / queries
+        results[label] = {"build_s": build, "query_ms": per_query * 1000, "hits": hits}
+        print(f"  {label:<7} build {build * 1000:8.1f} ms | query {per_query * 1000:8.2f} ms")
+    if np is None:
+        print("  ⚠️ numpy not installed; only the pure-Python backend was measured")
+    else:
+        same = all(
+            [r for _, r in a] == [r for _, r in b]
+            for a, b in zip(results["python"]["hits"], results["numpy"]["hits"])
+        )
+        speedup = results["python"]["query_ms"] / max(results["numpy"]["query_ms"], 1e-9)
+        print(f"  ⚡ numpy speedup: {speedup:.0f}x | identical top-10: {'yes' if same else 'no'}")
+    return results
+
+
+def main():
+    if "--benchmark" in sys.argv:
+        idx = sys.argv.index("--benchmark")
+        args = [int(a) for a in sys.argv[idx + 1:idx + 3] if a.isdigit()]
+        benchmark(*args)
+    else:
+        print("Usage: python vector_index.py --benchmark [notes] [dim]")
+
+
+if __name__ == "__main__":
+    main()